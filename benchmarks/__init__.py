@@ -0,0 +1,3 @@
+"""
+Japanese WordCloud Generator ベンチマーク
+"""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+テキスト正規化のマイクロベンチマーク
+
+従来の4回のre.subによる前処理と、TextNormalizerのスループットを比較する。
+あわせて形態素ごとの文字種判定（re.matchとメモ化した判定）も比較する。
+
+    python -m benchmarks.bench_normalizer [--repeat N] [--scale N]
+"""
+
+import argparse
+import os
+import re
+import time
+from src.normalizer import (
+    DIGIT_CHARS, FULLWIDTH_SYMBOL_CHARS, SYMBOL_CHARS, TextNormalizer,
+)
+
+SAMPLE_TEXT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt"
+)
+
+# 数字・記号・空白を多めに含む行（前処理の負荷を上げるため）
+NOISY_LINE = "第２章 2024年の売上は+15.3%（前年比）! ＃速報 ＠広報 [参考] \t\n"
+
+
+def legacy_four_pass(text):
+    """従来の前処理（4回の全文re.sub）"""
+    text = re.sub(r'[0-9０-９]+', '', text)
+    text = re.sub(r'[!-/:-@\[-`{-~]', '', text)
+    text = re.sub(r'[！-／：-＠［-｀｛-～]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+_REMOVED = DIGIT_CHARS + SYMBOL_CHARS + FULLWIDTH_SYMBOL_CHARS
+_FUSED = re.compile(f'([{_REMOVED}]*\\s[\\s{_REMOVED}]*)|[{_REMOVED}]+')
+
+
+def fused_callback(text):
+    """除去と空白の正規化を1つの正規表現とコールバックで行う版（比較用）"""
+    return _FUSED.sub(lambda m: ' ' if m.group(1) is not None else '', text)
+
+
+def legacy_token_check(surface):
+    """従来の形態素ごとの文字種判定"""
+    return len(surface) > 1 and not re.match(r'^[ぁ-ん]+$', surface)
+
+
+def build_corpus(scale):
+    with open(SAMPLE_TEXT_PATH, encoding='utf-8') as f:
+        sample = f.read()
+    return (sample + NOISY_LINE) * scale
+
+
+def measure(func, text, repeat):
+    """最良の実行時間とスループット（MB/s）を求める"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    if text is None:
+        return best, None
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    return best, size_mb / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='テキスト正規化のスループットを計測')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（デフォルト: 5）')
+    parser.add_argument('--scale', type=int, default=2000, help='サンプルテキストの繰り返し回数（デフォルト: 2000）')
+    args = parser.parse_args()
+
+    text = build_corpus(args.scale)
+    normalizer = TextNormalizer()
+    normalizer_nfkc = TextNormalizer(nfkc=True)
+
+    # 既定設定のTextNormalizerは従来の前処理と同じ結果になる
+    assert normalizer.normalize(text) == legacy_four_pass(text)
+
+    cases = [
+        ('legacy 4-pass re.sub', legacy_four_pass),
+        ('fused regex + callback', fused_callback),
+        ('TextNormalizer', normalizer.normalize),
+        ('TextNormalizer (NFKC)', normalizer_nfkc.normalize),
+    ]
+    print(f"corpus: {len(text)} chars, {len(text.encode('utf-8')) / (1024 * 1024):.1f} MB")
+    baseline = None
+    for name, func in cases:
+        seconds, throughput = measure(func, text, args.repeat)
+        baseline = baseline or throughput
+        print(f"{name:<26} {seconds * 1000:8.1f} ms  {throughput:7.1f} MB/s  x{throughput / baseline:.2f}")
+
+    # 形態素の表層形は同じ語が繰り返し現れるため、語彙に偏りのある列で比較する
+    vocabulary = sorted(set(text.split('の')))[:500] + ['これ', 'する', 'データ', '解析']
+    surfaces = [vocabulary[(i * i) % len(vocabulary)] for i in range(200000)]
+    token_cases = [
+        ('legacy re.match', legacy_token_check),
+        ('TextNormalizer.is_valid_token', normalizer.is_valid_token),
+    ]
+    print(f"\ntoken checks: {len(surfaces)} surfaces")
+    baseline = None
+    for name, check in token_cases:
+        seconds, _ = measure(lambda _: [check(surface) for surface in surfaces], None, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:<30} {seconds * 1000:8.1f} ms  {len(surfaces) / seconds / 1e6:6.2f} M tokens/s  x{baseline / seconds:.2f}")
+
+
+if __name__ == "__main__":
+    main()
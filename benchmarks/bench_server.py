@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ワードクラウドサーバー（src.server）の負荷試験
+
+指定した数の接続（キープアライブ）から/renderにリクエストを送り続け、
+1秒あたりの処理件数・ステータスごとの件数・レイテンシの分位点を報告する。
+--urlを省略すると、空いているポートでサーバーを子プロセスとして起動して計測する。
+
+リクエストの本文は合成日本語コーパス（benchmarks.corpus）から作り、--distinct種類の
+テキストを順に使う。
+
+    python -m benchmarks.bench_server [--url http://127.0.0.1:8080] [--connections 8]
+        [--requests 200] [--workers 2] [--text-size 10KB] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.bench_suite import latency_summary
+from benchmarks.corpus import CorpusGenerator, parse_size
+
+# サーバーの起動を待つ時間の上限（秒）
+STARTUP_TIMEOUT = 60
+
+
+async def _request(reader, writer, host, path, body):
+    """キープアライブの接続で1リクエストを送り、(ステータス, 本文) を返す"""
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: text/plain; charset=utf-8\r\nContent-Length: {len(body)}\r\n\r\n"
+                  ).encode('latin-1') + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, _, header_block = head.decode('latin-1').partition("\r\n")
+    status = int(status_line.split(" ", 2)[1])
+    length = 0
+    close = False
+    for line in header_block.split("\r\n"):
+        name, _, value = line.partition(":")
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+        elif name.strip().lower() == 'connection':
+            close = value.strip().lower() == 'close'
+    payload = await reader.readexactly(length)
+    return status, payload, close
+
+
+async def run_load(url, bodies, total_requests, connections, params):
+    """connections本の接続から合計total_requests件を送り、結果を集計する"""
+    target = urlsplit(url)
+    path = f"/render?{urlencode(params)}" if params else "/render"
+    statuses = Counter()
+    latencies = []
+    next_index = 0
+
+    async def client():
+        nonlocal next_index
+        reader = writer = None
+        while next_index < total_requests:
+            index = next_index
+            next_index += 1
+            if writer is None:
+                reader, writer = await asyncio.open_connection(target.hostname, target.port)
+            started = time.perf_counter()
+            try:
+                status, _, close = await _request(reader, writer, target.netloc, path,
+                                                  bodies[index % len(bodies)])
+            except (ConnectionError, asyncio.IncompleteReadError):
+                status, close = 'error', True
+            latencies.append(time.perf_counter() - started)
+            statuses[status] += 1
+            if close:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    succeeded = statuses.get(200, 0)
+    return {
+        'requests': total_requests,
+        'connections': connections,
+        'seconds': round(elapsed, 3),
+        'requests_per_s': round(succeeded / elapsed, 2),
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'latency_ms': latency_summary(latencies),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, queue_size):
+    """サーバーを子プロセスで起動し、(プロセス, URL) を返す"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.server", "--port", str(port), "--workers", str(workers),
+         "--queue-size", str(queue_size)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("サーバーの起動に失敗しました")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("サーバーの起動がタイムアウトしました")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ワードクラウドサーバーの負荷試験')
+    parser.add_argument('--url', help='計測するサーバー（省略時は子プロセスで起動する）')
+    parser.add_argument('--connections', type=int, default=8, help='同時接続数（デフォルト: 8）')
+    parser.add_argument('--requests', type=int, default=200, help='送信するリクエスト数（デフォルト: 200）')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='起動するサーバーのワーカープロセス数（--url省略時、デフォルト: 2）')
+    parser.add_argument('--queue-size', type=int, default=16,
+                        help='起動するサーバーの待ち行列の長さ（--url省略時、デフォルト: 16）')
+    parser.add_argument('--text-size', default='10KB', help='1リクエストのテキストの大きさ（デフォルト: 10KB）')
+    parser.add_argument('--distinct', type=int, default=16, help='使うテキストの種類数（デフォルト: 16）')
+    parser.add_argument('--width', type=int, default=400, help='画像の幅（デフォルト: 400）')
+    parser.add_argument('--height', type=int, default=300, help='画像の高さ（デフォルト: 300）')
+    parser.add_argument('--json', metavar='PATH', help='結果をJSONで保存するパス')
+    args = parser.parse_args()
+
+    size = parse_size(args.text_size)
+    bodies = [CorpusGenerator(seed).text(size).encode('utf-8') for seed in range(max(1, args.distinct))]
+    params = {'width': args.width, 'height': args.height}
+
+    process = None
+    url = args.url
+    if url is None:
+        print(f"サーバーを起動しています（ワーカー {args.workers}）...", file=sys.stderr)
+        process, url = start_server(args.workers, args.queue_size)
+    try:
+        result = asyncio.run(run_load(url, bodies, args.requests, args.connections, params))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    result.update(url=url, text_bytes=size, distinct=len(bodies))
+
+    latency = result['latency_ms']
+    print(f"{result['requests_per_s']:.2f} requests/s  "
+          f"p50 {latency['p50']:.1f} ms  p90 {latency['p90']:.1f} ms  p99 {latency['p99']:.1f} ms  "
+          f"statuses {result['statuses']}", file=sys.stderr)
+    encoded = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GUIの起動時間のベンチマーク
+
+別プロセスでGUIを起動し、プロセス開始から次の時点までの時間を計測する。
+
+- import: src.wordcloud_guiの読み込み完了
+- first window: メインウィンドウが表示された時点
+- first preview: サンプルテキストのプレビューがキャンバスに表示された時点
+
+起動時プレビューのキャッシュが空の場合（cold）と、前回の起動で保存された場合（warm）を
+それぞれ計測する。キャッシュは一時ディレクトリに作るため、ユーザーのキャッシュには触れない。
+ディスプレイがない環境ではimportの時間だけを計測する。
+
+    python -m benchmarks.bench_startup [--repeat N] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# 子プロセスではGUIのモジュールを読み込む前の時刻を起点にする
+_PROCESS_START = time.perf_counter()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# プレビューが表示されるまで待つ上限（秒）
+PREVIEW_TIMEOUT = 120
+
+
+def child(start):
+    """子プロセス: GUIを起動して各時点の経過時間をJSONで出力する"""
+    timings = {}
+    import tkinter as tk
+    from src.wordcloud_gui import WordCloudGUI
+    timings['import'] = time.perf_counter() - start
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        timings['error'] = f"ディスプレイがありません: {e}"
+        print(json.dumps(timings))
+        return
+
+    app = WordCloudGUI(root)
+    root.wait_visibility(root)
+    root.update()
+    timings['first_window'] = time.perf_counter() - start
+
+    def poll():
+        if getattr(app.preview_canvas, 'image', None) is not None:
+            timings['first_preview'] = time.perf_counter() - start
+            root.quit()
+        elif time.perf_counter() - start > PREVIEW_TIMEOUT:
+            timings['error'] = "プレビューが表示されませんでした"
+            root.quit()
+        else:
+            root.after(5, poll)
+
+    root.after(0, poll)
+    root.mainloop()
+    # 起動時プレビューの保存が終わるのを待つ
+    app.scheduler.shutdown(wait=True)
+    root.destroy()
+    print(json.dumps(timings))
+
+
+def run_child(cache_dir):
+    env = dict(os.environ, WORDCLOUD_CACHE_DIR=cache_dir)
+    result = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def best_of(runs):
+    """各時点について最良の値を求める"""
+    keys = [key for key in ('import', 'first_window', 'first_preview') if key in runs[0]]
+    return {key: min(run[key] for run in runs if key in run) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GUIの起動時間を計測')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（デフォルト: 3）')
+    parser.add_argument('--json', metavar='PATH', help='結果をJSONで保存するパス')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(_PROCESS_START)
+        return
+
+    results = {}
+    for case in ('cold', 'warm'):
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                if case == 'warm':
+                    # 1回起動して起動時プレビューを保存しておく
+                    run_child(cache_dir)
+                runs.append(run_child(cache_dir))
+        if 'error' in runs[0]:
+            print(f"{case}: {runs[0]['error']}")
+        results[case] = best_of(runs)
+
+    for case, timings in results.items():
+        line = "  ".join(f"{key} {seconds * 1000:8.1f} ms" for key, seconds in timings.items())
+        print(f"{case:<5} {line}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
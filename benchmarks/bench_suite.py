@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解析・描画・エンドツーエンド処理のベンチマークスイート
+
+合成日本語コーパス（benchmarks.corpus）をサイズごとに用意し、次の処理を計測する。
+
+- extract_words: 形態素解析による単語の抽出
+- create_word_frequency: 単語の出現回数の集計とフィルタリング
+- generate_wordcloud: 頻度表からの描画と画像の保存（GUIのgenerate_custom_wordcloudと同じ経路）
+- process_text_file: ファイルの読み込みから画像の保存まで
+
+各処理を繰り返し実行してレイテンシの分位点（p50/p90/p99）とスループット（MB/s・tokens/s）を求め、
+別の1回でtracemallocによるピークメモリを計測する。結果はJSONで出力し、保存済みの
+ベースラインと比べてp50が閾値を超えて（かつ--min-delta-ms以上）遅くなった項目を回帰として報告する。
+ベースラインは計測した環境に依存するため、比較する環境で--save-baselineを使って作り直す。
+
+単語リストを全体で保持するextract_words・create_word_frequencyは--max-in-memoryを超える
+サイズでは計測せず、process_text_fileはそのサイズからストリーミング処理（--stream）で計測する。
+
+    python -m benchmarks.bench_suite [--sizes 10KB,1MB] [--repeat N] [--json out.json]
+        [--baseline benchmarks/baseline.json] [--threshold 0.2] [--min-delta-ms 1.0] [--save-baseline PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import DEFAULT_SEED, corpus_path, format_size, parse_size
+from src.options import RenderOptions
+
+BENCHMARKS = ('extract_words', 'create_word_frequency', 'generate_wordcloud', 'process_text_file')
+
+DEFAULT_SIZES = "10KB,100KB,1MB"
+ALL_SIZES = "10KB,100KB,1MB,10MB,100MB,1GB"
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# ベースラインより何割遅くなったら回帰とみなすか
+# （同じ環境で続けて計測しても、数回の計測のp50は1割程度ぶれるため、それより大きくする）
+DEFAULT_THRESHOLD = 0.2
+
+# 1ミリ秒に満たない処理は揺らぎで割合が大きく変わるため、p50の差がこれ以下なら回帰とみなさない
+DEFAULT_MIN_DELTA_MS = 1.0
+
+# 単語リストをメモリに保持する計測の上限サイズ
+DEFAULT_MAX_IN_MEMORY = "64MB"
+
+# 描画の計測に使う画像サイズ
+RENDER_OPTIONS = RenderOptions(width=800, height=600)
+
+RESULT_VERSION = 1
+
+
+def percentile(values, fraction):
+    """線形補間による分位点"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def latency_summary(seconds):
+    """実行時間の列からレイテンシの統計（ミリ秒）を求める"""
+    milliseconds = [value * 1000 for value in seconds]
+    return {
+        'min': round(min(milliseconds), 3),
+        'p50': round(percentile(milliseconds, 0.5), 3),
+        'p90': round(percentile(milliseconds, 0.9), 3),
+        'p99': round(percentile(milliseconds, 0.99), 3),
+        'max': round(max(milliseconds), 3),
+        'mean': round(sum(milliseconds) / len(milliseconds), 3),
+    }
+
+
+def measure(func, repeat):
+    """funcをrepeat回実行した時間と、別の1回で計測したピークメモリ（バイト）を返す
+
+    ピークメモリの計測はtracemallocで処理が遅くなるため、時間の計測とは分ける。
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def make_result(name, size_label, data_bytes, tokens, seconds, peak):
+    p50 = percentile(seconds, 0.5)
+    return {
+        'benchmark': name,
+        'size': size_label,
+        'bytes': data_bytes,
+        'tokens': tokens,
+        'repeat': len(seconds),
+        'latency_ms': latency_summary(seconds),
+        'mb_per_s': round(data_bytes / (1024 * 1024) / p50, 3) if data_bytes else None,
+        'tokens_per_s': round(tokens / p50, 1) if tokens else None,
+        'peak_memory_mb': round(peak / (1024 * 1024), 3),
+    }
+
+
+def run_size(generator, size, repeat, max_in_memory, output_dir, benchmarks):
+    """1つのコーパスサイズについて各ベンチマークを実行する"""
+    size_label = format_size(size)
+    path = corpus_path(size, DEFAULT_SEED)
+    data_bytes = os.path.getsize(path)
+    results = []
+    # 大きなコーパスは1回だけ計測する
+    repeat = repeat if size <= 10 * 1024 * 1024 else 1
+
+    in_memory = size <= max_in_memory
+    words = word_freq = tokens = None
+    if in_memory:
+        text = generator.read_text_file(path)
+        words = generator.extract_words(text)
+        tokens = len(words)
+        word_freq = generator.create_word_frequency(words, min_freq=1)
+
+    if 'extract_words' in benchmarks and in_memory:
+        seconds, peak = measure(lambda: generator.extract_words(text), repeat)
+        results.append(make_result('extract_words', size_label, data_bytes, tokens, seconds, peak))
+
+    if 'create_word_frequency' in benchmarks and in_memory:
+        seconds, peak = measure(lambda: generator.create_word_frequency(words, min_freq=2), repeat)
+        results.append(make_result('create_word_frequency', size_label, None, tokens, seconds, peak))
+
+    if 'generate_wordcloud' in benchmarks and in_memory and word_freq:
+        output_path = os.path.join(output_dir, f"render_{size_label}.png")
+        # レイアウトと描画済み画像のキャッシュが効かないよう、毎回キャッシュを空にしてから描画する
+        def render():
+            generator.layout_cache.clear()
+            generator.image_cache.clear()
+            generator.generate_wordcloud(word_freq, output_path, options=RENDER_OPTIONS)
+        seconds, peak = measure(render, repeat)
+        results.append(make_result('generate_wordcloud', size_label, None, None, seconds, peak))
+
+    if 'process_text_file' in benchmarks:
+        output_path = os.path.join(output_dir, f"end_to_end_{size_label}.png")
+        def process():
+            generator.layout_cache.clear()
+            generator.image_cache.clear()
+            generator.process_text_file(path, output_path, min_freq=1, stream=not in_memory,
+                                        render_options=RENDER_OPTIONS)
+        seconds, peak = measure(process, repeat)
+        # ストリーミング処理のサイズでは単語数を数え直さない（tokens/sは報告しない）
+        results.append(make_result('process_text_file', size_label, data_bytes, tokens, seconds, peak))
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """ベースラインとp50を比べ、閾値の割合を超え、かつmin_delta_ms以上遅くなった項目を回帰とする"""
+    previous = {(entry['benchmark'], entry['size']): entry for entry in baseline.get('results', [])}
+    comparisons = []
+    for entry in results:
+        base = previous.get((entry['benchmark'], entry['size']))
+        if base is None:
+            continue
+        ratio = entry['latency_ms']['p50'] / base['latency_ms']['p50']
+        comparisons.append({
+            'benchmark': entry['benchmark'],
+            'size': entry['size'],
+            'baseline_p50_ms': base['latency_ms']['p50'],
+            'p50_ms': entry['latency_ms']['p50'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold and
+                          entry['latency_ms']['p50'] - base['latency_ms']['p50'] > min_delta_ms,
+        })
+    return comparisons
+
+
+def environment():
+    import numpy
+    import wordcloud
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'wordcloud': wordcloud.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析・描画・エンドツーエンド処理のベンチマーク')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'コーパスのサイズ（カンマ区切り、デフォルト: {DEFAULT_SIZES}、最大: {ALL_SIZES}）')
+    parser.add_argument('--benchmarks', default=",".join(BENCHMARKS),
+                        help='実行するベンチマーク（カンマ区切り、デフォルト: すべて）')
+    parser.add_argument('--repeat', type=int, default=5, help='計測回数（デフォルト: 5、10MBを超えるサイズは1回）')
+    parser.add_argument('--max-in-memory', default=DEFAULT_MAX_IN_MEMORY,
+                        help=f'単語リストをメモリに保持する計測の上限サイズ（デフォルト: {DEFAULT_MAX_IN_MEMORY}）')
+    parser.add_argument('--json', metavar='PATH', help='結果をJSONで保存するパス（デフォルト: 標準出力）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='比較するベースライン（JSON、デフォルト: benchmarks/baseline.json）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'回帰とみなす遅延の割合（デフォルト: {DEFAULT_THRESHOLD}）')
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f'回帰とみなすp50の差の下限（ミリ秒、デフォルト: {DEFAULT_MIN_DELTA_MS}）')
+    parser.add_argument('--save-baseline', metavar='PATH', help='結果をベースラインとして保存するパス')
+    args = parser.parse_args()
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(',') if name.strip()]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"不明なベンチマーク: {', '.join(sorted(unknown))}")
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+
+    from src.wordcloud_generator import JapaneseWordCloudGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = JapaneseWordCloudGenerator()
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for size in sizes:
+            print(f"計測中: {format_size(size)}", file=sys.stderr)
+            # 処理中のメッセージは計測結果と混ざらないよう捨てる
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.extend(run_size(generator, size, args.repeat, parse_size(args.max_in_memory),
+                                        output_dir, benchmarks))
+
+    report = {'version': RESULT_VERSION, 'environment': environment(), 'results': results}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if baseline.get('environment') != report['environment']:
+            print("警告: ベースラインと計測環境が異なります（--save-baselineで作り直してください）", file=sys.stderr)
+
+    for entry in results:
+        throughput = f"{entry['mb_per_s']:9.2f} MB/s" if entry['mb_per_s'] else " " * 14
+        tokens = f"{entry['tokens_per_s']:12.0f} tokens/s" if entry['tokens_per_s'] else ""
+        print(f"{entry['benchmark']:<22} {entry['size']:>6}  p50 {entry['latency_ms']['p50']:10.2f} ms  "
+              f"{throughput}  peak {entry['peak_memory_mb']:8.2f} MB  {tokens}", file=sys.stderr)
+    regressions = [entry for entry in report.get('comparison', []) if entry['regression']]
+    for entry in regressions:
+        print(f"回帰: {entry['benchmark']} {entry['size']} p50 {entry['baseline_p50_ms']} ms -> "
+              f"{entry['p50_ms']} ms (x{entry['ratio']})", file=sys.stderr)
+
+    encoded = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+    if args.save_baseline:
+        baseline = {key: report[key] for key in ('version', 'environment', 'results')}
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(baseline, ensure_ascii=False, indent=2) + "\n")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+形態素解析器（トークナイザー）のバックエンドの比較
+
+同じ合成日本語コーパス（benchmarks.corpus）を各バックエンド（mecab・sudachi-a/b/c）で解析し、
+次の値を比べる。
+
+- 準備時間: 辞書の読み込みと最初の解析まで
+- tokens/s: 採用された単語数（extract_wordsの結果）÷ p50の実行時間
+- morphemes/s: 品詞による絞り込み前の形態素数 ÷ p50の実行時間
+- 最大RSS: プロセスの最大常駐メモリの増分（辞書を含む。Windowsでは計測しない）
+- Python側の最大割り当て量: 1回の解析中のtracemallocのピーク
+- 語彙数と上位の単語: 品質の目安として、最初のバックエンドの上位N語との一致率も出す
+
+辞書の読み込みによるメモリの増分を分けて計測するため、バックエンドごとに新しいプロセスで実行する。
+--lemmaを指定すると原形で数えた場合を計測する（語彙数が表層形の場合より少なくなる）。
+
+    python -m benchmarks.bench_tokenizers [--size 1MB] [--tokenizers mecab,sudachi-c]
+        [--repeat 3] [--top 50] [--lemma] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_suite import latency_summary, percentile
+from benchmarks.corpus import DEFAULT_SEED, corpus_path, format_size, parse_size
+from src.tokenizers import TOKENIZER_NAMES, TokenizerConfig
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def max_rss_bytes():
+    """プロセスの最大常駐メモリ（バイト、計測できない場合はNone）"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # LinuxはKB単位、macOSはバイト単位
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def measure_tokenizer(name, path, repeat, top, lemma=False):
+    """子プロセス内で1つのバックエンドを計測する"""
+    from src.text_input import read_text
+    from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+    text = read_text(path)
+    rss_before = max_rss_bytes()
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator = JapaneseWordCloudGenerator(tokenizer=TokenizerConfig(name, lemma=lemma), image_cache=None)
+    generator.extract_words("準備のための文章です。")
+    load_seconds = time.perf_counter() - started
+
+    seconds = []
+    words = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        words = generator.extract_words(text)
+        seconds.append(time.perf_counter() - start)
+    morphemes = sum(1 for _ in generator.tokenizer.tokens(generator.preprocess_text(text)))
+    rss_after = max_rss_bytes()
+
+    tracemalloc.start()
+    try:
+        generator.extract_words(text)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50 = percentile(seconds, 0.5)
+    counts = Counter(words)
+    rss_delta = rss_after - rss_before if rss_before is not None else None
+    return {
+        'tokenizer': name,
+        'lemma': lemma,
+        'load_ms': round(load_seconds * 1000, 1),
+        'latency_ms': latency_summary(seconds),
+        'tokens': len(words),
+        'tokens_per_s': round(len(words) / p50, 1),
+        'morphemes': morphemes,
+        'morphemes_per_s': round(morphemes / p50, 1),
+        'max_rss_delta_mb': round(rss_delta / (1024 * 1024), 1) if rss_delta is not None else None,
+        'python_peak_mb': round(peak / (1024 * 1024), 3),
+        'vocabulary': len(counts),
+        'top_words': [word for word, _ in counts.most_common(top)],
+    }
+
+
+def run_isolated(name, path, repeat, top, lemma=False):
+    """新しいプロセスでバックエンドを計測する（失敗した場合はエラーを記録する）"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        try:
+            return executor.submit(measure_tokenizer, name, path, repeat, top, lemma).result()
+        except Exception as e:
+            return {'tokenizer': name, 'error': str(e)}
+
+
+def add_overlap(results, top):
+    """最初のバックエンドの上位top語と、各バックエンドの上位top語の一致率を加える"""
+    measured = [entry for entry in results if 'error' not in entry]
+    if not measured:
+        return
+    reference = set(measured[0]['top_words'])
+    for entry in measured:
+        entry['top_overlap'] = round(len(reference & set(entry['top_words'])) / max(len(reference), 1), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='形態素解析器のバックエンドの速度・メモリの比較')
+    parser.add_argument('--size', default='1MB', help='コーパスのサイズ（デフォルト: 1MB）')
+    parser.add_argument('--tokenizers', default=",".join(TOKENIZER_NAMES),
+                        help='比較するバックエンド（カンマ区切り、デフォルト: すべて）')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（デフォルト: 3）')
+    parser.add_argument('--top', type=int, default=50, help='一致率を比べる上位の単語数（デフォルト: 50）')
+    parser.add_argument('--lemma', action='store_true', help='原形で数えた場合を計測する')
+    parser.add_argument('--json', metavar='PATH', help='結果をJSONで保存するパス（デフォルト: 標準出力）')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.tokenizers.split(',') if name.strip()]
+    unknown = set(names) - set(TOKENIZER_NAMES)
+    if unknown:
+        parser.error(f"不明なバックエンド: {', '.join(sorted(unknown))}")
+    size = parse_size(args.size)
+    path = corpus_path(size, DEFAULT_SEED)
+
+    results = []
+    for name in names:
+        print(f"計測中: {name}（{format_size(size)}）", file=sys.stderr)
+        results.append(run_isolated(name, path, max(1, args.repeat), args.top, args.lemma))
+    add_overlap(results, args.top)
+
+    for entry in results:
+        if 'error' in entry:
+            print(f"{entry['tokenizer']:<10} 失敗: {entry['error']}", file=sys.stderr)
+            continue
+        rss = f"{entry['max_rss_delta_mb']:7.1f} MB" if entry['max_rss_delta_mb'] is not None else "      -   "
+        print(f"{entry['tokenizer']:<10} 準備 {entry['load_ms']:8.1f} ms  p50 {entry['latency_ms']['p50']:10.2f} ms  "
+              f"{entry['tokens_per_s']:10.0f} tokens/s  {entry['morphemes_per_s']:10.0f} morphemes/s  "
+              f"RSS +{rss}  語彙 {entry['vocabulary']:6d}  上位一致 {entry['top_overlap']:.2f}", file=sys.stderr)
+
+    report = {'corpus': {'size': format_size(size), 'seed': DEFAULT_SEED}, 'lemma': args.lemma, 'results': results}
+    encoded = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(encoded + "\n")
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
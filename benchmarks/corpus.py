@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ベンチマーク用の合成日本語コーパス
+
+シードを固定した乱数で、名詞・動詞・形容詞を文型に当てはめた文を生成する。
+単語の出現頻度はZipf分布に従い、まれにカタカナの造語（一度しか現れない単語）を混ぜて
+実際の文章に近い語彙の偏りと裾の長さを再現する。ネットワークや外部データは使わず、
+同じサイズ・シードからは常に同じバイト列が得られる。
+
+生成したコーパスはキャッシュディレクトリに保存して再利用する（1GBの生成には数分かかる）。
+
+    python -m benchmarks.corpus 10MB -o corpus.txt
+"""
+
+import argparse
+import itertools
+import os
+import re
+from random import Random
+
+from src.token_cache import default_cache_dir
+
+# 生成規則を変えたときに保存済みのコーパスを作り直すためのバージョン
+CORPUS_VERSION = 1
+
+DEFAULT_SEED = 42
+
+SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+NOUNS = (
+    "技術 社会 データ 研究 学習 言語 情報 分野 開発 企業 市場 教育 環境 経済 文化 "
+    "政策 地域 医療 安全 品質 設計 製品 顧客 利用者 仕組み 課題 目標 成果 効果 影響 "
+    "方法 結果 分析 解析 予測 判断 意思決定 戦略 計画 組織 人材 資源 時間 費用 価値 "
+    "ネットワーク システム サービス プログラム アルゴリズム モデル コンピュータ ソフトウェア "
+    "インターネット プラットフォーム セキュリティ クラウド センサー ロボット エネルギー "
+    "人工知能 機械学習 自然言語処理 画像認識 音声認識 深層学習 統計 確率 数学 物理 "
+    "東京 大阪 日本 世界 国内 海外 都市 農業 工業 交通 物流 金融 観光 通信 報道 "
+    "学生 教師 研究者 技術者 経営者 消費者 市民 家族 子供 高齢者 専門家 政府 大学 学校"
+).split()
+
+VERBS = (
+    "行う 進める 高める 支える 変える 生み出す 広がる 求める 示す 活用する 導入する "
+    "改善する 提供する 実現する 分析する 開発する 検討する 期待する 注目する 貢献する "
+    "解決する 発展する 向上する 拡大する 構築する 管理する 評価する 予測する 共有する"
+).split()
+
+ADJECTIVES = (
+    "新しい 大きい 小さい 高い 低い 早い 難しい 易しい 重要な 必要な 便利な 複雑な "
+    "効率的な 持続可能な 多様な 正確な 柔軟な 安全な 身近な 画期的な"
+).split()
+
+TEMPLATES = (
+    "{n1}の{n2}は{a}{n3}を{v}。",
+    "{n1}では{n2}と{n3}が{v}ことが期待されています。",
+    "近年、{n1}における{n2}の{n3}が{a}課題となっています。",
+    "{n1}を{v}ために、{n2}の{n3}が{a}役割を果たします。",
+    "多くの{n1}が{n2}に関する{n3}を{v}。",
+    "{n1}と{n2}の関係について{n3}が{v}。",
+    "{a}{n1}によって、{n2}の{n3}は大きく変わりつつあります。",
+    "{n1}は{n2}の{n3}を{v}ための{a}手段です。",
+)
+
+KATAKANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモラリルレロガギグゲゴパピプペポ"
+
+# 1文にカタカナの造語を混ぜる確率（一度しか現れない単語で語彙の裾を長くする）
+RARE_WORD_RATE = 0.05
+
+# 1段落の文の数の範囲
+PARAGRAPH_SENTENCES = (3, 8)
+
+
+def parse_size(text):
+    """'10KB'・'1GB'・'2048'などのサイズ表記をバイト数に変換する"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', text.upper())
+    if not match:
+        raise ValueError(f"サイズの形式が不正です: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def format_size(size):
+    """バイト数を'10KB'・'1GB'などの表記にする"""
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+class CorpusGenerator:
+    """シードから決まる合成日本語テキストを段落単位で生成する"""
+
+    def __init__(self, seed=DEFAULT_SEED):
+        self.random = Random(seed)
+        self.noun_weights = self._zipf_weights(len(NOUNS))
+        self.verb_weights = self._zipf_weights(len(VERBS))
+        self.adjective_weights = self._zipf_weights(len(ADJECTIVES))
+
+    @staticmethod
+    def _zipf_weights(count):
+        """Zipf分布の累積重み（random.choicesのcum_weightsに渡す）"""
+        return list(itertools.accumulate(1 / rank for rank in range(1, count + 1)))
+
+    def _rare_word(self):
+        return "".join(self.random.choices(KATAKANA, k=self.random.randint(3, 6)))
+
+    def sentence(self):
+        random = self.random
+        n1, n2, n3 = random.choices(NOUNS, cum_weights=self.noun_weights, k=3)
+        if random.random() < RARE_WORD_RATE:
+            n3 = self._rare_word()
+        return random.choice(TEMPLATES).format(
+            n1=n1, n2=n2, n3=n3,
+            v=random.choices(VERBS, cum_weights=self.verb_weights)[0],
+            a=random.choices(ADJECTIVES, cum_weights=self.adjective_weights)[0],
+        )
+
+    def paragraph(self):
+        return "".join(self.sentence() for _ in range(self.random.randint(*PARAGRAPH_SENTENCES)))
+
+    def iter_blocks(self, size):
+        """合計がsizeバイト以下になるよう、段落（末尾に空行）単位のテキストを順に返す"""
+        written = 0
+        while True:
+            block = self.paragraph() + "\n\n"
+            block_size = len(block.encode('utf-8'))
+            if written + block_size > size:
+                return
+            written += block_size
+            yield block
+
+    def text(self, size):
+        return "".join(self.iter_blocks(size))
+
+
+def write_corpus(path, size, seed=DEFAULT_SEED):
+    """sizeバイト以下の合成コーパスをファイルに書き出す"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+        buffer = []
+        buffered = 0
+        for block in CorpusGenerator(seed).iter_blocks(size):
+            buffer.append(block)
+            buffered += len(block)
+            if buffered >= 1024 * 1024:
+                f.write("".join(buffer))
+                buffer.clear()
+                buffered = 0
+        f.write("".join(buffer))
+    os.replace(temp_path, path)
+    return path
+
+
+def corpus_path(size, seed=DEFAULT_SEED, directory=None):
+    """保存済みのコーパスのパスを返す（なければ生成する）"""
+    directory = directory or os.path.join(default_cache_dir(), "bench_corpus")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"corpus_v{CORPUS_VERSION}_{seed}_{format_size(size)}.txt")
+    if not os.path.exists(path):
+        write_corpus(path, size, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ベンチマーク用の合成日本語コーパスを生成')
+    parser.add_argument('size', help='コーパスのサイズ（例: 10KB, 100MB, 1GB）')
+    parser.add_argument('-o', '--output', help='出力先（デフォルト: キャッシュディレクトリに保存）')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f'乱数のシード（デフォルト: {DEFAULT_SEED}）')
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    if args.output:
+        path = write_corpus(args.output, size, args.seed)
+    else:
+        path = corpus_path(size, args.seed)
+    print(f"{path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
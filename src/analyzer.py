@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+MeCab.Taggerの生成と再利用
+
+Taggerは辞書の読み込みを伴うため生成コストが高く、またスレッドセーフではない。
+TaggerPoolは生成済みのTaggerを保持し、解析のたびに1つを貸し出して返却させる。
+同時に解析するスレッドはそれぞれ別のTaggerを使い、使い終わったTaggerは
+次の解析（別のスレッドからでもよい）で再利用される。
+SudachiPyのTokenizerも同じプールで保持する（src.tokenizers）。
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+
+def quote_option(value):
+    """MeCabのオプション文字列に渡すパスを引用符で囲む（空白を含むパスのため）"""
+    return '"' + value + '"'
+
+
+def create_mecab_tagger(dicdir=None, user_dictionaries=()):
+    """MeCab.Taggerを生成する（並列解析の各ワーカーでも同じ設定を使う）
+
+    dicdirはシステム辞書のディレクトリ、user_dictionariesはコンパイル済みのユーザー辞書（.dic）のパス。
+    """
+    # GUIの起動時に読み込まないよう、最初にTaggerを作るときに読み込む
+    import MeCab
+
+    options = "-Owakati"
+    if dicdir:
+        options += f" -d {quote_option(dicdir)}"
+    if user_dictionaries:
+        options += f" -u {quote_option(','.join(user_dictionaries))}"
+    # HomebrewでインストールされたMeCabの設定ファイルパスを指定
+    mecab_path = "/opt/homebrew/etc/mecabrc"
+    if os.path.exists(mecab_path):
+        return MeCab.Tagger(f"-r {mecab_path} {options}")
+    # デフォルトの設定で試行
+    return MeCab.Tagger(options)
+
+
+class TaggerPool:
+    """生成済みのTaggerを貸し出すスレッドセーフなプール"""
+
+    def __init__(self, factory=create_mecab_tagger):
+        self._factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @contextmanager
+    def acquire(self):
+        """Taggerを1つ借りる（空きがなければ新しく生成する）"""
+        with self._lock:
+            tagger = self._idle.pop() if self._idle else None
+        if tagger is None:
+            tagger = self._factory()
+            with self._lock:
+                self.created += 1
+        try:
+            yield tagger
+        finally:
+            with self._lock:
+                self._idle.append(tagger)
+
+    def warm(self, count):
+        """同時に使う数だけTaggerを事前に生成しておく"""
+        with self._lock:
+            missing = count - len(self._idle)
+        taggers = [self._factory() for _ in range(max(0, missing))]
+        with self._lock:
+            self.created += len(taggers)
+            self._idle.extend(taggers)
+
+    def stats(self):
+        """生成済み・待機中のTagger数を返す"""
+        with self._lock:
+            return {'created': self.created, 'idle': len(self._idle)}
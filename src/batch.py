@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+複数ファイルの一括処理（バッチモード）
+
+ディレクトリ・globパターン・ファイル一覧から入力ファイルを集め、1つの温まった
+ジェネレーター（ワーカープロセスを使う場合はプロセスごとに1つ）とフォント設定を
+全ファイルで使い回してワードクラウドを生成する。
+
+処理結果は出力先ディレクトリのマニフェスト（JSON）に、ファイルごとの所要時間・
+単語数・出力パスとして記録する。出力画像が入力ファイルより新しく、前回と同じ設定で
+生成されている場合はそのファイルをスキップする。
+"""
+
+import dataclasses
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from src.parallel import resolve_worker_count
+from src.rendering import create_wordcloud, save_image
+from src.text_input import input_stem
+
+# マニフェストの形式が変わったら更新する
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_OUTPUT_DIR = "wordcloud_output"
+
+# ディレクトリから集める入力ファイルの拡張子（圧縮ファイルは展開せずに読む）
+TEXT_EXTENSIONS = ('.txt', '.txt.gz', '.zip')
+
+STATUS_GENERATED = 'generated'
+STATUS_SKIPPED = 'skipped'
+STATUS_EMPTY = 'empty'
+STATUS_FAILED = 'failed'
+
+# ワーカープロセスごとに保持するジェネレーター（Taggerを含む）
+_worker_generator = None
+
+
+def collect_inputs(sources, list_files=()):
+    """ディレクトリ・globパターン・ファイルと、ファイル一覧から入力ファイルを集める
+
+    ディレクトリは配下の.txtファイルを再帰的に集める。ファイル一覧は1行1パスの
+    テキストで、空行と#で始まる行は無視し、相対パスは一覧ファイルからの相対とする。
+    同じファイルは最初に現れた位置で1回だけ処理する。
+    """
+    sources = list(sources)
+    for list_file in list_files:
+        base_dir = os.path.dirname(os.path.abspath(list_file))
+        with open(list_file, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    sources.append(os.path.join(base_dir, line))
+
+    inputs = {}
+    for source in sources:
+        if os.path.isdir(source):
+            found = []
+            for root, _, files in os.walk(source):
+                found.extend(os.path.join(root, name) for name in files
+                             if name.lower().endswith(TEXT_EXTENSIONS))
+            paths = sorted(found)
+        elif glob.has_magic(source):
+            paths = sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        else:
+            paths = [source]
+        for path in paths:
+            inputs.setdefault(os.path.abspath(path), None)
+    return list(inputs)
+
+
+def plan_outputs(inputs, output_dir, extension='.png'):
+    """入力ファイルごとの出力パスを決める（入力のディレクトリ構成を出力先に再現する）
+
+    同じディレクトリのa.txt・a.txt.gz・a.zipのように拡張子を除くと同じ名前になる
+    ファイルは、拡張子を含むファイル名（a.txt.gz_wordcloud.pngなど）で出力する。
+    それでも出力先が重なる場合はValueErrorを送出する。
+    """
+    if not inputs:
+        return {}
+    root = os.path.commonpath([os.path.dirname(path) for path in inputs])
+
+    def output_path(path, base_name):
+        relative_dir = os.path.relpath(os.path.dirname(path), root)
+        return os.path.normpath(os.path.join(output_dir, relative_dir, f"{base_name}_wordcloud{extension}"))
+
+    outputs = {path: output_path(path, input_stem(path)) for path in inputs}
+    claimed = {}
+    for path, output in outputs.items():
+        claimed.setdefault(output, []).append(path)
+    for paths in claimed.values():
+        if len(paths) > 1:
+            for path in paths:
+                outputs[path] = output_path(path, os.path.basename(path))
+
+    seen = {}
+    for path, output in outputs.items():
+        if output in seen:
+            raise ValueError(f"出力ファイル名が重なります: {seen[output]} と {path} -> {output}")
+        seen[output] = path
+    return outputs
+
+
+def settings_fingerprint(generator, analysis_options, render_options, output_options):
+    """出力画像に影響する設定のハッシュ（設定が変わったファイルは再生成する）"""
+    settings = {
+        'tokenizer': generator.tokenizer_fingerprint(),
+        'min_freq': analysis_options.min_freq,
+        'exclude_words': list(analysis_options.exclude_words),
+        'render': dataclasses.asdict(render_options),
+        'output': dataclasses.asdict(output_options),
+    }
+    encoded = json.dumps(settings, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_manifest(path):
+    """前回のマニフェストを読み込み、入力パスごとの項目を返す（なければ空）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return {entry['input']: entry for entry in manifest.get('files', [])}
+
+
+def is_up_to_date(input_path, output_path, settings, previous_entry=None):
+    """出力画像が入力ファイルより新しく、同じ設定で生成されたことがマニフェストに記録されていればTrue
+
+    マニフェストに記録のない出力（別の設定や手作業で作られた画像かもしれない）は最新とみなさない。
+    """
+    if previous_entry is None or previous_entry.get('settings') != settings:
+        return False
+    if previous_entry.get('status') not in (STATUS_GENERATED, STATUS_SKIPPED):
+        return False
+    if previous_entry.get('output') != output_path or not os.path.exists(output_path):
+        return False
+    return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+
+def process_file(generator, job, cache=None):
+    """1ファイルを解析してワードクラウドを書き出し、マニフェストの項目を返す"""
+    entry = {'input': job['input'], 'output': job['output'], 'settings': job['settings']}
+    started = time.perf_counter()
+    try:
+        text = generator.read_text_file(job['input'], job.get('encoding'))
+        analysis_options = job['analysis']
+        word_counts = generator.count_words([text], cache=cache)
+        word_freq = generator.create_word_frequency(
+            word_counts, analysis_options.min_freq, analysis_options.exclude_words)
+        analyzed = time.perf_counter()
+        entry.update(tokens=sum(word_counts.values()), unique_words=len(word_counts),
+                     words=len(word_freq))
+
+        if word_freq:
+            os.makedirs(os.path.dirname(job['output']) or '.', exist_ok=True)
+            render_options = job['render']
+            wordcloud = create_wordcloud(word_freq, render_options.font_path, render_options)
+            save_image(wordcloud.to_image(), job['output'], job['output_options'])
+            entry['status'] = STATUS_GENERATED
+        else:
+            entry['status'] = STATUS_EMPTY
+        finished = time.perf_counter()
+        entry['timings'] = {
+            'analyze': round(analyzed - started, 4),
+            'render': round(finished - analyzed, 4),
+            'total': round(finished - started, 4),
+        }
+    except Exception as e:
+        entry.update(status=STATUS_FAILED, error=str(e),
+                     timings={'total': round(time.perf_counter() - started, 4)})
+    return entry
+
+
+def _init_worker(normalizer, stopwords, tokenizer=None):
+    """ワーカープロセスの初期化: 親と同じ設定のジェネレーターを1つ用意して使い回す"""
+    global _worker_generator
+    from src.fonts import install_font_cache
+    from src.wordcloud_generator import JapaneseWordCloudGenerator
+    install_font_cache()
+    _worker_generator = JapaneseWordCloudGenerator(normalizer=normalizer, stopwords=stopwords, tokenizer=tokenizer)
+
+
+def _process_job(job):
+    return process_file(_worker_generator, job)
+
+
+def run_batch(generator, inputs, output_dir, analysis_options, render_options, output_options,
+              workers=1, manifest_path=None, force=False, cache=None, encoding=None):
+    """入力ファイルを一括処理してマニフェストを書き出し、その内容を返す
+
+    workersに2以上（0はCPUコア数）を指定すると複数プロセスでファイルを並行して
+    処理する。cache（TokenCache）はworkers=1の場合のみ使う。
+    encodingを省略すると入力ファイルごとに文字コードを判定する。
+    """
+    manifest_path = manifest_path or os.path.join(output_dir, MANIFEST_NAME)
+    extension = f".{output_options.format.lower()}" if output_options.format else ".png"
+    outputs = plan_outputs(inputs, output_dir, extension)
+
+    # フォントの検出は1回だけ行い、全ファイル（全ワーカー）で同じフォントを使う
+    font_path = generator.find_japanese_font(render_options.font_path)
+    render_options = dataclasses.replace(render_options, font_path=font_path)
+    settings = settings_fingerprint(generator, analysis_options, render_options, output_options)
+    previous = {} if force else load_manifest(manifest_path)
+
+    entries = {}
+    jobs = []
+    for path in inputs:
+        output_path = outputs[path]
+        previous_entry = previous.get(path)
+        if not force and is_up_to_date(path, output_path, settings, previous_entry):
+            entry = dict(previous_entry)
+            entry['status'] = STATUS_SKIPPED
+            entries[path] = entry
+            continue
+        jobs.append({'input': path, 'output': output_path, 'settings': settings,
+                     'analysis': analysis_options, 'render': render_options,
+                     'output_options': output_options, 'encoding': encoding})
+
+    print(f"{len(inputs)}ファイル中 {len(jobs)}ファイルを処理します（{len(entries)}ファイルは最新のためスキップ）")
+    started = time.perf_counter()
+    workers = min(resolve_worker_count(workers), max(len(jobs), 1))
+    for done, entry in enumerate(_run_jobs(generator, jobs, workers, cache), 1):
+        entries[entry['input']] = entry
+        elapsed = entry['timings']['total']
+        print(f"[{done}/{len(jobs)}] {entry['status']}: {entry['input']} ({elapsed:.2f}秒)")
+        if entry['status'] == STATUS_FAILED:
+            print(f"  エラー: {entry['error']}")
+
+    files = [entries[path] for path in inputs]
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'output_dir': os.path.abspath(output_dir),
+        'workers': workers,
+        'elapsed': round(time.perf_counter() - started, 4),
+        'summary': {status: sum(1 for entry in files if entry['status'] == status)
+                    for status in (STATUS_GENERATED, STATUS_SKIPPED, STATUS_EMPTY, STATUS_FAILED)},
+        'files': files,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"マニフェストを出力しました: {manifest_path}")
+    return manifest
+
+
+def _run_jobs(generator, jobs, workers, cache):
+    """ジョブを処理し、終わったものから順にマニフェストの項目を返す"""
+    if workers <= 1:
+        for job in jobs:
+            yield process_file(generator, job, cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(generator.normalizer, generator.stopwords,
+                                       generator.tokenizer.config)) as executor:
+        futures = [executor.submit(_process_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日本語フォントの検出と読み込み済みフォントの再利用
+
+FontRegistryはシステムのフォントディレクトリを一度だけ走査し、日本語のグリフを
+持つフォントを優先順に並べてキャッシュファイルに保存する。フォントディレクトリが
+更新されるまでは、次回以降の起動でもキャッシュファイルの結果をそのまま使う。
+
+また、WordCloudはレイアウト中にフォントサイズを変えながら何度もフォントファイルを
+読み込むため、install_font_cache() で (パス, サイズ) ごとのFreeTypeフォントを
+スレッドごとにLRUで保持し、描画をまたいで再利用する。install_font_cache() はwordcloudモジュールの
+ImageFontを差し替えるため、インポート時ではなくCLI・GUI・サーバー（のワーカー）が
+起動時に明示的に呼び出す。
+
+PILはフォントを読み込むときに初めてインポートするため、キャッシュファイルの結果を使う
+場合は（GUIの起動直後でも）PILを読み込まずにフォントを選べる。
+"""
+
+import json
+import os
+import sys
+import threading
+from functools import lru_cache
+
+from src.token_cache import default_cache_dir
+
+# フォントキャッシュファイルの形式が変わったら更新する
+FONT_CACHE_VERSION = 1
+
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf', '.otc')
+
+# 優先して使うフォント（優先順）
+PREFERRED_FONTS = [
+    # ヒラギノフォント（macOS標準）
+    '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
+    '/System/Library/Fonts/Hiragino Sans W3.ttc',
+    '/System/Library/Fonts/ヒラギノ丸ゴ ProN W4.ttc',
+    '/System/Library/Fonts/Hiragino Sans GB.ttc',  # 中国語だが日本語も対応
+
+    # Arial Unicode（多言語対応）
+    '/System/Library/Fonts/Arial Unicode.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+
+    # Notoフォントシリーズ（Chrome/Linux環境で利用可能）
+    '/System/Library/Fonts/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc',
+
+    # その他の一般的な日本語フォント
+    '/System/Library/Fonts/PingFang.ttc',
+    '/System/Library/Fonts/ArialHB.ttc',
+]
+
+# ファイル名から日本語フォントらしいと判断するための手がかり（優先順）
+JAPANESE_FONT_HINTS = (
+    'hiragino', 'ヒラギノ', 'notosanscjk', 'notosansjp', 'notoserifcjk', 'notoserifjp',
+    'sourcehansans', 'sourcehanserif', 'yugoth', 'meiryo', 'msgothic', 'ipaexg', 'ipag',
+    'takao', 'vl-gothic', 'vlgothic', 'ume-', 'osaka', 'droidsansjapanese',
+    'arial unicode', 'pingfang', 'arialhb', 'wqy', 'unifont',
+)
+
+# グリフの有無を確認する文字
+JAPANESE_SAMPLE_CHARS = 'あア漢'
+
+# 読み込み済みフォントを保持する数（スレッドごと）
+FONT_OBJECT_CACHE_SIZE = 256
+
+# スレッドごとの読み込み済みフォント
+_thread_fonts = threading.local()
+
+
+def system_font_directories():
+    """OSごとのフォントディレクトリを返す"""
+    home = os.path.expanduser("~")
+    if sys.platform == 'darwin':
+        return [
+            '/System/Library/Fonts',
+            '/System/Library/Fonts/Supplemental',
+            '/Library/Fonts',
+            os.path.join(home, 'Library/Fonts'),
+        ]
+    if os.name == 'nt':
+        windir = os.environ.get('WINDIR', 'C:\\Windows')
+        local = os.environ.get('LOCALAPPDATA', os.path.join(home, 'AppData', 'Local'))
+        return [
+            os.path.join(windir, 'Fonts'),
+            os.path.join(local, 'Microsoft', 'Windows', 'Fonts'),
+        ]
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(home, '.local', 'share')
+    return [
+        '/usr/share/fonts',
+        '/usr/local/share/fonts',
+        os.path.join(data_home, 'fonts'),
+        os.path.join(home, '.fonts'),
+    ]
+
+
+def has_japanese_glyphs(path):
+    """フォントが日本語のグリフを持つか確認する（未定義グリフの描画結果と比較）"""
+    from PIL import ImageFont
+    try:
+        font = ImageFont.truetype(path, 32)
+
+        def signature(char):
+            mask = font.getmask(char)
+            return mask.size, bytes(mask)
+
+        missing = signature('\U0010FFFD')
+        return all(signature(char) != missing for char in JAPANESE_SAMPLE_CHARS)
+    except Exception:
+        return False
+
+
+def _preference(path):
+    """フォントの優先順位（小さいほど優先）"""
+    if path in PREFERRED_FONTS:
+        return (0, PREFERRED_FONTS.index(path), path)
+    name = os.path.basename(path).lower().replace(' ', '')
+    for rank, hint in enumerate(JAPANESE_FONT_HINTS):
+        if hint.replace(' ', '') in name:
+            # 太字などより標準の太さを優先する
+            regular = 0 if ('regular' in name or 'w3' in name or 'w4' in name) else 1
+            return (1, rank, regular, path)
+    return (2, 0, 0, path)
+
+
+class FontRegistry:
+    """システムフォントを走査して日本語フォントを選ぶ（結果はファイルにキャッシュ）"""
+
+    def __init__(self, cache_path=None, font_dirs=None):
+        self._cache_path = cache_path
+        self.font_dirs = list(font_dirs) if font_dirs is not None else system_font_directories()
+        self._japanese_fonts = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_path(self):
+        """キャッシュファイルのパス（省略時は使う時点のキャッシュディレクトリのfonts.json）"""
+        return self._cache_path or os.path.join(default_cache_dir(), "fonts.json")
+
+    def find_japanese_font(self, preferred=None):
+        """日本語フォントのパスを返す（preferredが存在すればそれを優先、見つからなければNone）"""
+        if preferred and os.path.exists(preferred):
+            return preferred
+        fonts = self.japanese_fonts()
+        return fonts[0] if fonts else None
+
+    def japanese_fonts(self):
+        """日本語のグリフを持つフォントを優先順に返す"""
+        with self._lock:
+            if self._japanese_fonts is None:
+                fonts = self._load_cache()
+                self._japanese_fonts = fonts if fonts is not None else self._scan()
+            return list(self._japanese_fonts)
+
+    def refresh(self):
+        """フォントディレクトリを走査し直す"""
+        with self._lock:
+            self._japanese_fonts = self._scan()
+            return list(self._japanese_fonts)
+
+    def _directory_signature(self):
+        """走査するディレクトリ（サブディレクトリを含む）ごとの更新時刻
+
+        フォントの追加・削除で更新されるのはそのフォントを置いたディレクトリの更新時刻だけなので、
+        サブディレクトリも含めて比較する。
+        """
+        signature = {}
+        for directory in self.font_dirs:
+            for root, _, _ in os.walk(directory):
+                try:
+                    signature[root] = os.path.getmtime(root)
+                except OSError:
+                    continue
+        return signature
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (cache.get('version') != FONT_CACHE_VERSION or
+                cache.get('directories') != self._directory_signature()):
+            return None
+        cached = cache.get('japanese_fonts', [])
+        fonts = [path for path in cached if os.path.exists(path)]
+        # キャッシュしたフォントが削除されていれば走査し直す
+        if len(fonts) != len(cached):
+            return None
+        return fonts
+
+    def _save_cache(self, fonts):
+        cache = {
+            'version': FONT_CACHE_VERSION,
+            'directories': self._directory_signature(),
+            'japanese_fonts': fonts,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _scan(self):
+        """フォントディレクトリを走査して日本語フォントを優先順に並べる"""
+        paths = {path for path in PREFERRED_FONTS if os.path.exists(path)}
+        for directory in self.font_dirs:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    if name.lower().endswith(FONT_EXTENSIONS):
+                        paths.add(os.path.join(root, name))
+
+        candidates = sorted(paths, key=_preference)
+        # 名前から日本語フォントと推測できるものを先に確認し、見つからない場合のみ残りを確認する
+        hinted = [path for path in candidates if _preference(path)[0] < 2]
+        fonts = [path for path in hinted if has_japanese_glyphs(path)]
+        if not fonts:
+            others = [path for path in candidates if _preference(path)[0] == 2]
+            fonts = [path for path in others if has_japanese_glyphs(path)]
+
+        # 見つからなかった結果は保存しない（フォントをインストールした直後に次回の起動で見つけられるように）
+        if fonts:
+            self._save_cache(fonts)
+        return fonts
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_font_registry():
+    """プロセス全体で共有するFontRegistryを返す"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = FontRegistry()
+        return _default_registry
+
+
+def load_font(path, size, index=0):
+    """(パス, サイズ) ごとに読み込み済みのFreeTypeフォントを返す
+
+    FreeTypeのフォント（face）はスレッドセーフではないため、スレッドごとに別々に保持する
+    （GUIではプレビューと保存の描画が別のスレッドで同時に進むことがある）。
+    """
+    cache = getattr(_thread_fonts, 'load', None)
+    if cache is None:
+        cache = _thread_fonts.load = lru_cache(maxsize=FONT_OBJECT_CACHE_SIZE)(_open_font)
+    return cache(path, size, index)
+
+
+def _open_font(path, size, index):
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size, index=index)
+
+
+class _CachedImageFont:
+    """PIL.ImageFontの代わりにWordCloudへ渡す、truetypeだけをキャッシュするラッパー"""
+
+    def __getattr__(self, name):
+        from PIL import ImageFont
+        return getattr(ImageFont, name)
+
+    @staticmethod
+    def truetype(font=None, size=10, index=0, *args, **kwargs):
+        if isinstance(font, str) and not args and not kwargs:
+            return load_font(font, size, index)
+        from PIL import ImageFont
+        return ImageFont.truetype(font, size, index, *args, **kwargs)
+
+
+def install_font_cache():
+    """WordCloudのレイアウト・描画で読み込み済みフォントを再利用させる"""
+    from wordcloud import wordcloud as wordcloud_module
+    if not isinstance(wordcloud_module.ImageFont, _CachedImageFont):
+        wordcloud_module.ImageFont = _CachedImageFont()
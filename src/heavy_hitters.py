@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+メモリ使用量が一定の近似集計（頻出単語の抽出）
+
+ワードクラウドに表示するのは上位max_words語だけなので、語彙が際限なく増える入力
+（SNSのテキストなど）では、すべての単語の正確な出現回数を保持する必要はない。
+HeavyHittersは最大capacity語のカウンタだけを保持するMisra-Gries要約
+（Space-Savingと同じ系統の決定的なアルゴリズム）で、チャンクごとの集計結果を
+マージしながら、保持する語数がcapacityを超えたら全カウンタから(capacity+1)番目に
+大きい値を引いて0以下になった単語を捨てる。
+
+誤差の上限:
+    N を入力全体の単語数、k を capacity とすると、各単語の推定値 f' と真の出現回数 f は
+        f' <= f <= f' + error_bound,   error_bound <= (N - 推定値の合計) / (k + 1) <= N / (k + 1)
+    を満たす（error_boundは実際に引いた値の合計で、集計後に参照できる）。
+    したがって出現回数が N / (k + 1) を超える単語は必ず保持され、推定値は過小評価にしかならない。
+
+保持するのはcapacity語のカウンタと、マージ中の1チャンク分の集計だけなので、
+メモリ使用量は入力の長さや語彙数によらず、capacityとチャンクサイズで決まる。
+"""
+
+import numpy as np
+
+from src.vocabulary import COUNT_DTYPE, Vocabulary
+
+# 近似集計で保持するカウンタ数の既定値
+DEFAULT_APPROX_CAPACITY = 10000
+
+
+class HeavyHitters(Vocabulary):
+    """最大capacity語だけを保持する近似集計（Vocabularyと同じように使える）"""
+
+    def __init__(self, capacity=DEFAULT_APPROX_CAPACITY, words=None):
+        if capacity < 1:
+            raise ValueError("capacityは1以上を指定してください")
+        self.capacity = capacity
+        # 入力全体の単語数と、推定値が過小評価になりうる量の上限
+        self.stream_total = 0
+        self.error_bound = 0
+        super().__init__(words)
+
+    def __reduce__(self):
+        return (_restore_heavy_hitters,
+                (self.capacity, self._words, self.counts, self.stream_total, self.error_bound))
+
+    def update(self, words):
+        """出現回数を加算し、保持する語数がcapacityを超えたら頻度の低い単語を捨てる"""
+        before = super().total()
+        super().update(words)
+        self.stream_total += super().total() - before
+        if len(self._words) > self.capacity:
+            self._prune()
+
+    def _prune(self):
+        counts = self.counts
+        kth = len(counts) - self.capacity - 1
+        threshold = int(np.partition(counts, kth)[kth])
+        remaining = counts - threshold
+        keep = np.flatnonzero(remaining > 0)
+        words = self._words
+        self._words = [words[index] for index in keep.tolist()]
+        self._ids = {word: index for index, word in enumerate(self._words)}
+        self._counts = np.zeros(max(self.capacity + 1, len(keep)), dtype=COUNT_DTYPE)
+        self._counts[:len(keep)] = remaining[keep]
+        self.error_bound += threshold
+
+    def total(self):
+        """入力全体の単語数（捨てた単語の分も含む）"""
+        return self.stream_total
+
+    def stats(self):
+        """保持している語数と誤差の上限"""
+        return {
+            'capacity': self.capacity,
+            'words': len(self._words),
+            'stream_total': self.stream_total,
+            'error_bound': self.error_bound,
+        }
+
+
+def _restore_heavy_hitters(capacity, words, counts, stream_total, error_bound):
+    heavy_hitters = HeavyHitters(capacity)
+    heavy_hitters._words = list(words)
+    heavy_hitters._ids = {word: index for index, word in enumerate(heavy_hitters._words)}
+    heavy_hitters._counts = np.zeros(max(capacity + 1, len(words)), dtype=COUNT_DTYPE)
+    heavy_hitters._counts[:len(words)] = counts
+    heavy_hitters.stream_total = stream_total
+    heavy_hitters.error_bound = error_bound
+    return heavy_hitters
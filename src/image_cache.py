@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+描画済み画像のキャッシュ（内容アドレス方式）
+
+WordCloudはrandom_stateを固定しているため、頻度表と描画の設定（画像サイズ・最大単語数・
+配色・背景色・フォント・倍率など）と出力形式が同じなら、出力される画像はバイト単位で同じになる。
+ImageCacheはそれらのハッシュをキーとして、エンコード済みの画像（PNGなどのバイト列）を保持する。
+キャッシュに当たった場合はWordCloudのレイアウトもエンコードも行わずに、保存済みのバイト列を
+返す（ファイルに書き出す場合はそのままコピーする）。
+
+メモリ上のLRU（合計サイズの上限つき）と、任意でディスク上の保存先（合計サイズの上限つき、
+最終参照時刻の古いものから削除）の2段で保持する。ディスクの保存先は複数のプロセス
+（サーバーのワーカーなど）で共有できる。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from src.options import OutputOptions
+
+# キーの作り方や保存形式を変えたときに古いキャッシュを無効にするためのバージョン
+IMAGE_CACHE_VERSION = 1
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+
+IMAGE_CACHE_SUFFIX = ".img"
+
+
+def _font_identity(font_path):
+    """フォントファイルが差し替えられたらキーが変わるよう、パス・サイズ・更新時刻を使う"""
+    if not font_path:
+        return None
+    try:
+        stat = os.stat(font_path)
+    except OSError:
+        return [font_path]
+    return [font_path, stat.st_size, stat.st_mtime_ns]
+
+
+def image_cache_key(word_freq, font_path, options, image_format='PNG', output_options=None):
+    """頻度表・描画の設定・出力形式から画像のキャッシュキーを作る
+
+    font_pathは検出済みのフォント（options.font_pathではなく実際に使うもの）を渡す。
+    """
+    settings = {
+        'version': IMAGE_CACHE_VERSION,
+        'words': list(word_freq.items()),
+        'wordcloud': options.to_wordcloud_params(font_path),
+        'font': _font_identity(font_path),
+        'format': image_format.upper(),
+        'output': dataclasses.asdict(output_options or OutputOptions()),
+    }
+    encoded = json.dumps(settings, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ImageCache:
+    """エンコード済みの画像をメモリ（LRU）と任意のディスクに保持する（スレッドセーフ）
+
+    max_bytes: メモリに保持する画像の合計サイズの上限（0でメモリには保持しない）
+    directory: ディスクの保存先（Noneならディスクには保存しない）
+    max_disk_bytes: ディスクに保存する画像の合計サイズの上限
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BYTES, directory=None, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # 最初にディスクへ保存するときに数える
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + IMAGE_CACHE_SUFFIX)
+
+    def get(self, key):
+        """キーに一致する画像のバイト列を返す（なければNone）"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return data
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._put_memory(key, data)
+        return data
+
+    def put(self, key, data):
+        """画像のバイト列を保存する"""
+        with self._lock:
+            self._put_memory(key, data)
+        self._write_disk(key, data)
+
+    def _put_memory(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _read_disk(self, key):
+        if self.directory is None:
+            return None
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # 最終参照時刻として更新時刻を進める（容量を超えたら古いものから削除する）
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        if self.directory is None or len(data) > self.max_disk_bytes:
+            return
+        path = self.path_for(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if os.path.exists(path):
+                # 既にある画像は書き直さず、ディスクから読んだときと同じく最終参照時刻を進める
+                os.utime(path)
+                return
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_files(self):
+        """ディスク上の画像を (パス, サイズ, 最終参照時刻) の列で返す"""
+        files = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return files
+        for name in names:
+            if not name.endswith(IMAGE_CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, stat.st_size, stat.st_mtime_ns))
+        return files
+
+    def _evict_disk(self):
+        """ディスク上の合計サイズが上限の9割以下になるまで、参照の古い画像から削除する"""
+        # 他のプロセスも同じ保存先に書き込むため、削除の前に数え直す
+        files = sorted(self._disk_files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._disk_bytes = total
+
+    def clear(self):
+        """メモリとディスクの画像をすべて削除する"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.directory is not None:
+                for path, _, _ in self._disk_files():
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'hits': self.memory_hits + self.disk_hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GUI用の単一ワーカー・ジョブスケジューラ
+
+パラメータの変更が短時間に続いた場合はデバウンスして最後の1件だけを実行し、
+新しいジョブが投入されたら実行中のジョブをキャンセルする。ただし画像の保存のように
+preemptible=Falseで投入したジョブは、後から投入されたジョブではキャンセルされず、
+後のジョブはその完了を待ってから実行される（cancel()では中断する）。キャンセルは
+CancelTokenを通じて協調的に行い、ジョブは形態素解析・集計・レイアウトの
+チェックポイントで cancel.check() を呼んで中断する。
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class JobCancelled(Exception):
+    """より新しいジョブに置き換えられたなどでジョブがキャンセルされた"""
+
+
+class CancelToken:
+    """ジョブのキャンセル状態（チェックポイントで check() を呼ぶ）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """キャンセルされていればJobCancelledを送出する"""
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class JobScheduler:
+    """ジョブを1つのワーカースレッドで順に実行する（常に最新のジョブだけを残す）
+
+    submit() で投入したジョブは debounce 秒待ってから実行される。待機中や実行中に
+    次のジョブが投入されると、前のジョブはキャンセルされる（実行中のジョブは次の
+    チェックポイントで中断する）。preemptible=Falseのジョブはキャンセルされずに
+    投入順に実行される。ジョブは func(cancel) として呼び出される。
+    """
+
+    def __init__(self, debounce=0.3, on_error=None):
+        self.debounce = debounce
+        self.on_error = on_error
+        self._condition = threading.Condition()
+        self._pending = deque()  # (実行予定時刻, func, CancelToken, preemptible)
+        self._current = None  # (CancelToken, preemptible)
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="JobScheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, func, debounce=None, preemptible=True):
+        """ジョブを投入し、そのCancelTokenを返す（前のジョブのうちpreemptibleなものはキャンセルする）"""
+        delay = self.debounce if debounce is None else debounce
+        cancel = CancelToken()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("JobSchedulerは停止しています")
+            self._cancel_locked(preemptible_only=True)
+            self._pending.append((time.monotonic() + delay, func, cancel, preemptible))
+            self._condition.notify()
+        return cancel
+
+    def cancel(self):
+        """待機中・実行中のジョブをすべてキャンセルする"""
+        with self._condition:
+            self._cancel_locked()
+
+    def _cancel_locked(self, preemptible_only=False):
+        kept = deque()
+        for entry in self._pending:
+            if preemptible_only and not entry[3]:
+                kept.append(entry)
+            else:
+                entry[2].cancel()
+        self._pending = kept
+        if self._current is not None and (self._current[1] or not preemptible_only):
+            self._current[0].cancel()
+
+    @property
+    def busy(self):
+        """待機中または実行中のジョブがあればTrue"""
+        with self._condition:
+            return bool(self._pending) or self._current is not None
+
+    def shutdown(self, wait=True):
+        """ジョブをキャンセルしてワーカーを停止する"""
+        with self._condition:
+            self._closed = True
+            self._cancel_locked()
+            self._condition.notify()
+        if wait:
+            self._worker.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if not self._pending:
+                        self._condition.wait()
+                        continue
+                    remaining = self._pending[0][0] - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+                _, func, cancel, preemptible = self._pending.popleft()
+                self._current = (cancel, preemptible)
+
+            try:
+                func(cancel)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            finally:
+                with self._condition:
+                    if self._current is not None and self._current[0] is cancel:
+                        self._current = None
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GUIのログ出力用のスレッドセーフなキュー
+
+ワーカースレッドはlog()でキューに積むだけで、Tkのウィジェットには触れない。
+メインスレッドはタイマーでdrain()を呼び、溜まった行をまとめて表示する。
+キューは上限付きで、溢れた場合は古い行から捨てて件数だけを数える。
+しきい値未満のレベルのログは積まずにすぐ捨てる。
+"""
+
+import threading
+from collections import deque
+
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+
+LOG_LEVELS = {
+    'debug': LOG_DEBUG,
+    'info': LOG_INFO,
+    'warning': LOG_WARNING,
+    'error': LOG_ERROR,
+}
+
+# 表示待ちで保持する行数の上限
+DEFAULT_MAX_PENDING = 10000
+
+
+class LogQueue:
+    """複数スレッドから書き込み、メインスレッドでまとめて取り出すログキュー"""
+
+    def __init__(self, level=LOG_INFO, max_pending=DEFAULT_MAX_PENDING):
+        self.level = level
+        self._lines = deque(maxlen=max_pending)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def enabled_for(self, level):
+        """指定レベルのログが出力されるか（重いメッセージを組み立てる前の確認用）"""
+        return level >= self.level
+
+    def log(self, message, level=LOG_INFO):
+        if level < self.level:
+            return
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(message)
+
+    def drain(self):
+        """溜まった行と、溢れて捨てた行数を取り出す"""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
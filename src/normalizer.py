@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+形態素解析前のテキスト正規化
+
+設定された除去ルール（数字・半角記号・全角記号）を生成時に1つの文字クラスへ
+まとめてコンパイルし、除去と空白の正規化を事前コンパイル済みの正規表現で行う。
+形態素ごとの文字種判定（1文字語・ひらがなのみの語の除外）は表層形ごとに
+結果をメモ化し、同じ単語の2回目以降は辞書引き1回で済ませる。
+"""
+
+import re
+import unicodedata
+
+# 除去ルールごとの文字クラス（正規表現の角括弧の中身）
+DIGIT_CHARS = r'0-9０-９'
+SYMBOL_CHARS = r'!-/:-@\[-`{-~'
+FULLWIDTH_SYMBOL_CHARS = r'！-／：-＠［-｀｛-～'
+
+# ひらがなのみで構成される表層形
+HIRAGANA_ONLY = re.compile(r'[ぁ-ん]+')
+
+# 表層形の判定結果を保持する上限（超えたら作り直す）
+TOKEN_CACHE_LIMIT = 1 << 20
+
+
+class TextNormalizer:
+    """前処理ルールをコンパイルして保持するテキスト正規化器"""
+
+    def __init__(self, remove_digits=True, remove_symbols=True,
+                 remove_fullwidth_symbols=True, collapse_whitespace=True,
+                 nfkc=False, min_token_length=2, exclude_hiragana_only=True):
+        self.remove_digits = remove_digits
+        self.remove_symbols = remove_symbols
+        self.remove_fullwidth_symbols = remove_fullwidth_symbols
+        self.collapse_whitespace = collapse_whitespace
+        self.nfkc = nfkc
+        self.min_token_length = min_token_length
+        self.exclude_hiragana_only = exclude_hiragana_only
+
+        removed_chars = ''
+        if remove_digits:
+            removed_chars += DIGIT_CHARS
+        if remove_symbols:
+            removed_chars += SYMBOL_CHARS
+        if remove_fullwidth_symbols:
+            removed_chars += FULLWIDTH_SYMBOL_CHARS
+        self._removed = re.compile(f'[{removed_chars}]+') if removed_chars else None
+        self._whitespace = re.compile(r'\s+') if collapse_whitespace else None
+
+        self._token_cache = {}
+
+    def __reduce__(self):
+        # 並列解析のワーカーへは設定だけを渡す（メモ化した判定結果は送らない）
+        return (self.__class__, (
+            self.remove_digits, self.remove_symbols, self.remove_fullwidth_symbols,
+            self.collapse_whitespace, self.nfkc, self.min_token_length,
+            self.exclude_hiragana_only,
+        ))
+
+    def config(self):
+        """正規化ルールの設定を辞書で返す（キャッシュキーなどに使う）"""
+        return {
+            'remove_digits': self.remove_digits,
+            'remove_symbols': self.remove_symbols,
+            'remove_fullwidth_symbols': self.remove_fullwidth_symbols,
+            'collapse_whitespace': self.collapse_whitespace,
+            'nfkc': self.nfkc,
+            'min_token_length': self.min_token_length,
+            'exclude_hiragana_only': self.exclude_hiragana_only,
+        }
+
+    def normalize(self, text):
+        """テキストに正規化ルールを適用する"""
+        if self.nfkc:
+            # 全角英数・半角カナなどの幅の違いを統一する
+            # （改行をまたいで合成される文字はなく、行単位の方が大幅に速い）
+            text = '\n'.join([unicodedata.normalize('NFKC', line) for line in text.split('\n')])
+        if self._removed is not None:
+            text = self._removed.sub('', text)
+        if self._whitespace is not None:
+            text = self._whitespace.sub(' ', text)
+        return text
+
+    def is_valid_token(self, surface):
+        """表層形が文字種の条件（長さ・ひらがなのみでない）を満たすか判定する"""
+        valid = self._token_cache.get(surface)
+        if valid is None:
+            valid = (len(surface) >= self.min_token_length and
+                     not (self.exclude_hiragana_only and HIRAGANA_ONLY.fullmatch(surface)))
+            if len(self._token_cache) >= TOKEN_CACHE_LIMIT:
+                self._token_cache.clear()
+            self._token_cache[surface] = valid
+        return valid
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+リクエストごとの解析・描画オプション
+
+TaggerやフォントなどのGUI/バッチ/サーバーで共有する重いリソースとは分けて、
+1回の生成に固有の設定（除外単語・最小出現回数・画像サイズなど）を不変の値として扱う。
+"""
+
+from dataclasses import dataclass
+
+from src.stopwords import EMPTY_STOPWORDS, as_stopword_filter
+
+
+@dataclass(frozen=True)
+class AnalysisOptions:
+    """単語頻度の計算に関するオプション"""
+
+    min_freq: int = 1
+    exclude_words: object = EMPTY_STOPWORDS
+
+    def __post_init__(self):
+        # リストなどで渡された除外単語もStopwordFilterとして保持する
+        object.__setattr__(self, 'exclude_words', as_stopword_filter(self.exclude_words))
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """ワードクラウドの描画に関するオプション"""
+
+    width: int = 800
+    height: int = 600
+    background_color: str = 'white'
+    colormap: str = 'viridis'
+    max_words: int = 100
+    font_path: str = None  # 指定がなければ日本語フォントを自動検出する
+    scale: float = 1  # 出力画像の倍率（レイアウトはwidth×heightで計算する）
+
+    def to_wordcloud_params(self, font_path=None):
+        """WordCloudのコンストラクタ引数を返す（font_pathは検出済みのフォント）"""
+        wordcloud_params = {
+            'width': self.width,
+            'height': self.height,
+            'background_color': self.background_color,
+            'max_words': self.max_words,
+            'colormap': self.colormap,
+            'relative_scaling': 0.5,
+            'min_font_size': 10,
+            'prefer_horizontal': 0.9,  # 横書きを優先
+            'max_font_size': 100,
+            'random_state': 42,  # 再現性のため
+            'scale': self.scale,
+        }
+        # フォントパスが見つかった場合のみ設定
+        if font_path:
+            wordcloud_params['font_path'] = font_path
+        return wordcloud_params
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """画像ファイルへの書き出しに関するオプション"""
+
+    format: str = None  # 'PNG' / 'WEBP' / 'JPEG'（指定がなければ拡張子から決める）
+    png_compress_level: int = 6
+    jpeg_quality: int = 90
+    webp_quality: int = 90
+    webp_lossless: bool = False
+
+    def save_params(self, image_format):
+        """PIL.Image.saveに渡すエンコーダーの引数を返す"""
+        if image_format == 'PNG':
+            return {'compress_level': self.png_compress_level}
+        if image_format == 'JPEG':
+            return {'quality': self.jpeg_quality}
+        if image_format == 'WEBP':
+            return {'quality': self.webp_quality, 'lossless': self.webp_lossless}
+        return {}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+複数プロセスで形態素解析を行う並列解析エンジン
+
+テキストを文の境界で区切ったシャードに分割してワーカープロセスに渡し、
+各ワーカーが自身の形態素解析器で集計した部分的な頻度表（Vocabulary）を
+配列の加算でマージする。
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.heavy_hitters import HeavyHitters
+from src.vocabulary import Vocabulary
+
+# シャードが小さすぎるとプロセス間通信のコストが上回るため下限を設ける（文字数）
+MIN_SHARD_SIZE = 16 * 1024
+
+# ワーカーごとに同時に投入しておくシャード数（メモリ使用量の上限を決める）
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+# ワーカープロセスごとに保持するジェネレーター（形態素解析器を含む）
+_worker_generator = None
+
+
+def resolve_worker_count(workers):
+    """ワーカー数を正規化する（0以下ならCPUコア数）"""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def choose_shard_size(file_size, workers, chunk_size):
+    """ファイルサイズとワーカー数からシャードサイズ（文字数）を決める
+
+    ファイルのバイト数は文字数の上限とみなせるため、各ワーカーに
+    数個ずつシャードが行き渡る大きさにする。小さくなりすぎないようMIN_SHARD_SIZEを下限とするが、
+    chunk_sizeがそれより小さい場合も含めて、chunk_sizeを超えることはない。
+    """
+    per_worker = file_size // (workers * SHARDS_IN_FLIGHT_PER_WORKER * 2)
+    return min(chunk_size, max(MIN_SHARD_SIZE, per_worker))
+
+
+def _init_worker(normalizer, stopwords, tokenizer=None):
+    """ワーカープロセスの初期化: 親と同じ設定で形態素解析器・正規化器・ストップワードを用意する"""
+    global _worker_generator
+    from src.wordcloud_generator import JapaneseWordCloudGenerator
+    _worker_generator = JapaneseWordCloudGenerator(normalizer=normalizer, stopwords=stopwords, tokenizer=tokenizer)
+
+
+def _count_shard(shard):
+    """ワーカープロセス内で1シャード分の単語を集計する"""
+    return _worker_generator.count_words([shard])
+
+
+def count_words_parallel(shards, workers, normalizer=None, stopwords=None, approx_capacity=None,
+                         tokenizer=None):
+    """シャード列を複数プロセスで解析し、単語の出現回数を集計する
+
+    部分的な頻度表はシャードの投入順にマージするため、単語の出現順
+    （同じ頻度の単語の並び順）も逐次処理と同じになる。同時に処理中の
+    シャード数を制限しているので、入力全体をメモリに載せることはない。
+    normalizer・stopwords・tokenizer（形態素解析器の名前またはTokenizerConfig）を指定すると各ワーカーで同じ設定を使う。
+    approx_capacityを指定すると、シャードごとの集計を近似集計（HeavyHitters）にマージする。
+    """
+    workers = resolve_worker_count(workers)
+    word_counts = HeavyHitters(approx_capacity) if approx_capacity else Vocabulary()
+    max_in_flight = workers * SHARDS_IN_FLIGHT_PER_WORKER
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(normalizer, stopwords, tokenizer)) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(_count_shard, shard))
+            if len(pending) >= max_in_flight:
+                word_counts.update(pending.popleft().result())
+        while pending:
+            word_counts.update(pending.popleft().result())
+
+    return word_counts
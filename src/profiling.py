@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+処理段階ごとの時間・メモリの計測
+
+読み込み・正規化・形態素解析・集計・レイアウト・エンコード・書き出しなどの段階ごとに、
+経過時間（wall）・CPU時間・tracemallocによる最大割り当て量を記録する。
+同じ段階を複数回（チャンクごとなど）通った場合は合計する（最大割り当て量は最大値）。
+1つの段階に限ってcProfileで関数ごとのプロファイルも取れる。
+
+計測はオプトインで、無効な場合はNULL_PROFILERを使い処理を追加しない。
+callbackを渡すと段階が終わるたびに callback(段階名, 計測値) を呼ぶので、
+組み込み側で独自の監視基盤に送れる。
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# 段階名と表示名
+STAGE_LABELS = {
+    'read': '読み込み',
+    'normalize': '正規化',
+    'tokenize': '形態素解析',
+    'count': '集計',
+    'filter': 'フィルタ',
+    'layout': 'レイアウト',
+    'encode': 'エンコード',
+    'write': '書き出し',
+}
+
+# cProfileの結果として残す関数の数
+PROFILE_TOP_FUNCTIONS = 30
+
+
+class NullProfiler:
+    """計測無効時に使う何もしないプロファイラ"""
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def iter(self, name, iterable):
+        return iterable
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _ActiveStage:
+    def __init__(self, name):
+        self.name = name
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.start_memory = 0
+        self.peak_memory = 0
+
+
+class StageProfiler:
+    """段階ごとの経過時間・CPU時間・最大割り当て量を記録する
+
+    trace_memory=Trueの場合はtracemallocで割り当て量を計測する（処理は遅くなる）。
+    profile_stageに段階名を指定すると、その段階だけcProfileで関数ごとの時間を記録する。
+    callbackは段階が終わるたびに callback(段階名, その回の計測値) として呼ばれる。
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=True, profile_stage=None, callback=None):
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.callback = callback
+        self.stages = {}
+        self._active = []
+        self._profile = cProfile.Profile() if profile_stage else None
+        self._started_tracemalloc = False
+        self._started = time.perf_counter()
+        self._finished = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _update_peaks(self):
+        """実行中の段階すべてに現在の最大割り当て量を反映し、次の区間のために最大値をリセットする"""
+        current, peak = tracemalloc.get_traced_memory()
+        for active in self._active:
+            active.peak_memory = max(active.peak_memory, peak - active.start_memory)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def stage(self, name):
+        """with profiler.stage('tokenize'): のように段階を囲んで計測する"""
+        active = _ActiveStage(name)
+        if self.trace_memory:
+            active.start_memory = self._update_peaks()
+        self._active.append(active)
+        profiling = self._profile is not None and name == self.profile_stage
+        if profiling:
+            self._profile.enable()
+        try:
+            yield
+        finally:
+            if profiling:
+                self._profile.disable()
+            if self.trace_memory:
+                self._update_peaks()
+            self._active.pop()
+            self._record(active)
+
+    def iter(self, name, iterable):
+        """イテレータから次の要素を取り出す時間をnameの段階として計測する"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _record(self, active):
+        metrics = {
+            'wall_seconds': time.perf_counter() - active.wall,
+            'cpu_seconds': time.process_time() - active.cpu,
+        }
+        if self.trace_memory:
+            metrics['peak_alloc_bytes'] = active.peak_memory
+        total = self.stages.setdefault(active.name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        total['calls'] += 1
+        total['wall_seconds'] += metrics['wall_seconds']
+        total['cpu_seconds'] += metrics['cpu_seconds']
+        if self.trace_memory:
+            total['peak_alloc_bytes'] = max(total.get('peak_alloc_bytes', 0), active.peak_memory)
+        if self.callback is not None:
+            self.callback(active.name, metrics)
+
+    def close(self):
+        if self._finished is None:
+            self._finished = time.perf_counter()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def summary(self):
+        """計測結果をJSONに書き出せる辞書で返す"""
+        finished = self._finished if self._finished is not None else time.perf_counter()
+        result = {
+            'total_wall_seconds': round(finished - self._started, 6),
+            'stages': {
+                name: {key: round(value, 6) if isinstance(value, float) else value
+                       for key, value in stage.items()}
+                for name, stage in self.stages.items()
+            },
+        }
+        if self._profile is not None:
+            result['profile'] = {'stage': self.profile_stage, 'functions': self.profile_functions()}
+        return result
+
+    def profile_functions(self, limit=PROFILE_TOP_FUNCTIONS):
+        """cProfileの結果を累積時間の長い順に返す"""
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        if not stats.stats:
+            return []
+        functions = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            functions.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_seconds': round(total, 6),
+                'cumulative_seconds': round(cumulative, 6),
+            })
+        functions.sort(key=lambda item: item['cumulative_seconds'], reverse=True)
+        return functions[:limit]
+
+    def dump_profile(self, path):
+        """cProfileの結果をpstats形式で保存する（snakevizなどで開ける）"""
+        if self._profile is not None:
+            self._profile.dump_stats(path)
+
+    def summary_line(self):
+        """ログに出す1行の要約"""
+        parts = []
+        for name, stage in self.stages.items():
+            part = f"{STAGE_LABELS.get(name, name)} {stage['wall_seconds']:.2f}s"
+            if 'peak_alloc_bytes' in stage:
+                part += f" ({stage['peak_alloc_bytes'] / (1024 * 1024):.1f}MB)"
+            parts.append(part)
+        return " / ".join(parts)
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ワードクラウドの描画と画像ファイルへの書き出し
+
+WordCloudのレイアウト結果をPILで直接ラスタライズし、そのままPNG/WebP/JPEGに
+エンコードする。matplotlibのFigureを経由しないため、出力画像のサイズは
+width×height×scaleと一致する。
+
+カラーマップによる配色もmatplotlib.pyplotを読み込まずに行う
+（wordcloud標準のcolormap_color_funcは初回にpyplotを読み込む）。
+
+レイアウト（単語ごとのフォントサイズ・位置・向き）の計算が描画コストの大半を占めるため、
+LayoutCacheに頻度表とレイアウトに影響する設定ごとに保持し、配色・背景色・倍率だけが
+異なる描画では再計算せずに色付けとラスタライズだけを行う。
+"""
+
+import copy
+import dataclasses
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from random import Random
+
+import matplotlib
+import numpy as np
+from wordcloud import WordCloud
+
+from src.options import OutputOptions, RenderOptions
+
+# 保持するレイアウトの数
+LAYOUT_CACHE_SIZE = 16
+
+# 配色に使う乱数のシード（レイアウトのキャッシュの有無で色が変わらないよう固定する）
+COLOR_RANDOM_STATE = 42
+
+# 拡張子と画像形式の対応
+IMAGE_FORMATS = {
+    '.png': 'PNG',
+    '.webp': 'WEBP',
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+}
+
+
+class ColormapColorFunc:
+    """カラーマップから単語の色を選ぶ（wordcloudのcolormap_color_funcと同じ配色）"""
+
+    def __init__(self, colormap):
+        if isinstance(colormap, str):
+            colormap = matplotlib.colormaps[colormap]
+        self.colormap = colormap
+
+    def __call__(self, word, font_size, position, orientation, random_state=None, **kwargs):
+        if random_state is None:
+            random_state = Random()
+        r, g, b, _ = np.maximum(0, 255 * np.array(self.colormap(random_state.uniform(0, 1))))
+        return "rgb({:.0f}, {:.0f}, {:.0f})".format(r, g, b)
+
+
+class LayoutCache:
+    """計算済みのレイアウト（WordCloud）をLRUで保持する（スレッドセーフ）"""
+
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            wordcloud = self._entries.get(key)
+            if wordcloud is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return wordcloud
+
+    def put(self, key, wordcloud):
+        with self._lock:
+            self._entries[key] = wordcloud
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def layout_key(word_freq, font_path, options):
+    """頻度表とレイアウトに影響する設定（配色・背景色・倍率以外）を表すキー"""
+    layout = dict(options.to_wordcloud_params(font_path), words=list(word_freq.items()))
+    for name in ('background_color', 'colormap', 'scale'):
+        layout.pop(name)
+    encoded = json.dumps(layout, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class _CheckpointColorFunc:
+    """レイアウト中に単語を1つ配置するたびにキャンセルを確認する色関数"""
+
+    def __init__(self, color_func, cancel):
+        self.color_func = color_func
+        self.cancel = cancel
+
+    def __call__(self, *args, **kwargs):
+        self.cancel.check()
+        return self.color_func(*args, **kwargs)
+
+
+def create_wordcloud(word_freq, font_path=None, options=None, layout_cache=None, cancel=None):
+    """単語の頻度からレイアウト済み・色付け済みのWordCloudを作る
+
+    layout_cacheを指定すると、同じ頻度表とレイアウト設定の計算済みレイアウトを再利用する。
+    cancel（CancelToken）を指定すると、単語を1つ配置するたびにキャンセルを確認する。
+    """
+    options = options or RenderOptions()
+    key = layout_key(word_freq, font_path, options) if layout_cache is not None else None
+    wordcloud = layout_cache.get(key) if key else None
+    if wordcloud is None:
+        params = options.to_wordcloud_params(font_path)
+        color_func = ColormapColorFunc(options.colormap)
+        # WordCloudは単語を配置するたびに色関数を呼ぶため、そこをチェックポイントにする
+        params['color_func'] = _CheckpointColorFunc(color_func, cancel) if cancel is not None else color_func
+        wordcloud = WordCloud(**params).generate_from_frequencies(word_freq)
+        wordcloud.color_func = color_func
+        if key:
+            layout_cache.put(key, wordcloud)
+    return apply_style(wordcloud, options)
+
+
+def apply_style(wordcloud, options):
+    """計算済みのレイアウトに配色・背景色・倍率を適用したWordCloudを返す（元のWordCloudは変更しない）"""
+    styled = copy.copy(wordcloud)
+    styled.background_color = options.background_color
+    styled.scale = options.scale
+    styled.color_func = ColormapColorFunc(options.colormap)
+    return styled.recolor(random_state=COLOR_RANDOM_STATE)
+
+
+def fit_to_size(options, max_width, max_height, min_scale=0.1):
+    """描画結果がmax_width×max_heightに収まる倍率を設定したRenderOptionsを返す
+
+    レイアウトは元のwidth×heightで計算するため、プレビューと保存する画像で
+    単語の配置は変わらない（拡大はしない）。
+    """
+    scale = min(max_width / options.width, max_height / options.height, 1.0)
+    return dataclasses.replace(options, scale=max(scale, min_scale))
+
+
+def image_format_for(path, output_options=None):
+    """出力先の拡張子（またはoutput_options.format）から画像形式を決める"""
+    output_options = output_options or OutputOptions()
+    if output_options.format:
+        return output_options.format.upper()
+    extension = os.path.splitext(path)[1].lower()
+    return IMAGE_FORMATS.get(extension, 'PNG')
+
+
+def encode_image(image, image_format='PNG', output_options=None):
+    """画像を指定された形式でエンコードしてバイト列を返す"""
+    buffer = io.BytesIO()
+    _save(image, buffer, image_format.upper(), output_options or OutputOptions())
+    return buffer.getvalue()
+
+
+def save_image(image, path, output_options=None):
+    """画像をファイルに保存する（形式は拡張子またはoutput_options.formatで決める）"""
+    output_options = output_options or OutputOptions()
+    _save(image, path, image_format_for(path, output_options), output_options)
+
+
+def _save(image, target, image_format, output_options):
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.save(target, format=image_format, **output_options.save_params(image_format))
@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ワードクラウドを描画するローカルHTTPサーバー
+
+リクエストごとにCLIをサブプロセスで起動すると、インタプリタ・MeCab・フォントの
+準備を毎回やり直すことになる。このサーバーは起動時にワーカープロセスごとに
+JapaneseWordCloudGeneratorを1つ用意して（Taggerの生成と、wordcloud・フォントの読み込みを
+済ませて）おき、リクエストを温まったワーカーで処理する。
+
+    POST /render   テキスト（本文・フォームのtext欄・アップロードされたファイル）から
+                   ワードクラウドを描画してPNGを返す
+    GET  /health   ワーカー数・待ち行列の状態・処理件数をJSONで返す
+
+パラメータはGUIで指定できるもの（width・height・min_freq・max_words・colormap・
+background・exclude）で、クエリ文字列・フォーム・JSONのいずれでも指定できる。
+excludeにはre:（正規表現）のルールは指定できない（400を返す）。
+
+同時に描画するリクエスト数はconcurrency（既定ではワーカー数）までで、それを超えた
+リクエストは最大queue_size件まで順番を待つ。待ち行列も埋まっている場合や、
+queue_timeout秒待っても順番が来ない場合は503（Retry-After付き）を返して、
+過負荷のときに応答時間が際限なく延びないようにする。
+
+外部のサービスやライブラリは使わず、標準ライブラリ（asyncio）だけで動く。
+
+    python -m src.server [--port 8080] [--workers 2] [--queue-size 16]
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import email.parser
+import email.policy
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from src.image_cache import DEFAULT_DISK_BYTES, DEFAULT_MEMORY_BYTES, ImageCache
+from src.normalizer import TextNormalizer
+from src.options import AnalysisOptions, RenderOptions
+from src.parallel import resolve_worker_count
+from src.stopwords import REGEX_RULE, StopwordFilter
+from src.text_input import InputError, decode_bytes
+from src.tokenizers import (DEFAULT_PARTS_OF_SPEECH, DEFAULT_TOKENIZER, TOKENIZER_NAMES, TokenizerConfig,
+                            as_tokenizer, parse_parts_of_speech)
+from src.user_dictionary import UserDictionaryError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# 順番待ちできるリクエスト数と、順番を待つ時間の上限（秒）
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+# リクエスト本文とヘッダーの大きさの上限
+DEFAULT_MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+# ヘッダーの受信と、キープアライブ中の次のリクエストを待つ時間（秒）
+HEADER_TIMEOUT = 10.0
+KEEP_ALIVE_TIMEOUT = 5.0
+
+# 過負荷で断るときにクライアントに再試行を勧めるまでの秒数
+RETRY_AFTER_SECONDS = 1
+
+# 1リクエストで指定できる画像サイズ・単語数の上限
+MAX_IMAGE_SIDE = 4096
+MAX_WORDS_LIMIT = 2000
+
+# ワーカープロセスごとに保持するジェネレーター（形態素解析器を含む）
+_worker_generator = None
+
+
+class RequestError(Exception):
+    """クライアントに返すエラー（HTTPステータスとメッセージ）"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = HTTPStatus(status)
+        self.message = message
+        self.headers = headers or {}
+
+
+def _parse_int(fields, name, default, minimum, maximum):
+    value = fields.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise RequestError(400, f"{name}には整数を指定してください: {value}")
+    if not minimum <= number <= maximum:
+        raise RequestError(400, f"{name}には{minimum}〜{maximum}を指定してください: {number}")
+    return number
+
+
+def parse_exclude_words(value):
+    """除外単語（カンマ区切りの文字列、または文字列のリスト）をリストにする
+
+    prefix:・suffix:のルールは使えるが、re:（正規表現）のルールは、不正なパターンや
+    バックトラックの多いパターンでワーカーを止めないようにRequestError（400）で拒否する。
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        raise RequestError(400, "excludeにはカンマ区切りの文字列か文字列のリストを指定してください")
+    words = [str(word).strip() for word in value if str(word).strip()]
+    for word in words:
+        if word.startswith(REGEX_RULE):
+            raise RequestError(400, f"excludeに正規表現（{REGEX_RULE}）のルールは指定できません: {word}")
+    return words
+
+
+def parse_render_params(fields, defaults=None):
+    """リクエストのパラメータからAnalysisOptionsとRenderOptionsを作る
+
+    fieldsはパラメータ名→値の辞書。指定のない項目はdefaults（RenderOptions）の値を使う。
+    値が不正な場合はRequestError（400）を送出する。
+    """
+    defaults = defaults or RenderOptions()
+    analysis_options = AnalysisOptions(
+        min_freq=_parse_int(fields, 'min_freq', 1, 1, sys.maxsize),
+        exclude_words=parse_exclude_words(fields.get('exclude')),
+    )
+    colormap = fields.get('colormap') or defaults.colormap
+    background = fields.get('background') or fields.get('background_color') or defaults.background_color
+    render_options = RenderOptions(
+        width=_parse_int(fields, 'width', defaults.width, 1, MAX_IMAGE_SIDE),
+        height=_parse_int(fields, 'height', defaults.height, 1, MAX_IMAGE_SIDE),
+        background_color=background,
+        colormap=colormap,
+        max_words=_parse_int(fields, 'max_words', defaults.max_words, 1, MAX_WORDS_LIMIT),
+        font_path=defaults.font_path,
+    )
+    # 不正な配色・背景色は描画を始める前に弾く
+    from matplotlib import colormaps
+    from PIL import ImageColor
+    if colormap not in colormaps:
+        raise RequestError(400, f"不明なカラーマップです: {colormap}")
+    try:
+        ImageColor.getrgb(background)
+    except ValueError:
+        raise RequestError(400, f"不正な背景色です: {background}")
+    return analysis_options, render_options
+
+
+def decode_text(data, charset=None):
+    """アップロードされたテキストを文字列にする（charsetの指定がなければ文字コードを判定する）"""
+    try:
+        return decode_bytes(data, charset)
+    except InputError as e:
+        raise RequestError(400, f"テキストを読み込めません: {e}")
+
+
+def parse_request_body(content_type, body, query=''):
+    """リクエスト本文とクエリ文字列から、テキストとパラメータの辞書を取り出す
+
+    本文は次のいずれかの形式で受け付ける（パラメータはクエリ文字列でも指定できる）。
+
+    - multipart/form-data: fileフィールド（アップロードされたファイル）またはtextフィールドと、各パラメータ
+    - application/x-www-form-urlencoded: textフィールドと各パラメータ
+    - application/json: {"text": ..., "width": ...} の形式のオブジェクト
+    - それ以外（text/plainなど）: 本文全体をテキストとして扱う
+    """
+    fields = dict(parse_qsl(query))
+    text = None
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type or 'text/plain'}\r\n\r\n".encode('latin-1'), headersonly=True)
+    media_type = message.get_content_type()
+    charset = message.get_param('charset')
+
+    if media_type == 'multipart/form-data':
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body)
+        if not message.is_multipart():
+            raise RequestError(400, "multipart/form-dataの本文を解析できません")
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if name == 'file' or part.get_filename():
+                text = decode_text(payload, part.get_content_charset())
+            elif name:
+                fields[name] = decode_text(payload)
+    elif media_type == 'application/x-www-form-urlencoded':
+        fields.update(parse_qsl(decode_text(body, charset)))
+    elif media_type == 'application/json':
+        try:
+            document = json.loads(decode_text(body, charset))
+        except ValueError:
+            raise RequestError(400, "JSONを解析できません")
+        if not isinstance(document, dict):
+            raise RequestError(400, "JSONはオブジェクトで指定してください")
+        fields.update({key: value if isinstance(value, (str, list)) else str(value)
+                       for key, value in document.items() if value is not None})
+    elif body:
+        text = decode_text(body, charset)
+
+    if text is None:
+        text = fields.pop('text', None)
+    if not isinstance(text, str) or not text.strip():
+        raise RequestError(400, "テキスト（本文・textフィールド・fileフィールド）を指定してください")
+    return text, fields
+
+
+def _init_worker(normalizer, stopwords, font_path, image_cache_settings, tokenizer=None):
+    """ワーカープロセスの初期化: ジェネレーターを用意し、描画に必要なモジュールとフォントを読み込んでおく"""
+    global _worker_generator
+    from src.fonts import install_font_cache
+    from src.wordcloud_generator import JapaneseWordCloudGenerator
+    install_font_cache()
+    _worker_generator = JapaneseWordCloudGenerator(normalizer=normalizer, stopwords=stopwords, tokenizer=tokenizer)
+    _worker_generator.count_words(["ウォームアップ用の文章です。"])
+    _worker_generator.render_bytes({'ウォームアップ': 1}, 'PNG', RenderOptions(width=64, height=64),
+                                   font_path=font_path or '')
+    # ウォームアップの画像は残さない
+    _worker_generator.image_cache = ImageCache(*image_cache_settings) if image_cache_settings else None
+
+
+def _ping():
+    """ワーカープロセスの起動（初期化の完了）を待つための空の処理"""
+    return os.getpid()
+
+
+def render_text(generator, text, analysis_options, render_options):
+    """テキストを解析してワードクラウドのPNGを描画する
+
+    (PNG, 描画済み画像のキャッシュから得られたか) を返す（有効な単語がなければ (None, False)）。
+    """
+    words = generator.count_words([text])
+    word_freq = generator.create_word_frequency(
+        words, analysis_options.min_freq, analysis_options.exclude_words, render_options.max_words)
+    if not word_freq:
+        return None, False
+    # フォントはサーバーの起動時に検出済み（見つからなければ''で再検出しない）
+    return generator.render_encoded(word_freq, 'PNG', render_options, font_path=render_options.font_path or '')
+
+
+def _render_in_worker(text, analysis_options, render_options):
+    return render_text(_worker_generator, text, analysis_options, render_options)
+
+
+def _format_response(status, body=b'', content_type='application/json; charset=utf-8', headers=None,
+                     keep_alive=True):
+    status = HTTPStatus(status)
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}",
+             f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+
+def _json_body(document):
+    return json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+
+class RenderServer:
+    """温まったワーカープロセスでワードクラウドを描画するHTTPサーバー
+
+    workers: ワーカープロセス数（0でCPUコア数）
+    concurrency: 同時に描画するリクエスト数の上限（既定ではワーカー数）
+    queue_size: 描画の順番を待てるリクエスト数（超えた分は503で断る）
+    queue_timeout: 順番を待つ時間の上限（秒、超えたら503で断る）
+    image_cache_bytes: ワーカーごとにメモリに保持する描画済み画像の合計サイズ（0で保持しない）
+    image_cache_dir: 描画済み画像を保存するディレクトリ（全ワーカーで共有、Noneならディスクには保存しない）
+    render_options: パラメータを省略したときの描画オプション（font_pathはサーバー側で決める）
+    tokenizer: ワーカーで使う形態素解析器の名前（src.tokenizers.TOKENIZER_NAMES）またはTokenizerConfig
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1, concurrency=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, queue_timeout=DEFAULT_QUEUE_TIMEOUT,
+                 max_body_bytes=DEFAULT_MAX_BODY_BYTES, render_options=None,
+                 normalizer=None, stopwords=None, image_cache_bytes=DEFAULT_MEMORY_BYTES,
+                 image_cache_dir=None, image_cache_disk_bytes=DEFAULT_DISK_BYTES, tokenizer=DEFAULT_TOKENIZER):
+        self.host = host
+        self.port = port
+        self.workers = resolve_worker_count(workers)
+        self.concurrency = concurrency or self.workers
+        if self.concurrency < 1 or queue_size < 0:
+            raise ValueError("concurrencyは1以上、queue_sizeは0以上を指定してください")
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_body_bytes = max_body_bytes
+        self.render_options = render_options or RenderOptions()
+        self.normalizer = normalizer
+        self.stopwords = stopwords
+        self.tokenizer = tokenizer if isinstance(tokenizer, TokenizerConfig) else TokenizerConfig(tokenizer)
+        # 描画済み画像のキャッシュは各ワーカーで作る（ディスクの保存先は共有する）
+        self.image_cache_settings = None
+        if image_cache_bytes or image_cache_dir:
+            self.image_cache_settings = (image_cache_bytes, image_cache_dir, image_cache_disk_bytes)
+        self.pending = 0  # 描画中と順番待ちのリクエスト数
+        self.in_flight = 0
+        self.counters = {'served': 0, 'empty': 0, 'rejected': 0, 'bad_request': 0, 'failed': 0,
+                         'image_cache_hits': 0, 'image_cache_misses': 0}
+        self._slots = None
+        self._executor = None
+        self._server = None
+        self._connections = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'tokenizer': self.tokenizer.name,
+            'concurrency': self.concurrency,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'queued': self.pending - self.in_flight,
+            **self.counters,
+        }
+
+    async def start(self):
+        """ワーカープロセスを起動して初期化を待ち、接続の受け付けを始める"""
+        from src.fonts import get_font_registry
+        loop = asyncio.get_running_loop()
+        # フォントの検出は1回だけ行い、全ワーカーで同じフォントを使う
+        font_path = get_font_registry().find_japanese_font(self.render_options.font_path)
+        if self.render_options.font_path and font_path != self.render_options.font_path:
+            print(f"警告: 指定されたフォントが見つかりません: {self.render_options.font_path}")
+        self.render_options = dataclasses.replace(self.render_options, font_path=font_path)
+        if self.tokenizer.user_dictionaries:
+            # CSVのユーザー辞書は各ワーカーで重ねてコンパイルしないよう、先にコンパイルしておく
+            self.tokenizer = as_tokenizer(self.tokenizer).config
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.normalizer, self.stopwords, font_path,
+                                                       self.image_cache_settings, self.tokenizer))
+        # 同時に投入すると全ワーカーが起動するので、初期化が終わるまで待つ
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """接続の受け付けをやめ、待機中の接続とワーカープロセスを閉じる"""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def _handle_connection(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            timeout = HEADER_TIMEOUT
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                except asyncio.LimitOverrunError:
+                    writer.write(_format_response(431, _json_body({'error': "ヘッダーが大きすぎます"}),
+                                                  keep_alive=False))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                status, body, content_type, headers, keep_alive = await self._handle_request(
+                    head, reader, writer)
+                writer.write(_format_response(status, body, content_type, headers, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+                timeout = KEEP_ALIVE_TIMEOUT
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _handle_request(self, head, reader, writer):
+        """1リクエストを処理し、(ステータス, 本文, Content-Type, 追加ヘッダー, キープアライブ) を返す"""
+        try:
+            request_line, _, header_block = head.decode('latin-1').partition("\r\n")
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            return 400, _json_body({'error': "リクエスト行が不正です"}), 'application/json; charset=utf-8', None, False
+        headers = {}
+        for line in header_block.split("\r\n"):
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' and (version.strip() == 'HTTP/1.1' or connection == 'keep-alive')
+
+        try:
+            body = await self._read_body(method, headers, reader, writer)
+            url = urlsplit(target)
+            if url.path == '/health' and method in ('GET', 'HEAD'):
+                return 200, _json_body(self.stats()), 'application/json; charset=utf-8', None, keep_alive
+            if url.path != '/render':
+                raise RequestError(404, f"見つかりません: {url.path}")
+            if method != 'POST':
+                raise RequestError(405, "/renderにはPOSTで送信してください", {'Allow': 'POST'})
+            text, fields = parse_request_body(headers.get('content-type'), body, url.query)
+            analysis_options, render_options = parse_render_params(fields, self.render_options)
+            png, cached = await self.render(text, analysis_options, render_options)
+            return 200, png, 'image/png', {'X-Cache': 'hit' if cached else 'miss'}, keep_alive
+        except RequestError as e:
+            if e.status == HTTPStatus.BAD_REQUEST:
+                self.counters['bad_request'] += 1
+            # 本文を読み切っていない可能性がある場合は接続を閉じる
+            keep_alive = keep_alive and e.status not in (HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                                         HTTPStatus.LENGTH_REQUIRED)
+            return e.status, _json_body({'error': e.message}), 'application/json; charset=utf-8', e.headers, keep_alive
+
+    async def _read_body(self, method, headers, reader, writer):
+        if 'transfer-encoding' in headers:
+            raise RequestError(411, "Transfer-Encodingには対応していません。Content-Lengthを指定してください")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError(400, "Content-Lengthが不正です")
+        if length > self.max_body_bytes:
+            raise RequestError(413, f"本文が大きすぎます（上限: {self.max_body_bytes}バイト）")
+        if method == 'POST' and 'content-length' not in headers:
+            raise RequestError(411, "Content-Lengthを指定してください")
+        if length and headers.get('expect', '').lower() == '100-continue':
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        return await reader.readexactly(length) if length else b''
+
+    async def render(self, text, analysis_options, render_options):
+        """同時実行数と待ち行列の上限を守ってワーカーで描画し、(PNG, キャッシュから得られたか) を返す
+
+        待ち行列が埋まっている場合と、queue_timeout秒待っても順番が来ない場合は
+        RequestError（503）を送出する。有効な単語がなければRequestError（422）。
+        """
+        retry_after = {'Retry-After': str(RETRY_AFTER_SECONDS)}
+        if self.pending >= self.concurrency + self.queue_size:
+            self.counters['rejected'] += 1
+            raise RequestError(503, "混み合っています。しばらくしてから再試行してください", retry_after)
+        self.pending += 1
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters['rejected'] += 1
+                raise RequestError(503, "混み合っています。しばらくしてから再試行してください", retry_after)
+            self.in_flight += 1
+            try:
+                png, cached = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _render_in_worker, text, analysis_options, render_options)
+            except Exception as e:
+                self.counters['failed'] += 1
+                raise RequestError(500, f"描画に失敗しました: {e}")
+            finally:
+                self.in_flight -= 1
+                self._slots.release()
+        finally:
+            self.pending -= 1
+        if png is None:
+            self.counters['empty'] += 1
+            raise RequestError(422, "有効な単語が見つかりませんでした")
+        self.counters['served'] += 1
+        self.counters['image_cache_hits' if cached else 'image_cache_misses'] += 1
+        return png, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ワードクラウドを描画するローカルHTTPサーバー')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'待ち受けるアドレス（デフォルト: {DEFAULT_HOST}）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'待ち受けるポート（デフォルト: {DEFAULT_PORT}）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='描画を行うワーカープロセス数（0でCPUコア数、デフォルト: 1）')
+    parser.add_argument('--concurrency', type=int,
+                        help='同時に描画するリクエスト数の上限（デフォルト: ワーカー数）')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f'描画の順番を待てるリクエスト数（超えたら503、デフォルト: {DEFAULT_QUEUE_SIZE}）')
+    parser.add_argument('--queue-timeout', type=float, default=DEFAULT_QUEUE_TIMEOUT,
+                        help=f'順番を待つ時間の上限（秒、超えたら503、デフォルト: {DEFAULT_QUEUE_TIMEOUT}）')
+    parser.add_argument('--max-body-mb', type=float, default=DEFAULT_MAX_BODY_BYTES / (1024 * 1024),
+                        help=f'リクエスト本文の上限（MB、デフォルト: {DEFAULT_MAX_BODY_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--image-cache-mb', type=float, default=DEFAULT_MEMORY_BYTES / (1024 * 1024),
+                        help=f'ワーカーごとにメモリに保持する描画済み画像の容量（MB、0で無効、'
+                             f'デフォルト: {DEFAULT_MEMORY_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--image-cache-dir', help='描画済み画像を保存するディレクトリ（全ワーカーで共有）')
+    parser.add_argument('--image-cache-size-mb', type=int, default=DEFAULT_DISK_BYTES // (1024 * 1024),
+                        help=f'ディスクに保存する描画済み画像の容量上限（MB、デフォルト: {DEFAULT_DISK_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--font', metavar='FILE', help='使用するフォント（デフォルト: 日本語フォントを自動検出）')
+    parser.add_argument('--stopwords', action='append', default=[], metavar='FILE',
+                        help='ストップワードファイル（複数指定可）')
+    parser.add_argument('--nfkc', action='store_true',
+                        help='NFKC正規化で全角・半角の表記ゆれを統一してから解析する')
+    parser.add_argument('--tokenizer', choices=list(TOKENIZER_NAMES), default=DEFAULT_TOKENIZER,
+                        help=f'形態素解析器（デフォルト: {DEFAULT_TOKENIZER}）')
+    parser.add_argument('--pos', default=",".join(DEFAULT_PARTS_OF_SPEECH),
+                        help=f'採用する品詞の大分類（カンマ区切り、デフォルト: {",".join(DEFAULT_PARTS_OF_SPEECH)}）')
+    parser.add_argument('--lemma', action='store_true', help='活用する語を原形にまとめて数える')
+    parser.add_argument('--user-dict', action='append', default=[], metavar='FILE',
+                        help='ユーザー辞書（CSVまたはコンパイル済みの.dic、複数指定可）')
+    parser.add_argument('--system-dict', metavar='PATH',
+                        help='システム辞書（mecab: 辞書ディレクトリ、sudachi: system.dicのパスまたはsmall/core/full）')
+    args = parser.parse_args()
+    if args.concurrency is not None and args.concurrency < 1:
+        parser.error("--concurrencyには1以上を指定してください")
+    if args.queue_size < 0:
+        parser.error("--queue-sizeには0以上を指定してください")
+    try:
+        parts_of_speech = parse_parts_of_speech(args.pos)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        stopwords = StopwordFilter.from_files(args.stopwords)
+    except (OSError, re.error) as e:
+        print(f"ストップワードファイルの読み込みに失敗しました: {e}")
+        sys.exit(1)
+    server = RenderServer(args.host, args.port, workers=args.workers, concurrency=args.concurrency,
+                          queue_size=args.queue_size, queue_timeout=args.queue_timeout,
+                          max_body_bytes=int(args.max_body_mb * 1024 * 1024),
+                          render_options=RenderOptions(font_path=args.font),
+                          normalizer=TextNormalizer(nfkc=args.nfkc), stopwords=stopwords,
+                          image_cache_bytes=int(args.image_cache_mb * 1024 * 1024),
+                          image_cache_dir=args.image_cache_dir,
+                          image_cache_disk_bytes=args.image_cache_size_mb * 1024 * 1024,
+                          tokenizer=TokenizerConfig(args.tokenizer, args.user_dict, args.system_dict,
+                                                    parts_of_speech, args.lemma))
+
+    async def serve():
+        started = time.perf_counter()
+        await server.start()
+        print(f"ワードクラウドサーバーを起動しました: {server.url} "
+              f"（ワーカー {server.workers}、準備 {time.perf_counter() - started:.1f}秒）", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except UserDictionaryError as e:
+        print(e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("サーバーを停止しました")
+
+
+if __name__ == "__main__":
+    main()
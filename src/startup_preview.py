@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+起動時プレビュー画像のディスクキャッシュ
+
+GUIは起動直後にサンプルテキストのプレビューを表示するが、形態素解析とレイアウトの
+計算には時間がかかる。前回の起動で描画した画像をユーザーのキャッシュディレクトリに
+PNGで保存しておき、次回の起動ではそれを読み込んで即座に表示する。
+
+キーはサンプルテキストの内容・既定の設定・プレビューの大きさに加えて、実際に使う
+フォントのファイル（パス・サイズ・更新時刻）と形態素解析器の設定のハッシュで、
+いずれかが変わった場合にだけ描画し直す。保持するのは最新の1枚だけ。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+
+from src.token_cache import default_cache_dir
+
+# 保存形式を変えたときに古いキャッシュを無効にするためのバージョン
+STARTUP_PREVIEW_VERSION = 2
+
+STARTUP_PREVIEW_SUFFIX = ".png"
+
+
+def startup_preview_key(sample_path, analysis_options, render_options, preview_size, font_path=None,
+                        tokenizer=None):
+    """サンプルテキストの内容と設定から起動時プレビューのキーを作る
+
+    font_pathは実際に使うフォント（render_options.font_pathの指定がなければ検出したもの）、
+    tokenizerは形態素解析器の設定を表すJSONに変換できる値（src.tokenizers.installed_fingerprint()）。
+    """
+    digest = hashlib.sha256()
+    with open(sample_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    font = None
+    if font_path and os.path.exists(font_path):
+        stat = os.stat(font_path)
+        font = [os.path.abspath(font_path), stat.st_size, stat.st_mtime_ns]
+    settings = {
+        'version': STARTUP_PREVIEW_VERSION,
+        'min_freq': analysis_options.min_freq,
+        'exclude_words': list(analysis_options.exclude_words),
+        'render': dataclasses.asdict(render_options),
+        'preview_size': list(preview_size) if preview_size else None,
+        'font': font,
+        'tokenizer': tokenizer,
+    }
+    digest.update(json.dumps(settings, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class StartupPreviewCache:
+    """起動時プレビュー画像を1枚だけ保持するディスクキャッシュ"""
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = os.path.join(default_cache_dir(), "startup_preview")
+        self.directory = directory
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + STARTUP_PREVIEW_SUFFIX)
+
+    def load(self, key):
+        """キーに一致する画像を読み込む（ない場合や壊れている場合はNone）"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        from PIL import Image
+        try:
+            with Image.open(path) as image:
+                image.load()
+                return image.copy()
+        except OSError:
+            return None
+
+    def save(self, key, image):
+        """画像を保存し、古いキーの画像を削除する"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        image.save(temp_path, format='PNG')
+        os.replace(temp_path, path)
+        for name in os.listdir(self.directory):
+            if name.endswith(STARTUP_PREVIEW_SUFFIX) and name != os.path.basename(path):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+除外単語（ストップワード）の判定
+
+単語リストはfrozensetで保持して1回のハッシュ引きで判定し、前方一致・後方一致・
+正規表現のルールは1つの正規表現にまとめてコンパイルする。ルールによる判定結果は
+単語ごとにメモ化する。
+
+ストップワードファイルは1行1エントリのテキスト、またはCSV（1列目を使用）で、
+各エントリは次の形式で書ける。
+
+    単語            完全一致
+    prefix:株式会社  前方一致
+    suffix:さん      後方一致
+    re:第.+章        正規表現（単語全体に一致）
+    # コメント
+"""
+
+import csv
+import hashlib
+import os
+import re
+
+PREFIX_RULE = 'prefix:'
+SUFFIX_RULE = 'suffix:'
+REGEX_RULE = 're:'
+
+# ルール判定結果を保持する上限（超えたら作り直す）
+MATCH_CACHE_LIMIT = 1 << 18
+
+
+class StopwordFilter:
+    """単語リストとルールをまとめた不変の除外単語フィルタ"""
+
+    def __init__(self, words=(), prefixes=(), suffixes=(), patterns=()):
+        self.words = frozenset(words)
+        self.prefixes = tuple(dict.fromkeys(prefixes))
+        self.suffixes = tuple(dict.fromkeys(suffixes))
+        self.patterns = tuple(dict.fromkeys(patterns))
+
+        rules = [re.escape(prefix) + '.*' for prefix in self.prefixes]
+        rules += ['.*' + re.escape(suffix) for suffix in self.suffixes]
+        rules += [f'(?:{pattern})' for pattern in self.patterns]
+        self._matcher = re.compile('|'.join(rules), re.DOTALL).fullmatch if rules else None
+        self._match_cache = {}
+
+    @classmethod
+    def from_entries(cls, entries):
+        """エントリ（単語または prefix:/suffix:/re: 付きのルール）の列からフィルタを作る"""
+        words, prefixes, suffixes, patterns = [], [], [], []
+        for entry in entries:
+            entry = entry.strip()
+            if not entry or entry.startswith('#'):
+                continue
+            if entry.startswith(PREFIX_RULE):
+                prefixes.append(entry[len(PREFIX_RULE):])
+            elif entry.startswith(SUFFIX_RULE):
+                suffixes.append(entry[len(SUFFIX_RULE):])
+            elif entry.startswith(REGEX_RULE):
+                patterns.append(entry[len(REGEX_RULE):])
+            else:
+                words.append(entry)
+        return cls(words, prefixes, suffixes, patterns)
+
+    @classmethod
+    def from_files(cls, paths, entries=()):
+        """ストップワードファイル（テキスト/CSV）と追加のエントリからフィルタを作る"""
+        all_entries = []
+        for path in paths:
+            all_entries.extend(load_stopword_file(path))
+        all_entries.extend(entries)
+        return cls.from_entries(all_entries)
+
+    def __reduce__(self):
+        # 並列解析のワーカーへはルールだけを渡す（メモ化した判定結果は送らない）
+        return (self.__class__, (self.words, self.prefixes, self.suffixes, self.patterns))
+
+    def __contains__(self, word):
+        if word in self.words:
+            return True
+        if self._matcher is None:
+            return False
+        matched = self._match_cache.get(word)
+        if matched is None:
+            matched = self._matcher(word) is not None
+            if len(self._match_cache) >= MATCH_CACHE_LIMIT:
+                self._match_cache.clear()
+            self._match_cache[word] = matched
+        return matched
+
+    def __iter__(self):
+        """エントリを from_entries に渡せる形式で返す"""
+        yield from sorted(self.words)
+        yield from (PREFIX_RULE + prefix for prefix in self.prefixes)
+        yield from (SUFFIX_RULE + suffix for suffix in self.suffixes)
+        yield from (REGEX_RULE + pattern for pattern in self.patterns)
+
+    def __len__(self):
+        return len(self.words) + len(self.prefixes) + len(self.suffixes) + len(self.patterns)
+
+    def __eq__(self, other):
+        if not isinstance(other, StopwordFilter):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return (self.words, self.prefixes, self.suffixes, self.patterns)
+
+    def fingerprint(self):
+        """フィルタの内容を表すハッシュ（キャッシュキー用）"""
+        digest = hashlib.sha256()
+        for entry in self:
+            digest.update(entry.encode('utf-8'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+
+EMPTY_STOPWORDS = StopwordFilter()
+
+
+def as_stopword_filter(exclude_words):
+    """単語のリストや集合などをStopwordFilterに変換する"""
+    if isinstance(exclude_words, StopwordFilter):
+        return exclude_words
+    if not exclude_words:
+        return EMPTY_STOPWORDS
+    return StopwordFilter.from_entries(exclude_words)
+
+
+def load_stopword_file(path):
+    """ストップワードファイルを読み込み、エントリのリストを返す"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            return [row[0] for row in csv.reader(f) if row]
+        return [line.rstrip('\r\n') for line in f]
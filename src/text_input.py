@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+入力テキストの読み込み（文字コードの判定・圧縮ファイル）
+
+テキストファイルはmmapで読み込み、インクリメンタルデコーダーで少しずつ文字列に
+変換するため、ファイル全体のバイト列やデコード済みの文字列を一度に持つことはない。
+.gzはそのまま、.zipはアーカイブ内のテキストをメンバーごとに、展開せずに順に読む。
+
+文字コードはUTF-8・UTF-8（BOM付き）・Shift_JIS（CP932）・EUC-JPに対応し、指定がなければ
+先頭の一部から判定する。BOMがあればUTF-8（BOM付き）、UTF-8として正しく読めればUTF-8、
+そうでなければCP932・EUC-JPのうち、エラーなく読めて日本語の文字（ひらがな・カタカナ・漢字）が
+多くなる方を選ぶ。
+
+読み込めない場合はInputError（ファイルがない場合などはOSError）を送出する。
+"""
+
+import codecs
+import gzip
+import io
+import mmap
+import os
+import zipfile
+
+# 判定で試す文字コードの順（BOM付きUTF-8はBOMの有無で判定する）
+DETECTION_ORDER = ('utf-8', 'cp932', 'euc_jp')
+
+# 別名の正規化（Shift_JISは機種依存文字を含むCP932として読む）
+ENCODING_ALIASES = {
+    'shift-jis': 'cp932',
+    'sjis': 'cp932',
+    's-jis': 'cp932',
+    'ms932': 'cp932',
+    'windows-31j': 'cp932',
+    'eucjp': 'euc_jp',
+}
+
+# 文字コードの判定に使う先頭のバイト数
+DETECT_SAMPLE_BYTES = 64 * 1024
+
+# ファイルから一度に読み込むバイト数と、一度に返す文字数
+READ_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BLOCK_CHARS = 1024 * 1024
+
+COMPRESSED_EXTENSIONS = ('.gz', '.zip')
+TEXT_MEMBER_EXTENSIONS = ('.txt',)
+
+
+class InputError(Exception):
+    """入力ファイルを読み込めない（文字コードを判定できない・アーカイブにテキストがないなど）"""
+
+
+def normalize_encoding(encoding):
+    """文字コード名を正規化する（None・'auto'は自動判定としてNoneを返す）"""
+    if encoding is None or encoding.lower() == 'auto':
+        return None
+    name = encoding.lower().replace('_', '-')
+    name = ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        raise InputError(f"不明な文字コードです: {encoding}")
+
+
+def _japanese_score(text):
+    """日本語の文字の多さ（誤った文字コードで読むと半角カナや制御文字が増える）"""
+    score = 0
+    for char in text:
+        code = ord(char)
+        if 0x3040 <= code <= 0x30FF or 0x4E00 <= code <= 0x9FFF:
+            score += 1
+        elif 0xFF61 <= code <= 0xFF9F or (code < 0x20 and char not in '\r\n\t'):
+            score -= 1
+    return score
+
+
+def detect_encoding(sample, final=False):
+    """バイト列の先頭から文字コードを判定する
+
+    finalがFalseの場合、sampleの末尾で途切れたマルチバイト文字はエラーとしない。
+    いずれの文字コードでも読めない場合はInputErrorを送出する。
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    best = None
+    for encoding in DETECTION_ORDER:
+        try:
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final)
+        except UnicodeDecodeError:
+            continue
+        if encoding == 'utf-8':
+            return encoding
+        score = _japanese_score(text)
+        if best is None or score > best[0]:
+            best = (score, encoding)
+    if best is None:
+        raise InputError("文字コードを判定できません（UTF-8・Shift_JIS・EUC-JPのいずれでもありません）")
+    return best[1]
+
+
+def decode_bytes(data, encoding=None):
+    """バイト列を文字列にする（encodingの指定がなければ判定する）"""
+    encoding = normalize_encoding(encoding) or detect_encoding(data[:DETECT_SAMPLE_BYTES],
+                                                               final=len(data) <= DETECT_SAMPLE_BYTES)
+    if encoding == 'utf-8' and data.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError as e:
+        raise InputError(f"{encoding}として読み込めません: {e}") from e
+
+
+class _MappedFile(io.RawIOBase):
+    """mmapしたファイルを読み込み専用のストリームとして扱う"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = None
+        self._position = 0
+        try:
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self._map, 'madvise'):
+                    self._map.madvise(mmap.MADV_SEQUENTIAL)
+        except Exception:
+            self._file.close()
+            raise
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._map is None:
+            return 0
+        end = min(self._position + len(buffer), len(self._map))
+        size = end - self._position
+        with memoryview(self._map) as view:
+            buffer[:size] = view[self._position:end]
+        self._position = end
+        return size
+
+    def close(self):
+        if not self.closed:
+            if self._map is not None:
+                self._map.close()
+            self._file.close()
+        super().close()
+
+
+def _open_plain(path):
+    return io.BufferedReader(_MappedFile(path), READ_BUFFER_SIZE)
+
+
+def _text_members(archive):
+    """アーカイブ内の読み込むメンバー（.txtがあればそれだけ、なければすべてのファイル）を名前順に返す"""
+    members = [info for info in archive.infolist()
+               if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+               and not os.path.basename(info.filename).startswith('.')]
+    text_members = [info for info in members if info.filename.lower().endswith(TEXT_MEMBER_EXTENSIONS)]
+    return sorted(text_members or members, key=lambda info: info.filename)
+
+
+def _iter_sources(path):
+    """(名前, バイナリストリームを開く関数) を順に返す"""
+    lower = path.lower()
+    if lower.endswith('.zip'):
+        try:
+            archive = zipfile.ZipFile(path)
+        except zipfile.BadZipFile as e:
+            raise InputError(f"ZIPファイルを読み込めません: {path}: {e}") from e
+        with archive:
+            members = _text_members(archive)
+            if not members:
+                raise InputError(f"ZIPファイルにテキストがありません: {path}")
+            for info in members:
+                yield f"{path}:{info.filename}", lambda info=info: archive.open(info)
+    elif lower.endswith('.gz'):
+        yield path, lambda: gzip.open(path, 'rb')
+    else:
+        yield path, lambda: _open_plain(path)
+
+
+def _resolve_encoding(name, opener, encoding):
+    if encoding == 'utf-8':
+        # decode_bytesと同じく、UTF-8を指定された場合も先頭のBOMは取り除く（BOMがなければutf-8と同じ）
+        return 'utf-8-sig'
+    if encoding is not None:
+        return encoding
+    try:
+        with opener() as binary:
+            sample = binary.read(DETECT_SAMPLE_BYTES)
+    except (EOFError, gzip.BadGzipFile, zipfile.BadZipFile) as e:
+        raise InputError(f"圧縮ファイルを読み込めません: {name}: {e}") from e
+    try:
+        return detect_encoding(sample, final=len(sample) < DETECT_SAMPLE_BYTES)
+    except InputError as e:
+        raise InputError(f"{name}: {e}") from None
+
+
+def iter_text_blocks(path, encoding=None, block_chars=DEFAULT_BLOCK_CHARS):
+    """ファイル（.gz・.zipを含む）をデコードしながら、(メンバー名, 最大block_chars文字の文字列) を順に返す
+
+    .zipはメンバーごとに文字コードを判定し、1つの文字列が複数のメンバーにまたがることはない。
+    改行コード（CRLF・CR）はLFに統一する。
+    """
+    if block_chars <= 0:
+        raise ValueError("block_charsは1以上を指定してください")
+    encoding = normalize_encoding(encoding)
+    for name, opener in _iter_sources(path):
+        member_encoding = _resolve_encoding(name, opener, encoding)
+        try:
+            with io.TextIOWrapper(opener(), encoding=member_encoding) as stream:
+                while True:
+                    block = stream.read(block_chars)
+                    if not block:
+                        break
+                    yield name, block
+        except UnicodeDecodeError as e:
+            raise InputError(f"{name}を{member_encoding}として読み込めません: {e}") from e
+        except (EOFError, gzip.BadGzipFile, zipfile.BadZipFile) as e:
+            raise InputError(f"圧縮ファイルを読み込めません: {name}: {e}") from e
+
+
+def read_text(path, encoding=None):
+    """ファイル全体を文字列として読み込む（.zipの複数のメンバーは空行で区切って連結する）"""
+    members = {}
+    for name, block in iter_text_blocks(path, encoding):
+        members.setdefault(name, []).append(block)
+    return "\n\n".join("".join(blocks) for blocks in members.values())
+
+
+def input_stem(path):
+    """出力ファイル名に使う入力ファイル名（.gz・.zipと.txtの拡張子を除く）"""
+    name = os.path.basename(path)
+    for extension in COMPRESSED_EXTENSIONS:
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return os.path.splitext(name)[0]
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+段落単位のトークン化結果を保存する永続キャッシュ
+
+段落の内容とトークナイザー設定（辞書・品詞・正規化ルール）のハッシュをキーに、
+段落ごとの単語出現回数をユーザーのキャッシュディレクトリ内のSQLiteに保存する。
+変更のない段落は形態素解析をやり直さずにキャッシュから集計できる。
+容量が上限を超えると、最後に参照された時刻が古いものから削除する（LRU）。
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+APP_NAME = "wordcloud_app"
+
+# キャッシュ容量の既定の上限（バイト）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 上限を超えたときに、この割合まで削減する
+EVICTION_TARGET_RATIO = 0.9
+
+# SQLiteのプレースホルダ数の上限を超えないように分割して問い合わせる
+QUERY_BATCH_SIZE = 500
+
+# 段落の区切り（空行）
+PARAGRAPH_SEPARATOR = re.compile(r'\n[ \t　]*\n')
+
+
+def default_cache_dir():
+    """OSごとのユーザーキャッシュディレクトリを返す（環境変数WORDCLOUD_CACHE_DIRで変更できる）"""
+    if os.environ.get('WORDCLOUD_CACHE_DIR'):
+        return os.environ['WORDCLOUD_CACHE_DIR']
+    if sys.platform == 'darwin':
+        base = os.path.expanduser("~/Library/Caches")
+    elif os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser("~\\AppData\\Local")
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser("~/.cache")
+    return os.path.join(base, APP_NAME)
+
+
+def split_paragraphs(text):
+    """テキストを空行で段落に分割する（空の段落は除く）"""
+    return [paragraph for paragraph in PARAGRAPH_SEPARATOR.split(text) if paragraph.strip()]
+
+
+class TokenCache:
+    """段落ごとの単語出現回数を保存するSQLiteキャッシュ"""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "tokens.sqlite3")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS paragraphs ("
+            " key TEXT PRIMARY KEY,"
+            " counts BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS paragraphs_last_access ON paragraphs (last_access)"
+        )
+        self._connection.commit()
+        self._total_bytes = self._query_total_bytes()
+
+    @staticmethod
+    def make_namespace(fingerprint):
+        """トークナイザー設定の文字列からキーの名前空間（ハッシュ）を作る"""
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_key(namespace, paragraph):
+        """名前空間と段落の内容からキャッシュキーを作る"""
+        digest = hashlib.sha256(namespace.encode('ascii'))
+        digest.update(paragraph.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, keys):
+        """キーに対応する単語出現回数（Counter）を辞書で返す（見つからないキーは含まない）"""
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique_keys), QUERY_BATCH_SIZE):
+                batch = unique_keys[start:start + QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT key, counts FROM paragraphs WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, counts in rows:
+                    found[key] = Counter(dict(json.loads(counts)))
+            if found:
+                self._connection.executemany(
+                    "UPDATE paragraphs SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """(キー, Counter) の組をまとめて保存し、必要なら古いものを削除する"""
+        now = time.time()
+        rows = []
+        for key, counts in entries:
+            # 出現順を保つため、(単語, 回数) の配列として保存する
+            blob = json.dumps(list(counts.items()), ensure_ascii=False).encode('utf-8')
+            rows.append((key, blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO paragraphs (key, counts, size, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._connection.commit()
+            self._total_bytes += sum(row[2] for row in rows)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """参照時刻が古いものから削除して容量を上限内に収める"""
+        # 他プロセスの書き込みも反映した実際の容量で判定する
+        self._total_bytes = self._query_total_bytes()
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        while self._total_bytes > target:
+            rows = self._connection.execute(
+                "SELECT key, size FROM paragraphs ORDER BY last_access LIMIT ?", (QUERY_BATCH_SIZE,)
+            ).fetchall()
+            if not rows:
+                break
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._connection.executemany("DELETE FROM paragraphs WHERE key = ?", removed)
+        self._connection.commit()
+
+    def _query_total_bytes(self):
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM paragraphs").fetchone()[0]
+
+    def clear(self):
+        """キャッシュをすべて削除する"""
+        with self._lock:
+            self._connection.execute("DELETE FROM paragraphs")
+            self._connection.commit()
+            self._connection.execute("VACUUM")
+            self._total_bytes = 0
+
+    def stats(self):
+        """キャッシュの件数・容量・ヒット数を返す"""
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM paragraphs").fetchone()[0]
+        return {
+            'entries': entries,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
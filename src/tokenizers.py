@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+形態素解析器（トークナイザー）のバックエンド
+
+ジェネレーターは形態素解析の結果を (表層形, 品詞の大分類, 素性の文字列) の列として受け取り、
+品詞・文字種・ストップワードによる採用判定はバックエンドによらず同じ規則で行う。
+集計ではwords()で、品詞がTokenizerConfig.parts_of_speechに含まれる形態素だけを
+数える語形（表層形、lemmaの場合は原形）で受け取る。
+
+words()は形態素ごとの文字列処理を避ける。MeCabは品詞ID（node.posid、pos-id.defのない辞書では
+左文脈ID）を、辞書の定義ファイルから事前に作った採用IDの集合で判定し、素性の文字列は原形を
+初めて引くときだけ分割する（結果は (表層形, 右文脈ID) ごとに覚えておく）。MeCab.Latticeは
+Taggerと同じくプールで保持し、チャンクをまたいで再利用する。
+
+- mecab: MeCab（mecab-python3）。辞書はmecabrcの設定に従う
+- sudachi-a / sudachi-b / sudachi-c: SudachiPy（SudachiDict）。A・B・Cは分割単位
+  （Aが最も短く、Cが固有表現などを最も長くまとめる）
+
+どちらもTokenizerConfigでユーザー辞書とシステム辞書を指定できる。CSVのユーザー辞書は
+バックエンドの生成時に1回だけコンパイルし（src.user_dictionary）、configにはコンパイル済みの
+.dicのパスを残すため、同じ設定で作る並列解析のワーカーはコンパイルせずに読み込む。
+
+どちらも解析器の実体（MeCab.Tagger・sudachipyのTokenizer）はスレッドセーフではないため、
+TaggerPoolで保持して解析のたびに1つを貸し出す。SudachiPyは辞書を1回だけ読み込み、
+同時に解析するスレッドごとにTokenizerを作る。
+"""
+
+import importlib.util
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from importlib import metadata
+from operator import attrgetter
+
+from src.analyzer import TaggerPool, create_mecab_tagger
+from src.text_input import read_text
+from src.user_dictionary import (compile_mecab_dictionary, compile_sudachi_dictionary, file_identity,
+                                 is_dictionary_source, prepare_user_dictionary)
+
+TOKENIZER_NAMES = ('mecab', 'sudachi-a', 'sudachi-b', 'sudachi-c')
+DEFAULT_TOKENIZER = 'mecab'
+
+# SudachiPyが一度に解析できる入力の上限（UTF-8で49149バイト）に収まる文字数
+# （1文字は最大4バイト）
+SUDACHI_MAX_CHARS = 12000
+
+# SudachiDictのパッケージ名で指定できるシステム辞書
+SUDACHI_DICTIONARY_TYPES = ('small', 'core', 'full')
+
+# 解析結果を左右するパッケージ（バックエンドごと）
+TOKENIZER_PACKAGES = {
+    'mecab': ('mecab-python3', 'unidic-lite', 'unidic', 'ipadic'),
+    'sudachi': ('SudachiPy', 'SudachiDict-small', 'SudachiDict-core', 'SudachiDict-full'),
+}
+
+# MeCabで (表層形, 右文脈ID) ごとに覚えておく原形の上限（超えたら作り直す）
+LEMMA_CACHE_LIMIT = 1 << 18
+
+# ワードクラウドに採用する品詞（大分類）の既定値
+DEFAULT_PARTS_OF_SPEECH = ('名詞', '動詞', '形容詞')
+
+# 原形の列の位置を調べるための文と、その先頭の形態素の原形
+# （ipadicは原形、unidicは書字形基本形の列が見つかる。unidicの語彙素「為る」は表記が変わるため使わない）
+LEMMA_PROBE = ("した", "する")
+
+
+@dataclass(frozen=True)
+class TokenizerConfig:
+    """形態素解析器の設定（並列解析のワーカーに渡して同じバックエンドを作る）"""
+
+    name: str = DEFAULT_TOKENIZER
+    user_dictionaries: tuple = ()  # ユーザー辞書（CSVまたはコンパイル済みの.dic）のパス
+    system_dictionary: str = None  # MeCab: 辞書ディレクトリ、SudachiPy: system.dicのパスまたはsmall/core/full
+    parts_of_speech: tuple = DEFAULT_PARTS_OF_SPEECH  # 採用する品詞の大分類
+    lemma: bool = False  # 表層形ではなく原形（見た→見る）で数える
+
+    def __post_init__(self):
+        # リストや1つのパスで渡されたユーザー辞書もタプルとして保持する
+        user_dictionaries = self.user_dictionaries or ()
+        if isinstance(user_dictionaries, str):
+            user_dictionaries = (user_dictionaries,)
+        object.__setattr__(self, 'user_dictionaries', tuple(user_dictionaries))
+        object.__setattr__(self, 'parts_of_speech', parse_parts_of_speech(self.parts_of_speech))
+
+
+def parse_parts_of_speech(parts_of_speech):
+    """品詞の大分類の指定（カンマ区切りの文字列またはリスト）を重複のないタプルにする"""
+    if isinstance(parts_of_speech, str):
+        parts_of_speech = parts_of_speech.split(',')
+    parts = tuple(dict.fromkeys(part.strip() for part in parts_of_speech if part.strip()))
+    if not parts:
+        raise ValueError("採用する品詞を1つ以上指定してください")
+    return parts
+
+
+def installed_fingerprint(config):
+    """TokenizerConfigから解析器を作らずに求める、解析結果を左右する設定（起動直後に使うキャッシュのキー向け）
+
+    バックエンドと分割単位・品詞・原形の設定、関係するパッケージのバージョン、ユーザー辞書と
+    システム辞書のファイル（パス・サイズ・更新時刻）から作り、MeCab・SudachiPyは読み込まない。
+    mecabrcで選ばれる辞書の中身の変更までは反映しないため、正確な値はfingerprint()で求める。
+    """
+    backend = 'sudachi' if config.name.startswith('sudachi') else 'mecab'
+    versions = {}
+    for package in TOKENIZER_PACKAGES[backend]:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+
+    def identity(path):
+        return file_identity(path) if path and os.path.exists(path) else path
+
+    return {
+        'tokenizer': config.name,
+        'versions': versions,
+        'mecabrc': os.environ.get('MECABRC') if backend == 'mecab' else None,
+        'user_dictionaries': [identity(path) for path in config.user_dictionaries],
+        'system_dictionary': identity(config.system_dictionary),
+        'parts_of_speech': list(config.parts_of_speech),
+        'lemma': config.lemma,
+    }
+
+
+def read_mecab_pos_table(dicdir, parts_of_speech):
+    """品詞を整数で判定するための (ノードの属性名, 採用する値の集合) を辞書の定義ファイルから作る
+
+    pos-id.defがあれば品詞ID（node.posid）を使う。pos-id.defのない辞書（unidic-liteなど）は
+    すべての形態素の品詞IDが同じになるため、代わりにleft-id.defの左文脈ID（node.lcAttr）を使う。
+    どちらも使えなければNoneを返す。
+    """
+    for filename, attribute in (("pos-id.def", 'posid'), ("left-id.def", 'lcAttr')):
+        path = os.path.join(dicdir, filename)
+        if not os.path.exists(path):
+            continue
+        allowed, values = set(), set()
+        for line in read_text(path).splitlines():
+            # pos-id.defは「名詞,一般,*,* 38」、left-id.defは「38 名詞,一般,*,*,*,*,*」の形式
+            if attribute == 'posid':
+                pattern, _, value = line.strip().rpartition(' ')
+            else:
+                value, _, pattern = line.strip().partition(' ')
+            if not pattern or not value.isdigit():
+                continue
+            # 大分類は「名詞」のほか「(名詞|動詞)」のような選択の形でも書ける
+            major = pattern.split(',', 1)[0]
+            if major.startswith('(') and major.endswith(')'):
+                major = major[1:-1]
+            values.add(int(value))
+            if any(part in parts_of_speech for part in major.split('|')):
+                allowed.add(int(value))
+        if len(values) > 1:
+            return attribute, frozenset(allowed)
+    return None
+
+
+def split_text(text, max_chars):
+    """テキストをmax_chars文字以下に区切る（改行 > 文末 > 空白 の位置を優先する）"""
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = -1
+        for separator in ('\n', '。', ' '):
+            cut = text.rfind(separator, start, end)
+            if cut > start:
+                break
+        end = cut + 1 if cut > start else end
+        yield text[start:end]
+        start = end
+    if start < len(text):
+        yield text[start:]
+
+
+class MeCabTokenizer:
+    """MeCabによる形態素解析
+
+    複数のジェネレーターで温まったTaggerを共有する場合はtagger_poolを渡す
+    （ユーザー辞書・システム辞書を指定した場合は、その辞書を読み込んだTaggerのプールを作る）。
+    """
+
+    name = 'mecab'
+
+    def __init__(self, tagger_pool=None, user_dictionaries=(), system_dictionary=None,
+                 parts_of_speech=DEFAULT_PARTS_OF_SPEECH, lemma=False):
+        import MeCab
+
+        if user_dictionaries or system_dictionary:
+            base = TaggerPool(partial(create_mecab_tagger, system_dictionary))
+            compiled = tuple(self._prepare(path, base) for path in user_dictionaries)
+            tagger_pool = TaggerPool(partial(create_mecab_tagger, system_dictionary, compiled))
+        else:
+            compiled = ()
+        self.config = TokenizerConfig('mecab', compiled, system_dictionary, parts_of_speech, lemma)
+        self.parts_of_speech = frozenset(self.config.parts_of_speech)
+        self.pool = tagger_pool or TaggerPool(create_mecab_tagger)
+        self.lattices = TaggerPool(MeCab.Lattice)
+        # 辞書を読み込めない場合はここで例外にする（生成したTaggerはプールに残る）
+        with self.pool.acquire() as tagger:
+            dicdir = os.path.dirname(tagger.dictionary_info().filename)
+        # 定義ファイルから品詞を整数で判定できない辞書では素性の先頭（「名詞,」など）で判定する
+        table = read_mecab_pos_table(dicdir, self.parts_of_speech)
+        self._pos_attribute, self._allowed_ids = (attrgetter(table[0]), table[1]) if table else (None, None)
+        self._pos_prefixes = tuple(f"{part}," for part in self.config.parts_of_speech)
+        # (表層形, 右文脈ID) ごとの原形。右文脈IDは活用の種類と形で変わるため、
+        # 同じ表層形でも「行っ（行く）」と「行っ（行う）」を区別できる
+        self._lemmas = {}
+        self._lemma_index = self._find_lemma_index() if lemma else None
+
+    @staticmethod
+    def _prepare(path, base):
+        """ユーザー辞書を、baseのTaggerが読み込んだシステム辞書に合わせてコンパイルする"""
+        if not is_dictionary_source(path):
+            # コンパイル済みの辞書はシステム辞書を読み込まずにそのまま使う
+            return prepare_user_dictionary(path, 'mecab', None, None)
+        with base.acquire() as tagger:
+            info = tagger.dictionary_info()
+            dicdir, charset = os.path.dirname(info.filename), info.charset
+        return prepare_user_dictionary(path, 'mecab', file_identity(info.filename),
+                                       partial(compile_mecab_dictionary, dicdir=dicdir, charset=charset))
+
+    def _find_lemma_index(self):
+        """素性のうち原形が入っている列の位置を、LEMMA_PROBEの解析結果から調べる"""
+        sentence, lemma = LEMMA_PROBE
+        with self.pool.acquire() as tagger:
+            fields = tagger.parseToNode(sentence).next.feature.split(',')
+        # 先頭の4列は品詞
+        for index in range(4, len(fields)):
+            if fields[index] == lemma:
+                return index
+        raise ValueError("この辞書の素性からは原形を取得できません")
+
+    def _lemma(self, node):
+        surface = node.surface
+        key = (surface, node.rcAttr)
+        lemma = self._lemmas.get(key)
+        if lemma is None:
+            fields = node.feature.split(',')
+            lemma = fields[self._lemma_index] if len(fields) > self._lemma_index else '*'
+            # 未知語などで原形がなければ表層形を使う
+            lemma = surface if lemma in ('*', '') else lemma
+            # 長時間動かすサーバー・GUIや巨大な入力でも語彙数に応じて増え続けないようにする
+            if len(self._lemmas) >= LEMMA_CACHE_LIMIT:
+                self._lemmas.clear()
+            self._lemmas[key] = lemma
+        return lemma
+
+    @contextmanager
+    def _parse(self, text):
+        """プールのTaggerとLatticeでtextを解析し、BOSのノードを返す"""
+        with self.pool.acquire() as tagger, self.lattices.acquire() as lattice:
+            lattice.set_sentence(text)
+            if not tagger.parse(lattice):
+                raise RuntimeError(f"MeCabの解析に失敗しました: {lattice.what()}")
+            try:
+                yield lattice.bos_node()
+            finally:
+                lattice.clear()
+
+    def tokens(self, text):
+        """(表層形, 品詞の大分類, 素性の文字列) を順に返す（BOS/EOSのノードを含む）"""
+        with self._parse(text) as node:
+            while node:
+                feature = node.feature
+                part_of_speech = feature.split(',', 1)[0] if feature != '*' else ''
+                yield node.surface, part_of_speech, feature
+                node = node.next
+
+    def analyze(self, text):
+        """(表層形, 品詞の大分類, 素性の文字列, 数える語形) を順に返す（トレース用）"""
+        with self._parse(text) as node:
+            while node:
+                feature = node.feature
+                part_of_speech = feature.split(',', 1)[0] if feature != '*' else ''
+                word = self._lemma(node) if self._lemma_index is not None else node.surface
+                yield node.surface, part_of_speech, feature, word
+                node = node.next
+
+    def words(self, text):
+        """品詞がparts_of_speechに含まれる形態素を、数える語形で順に返す"""
+        pos_attribute, allowed = self._pos_attribute, self._allowed_ids
+        prefixes = self._pos_prefixes
+        lemma = self._lemma_index is not None
+        with self._parse(text) as node:
+            while node:
+                if pos_attribute(node) in allowed if allowed is not None else node.feature.startswith(prefixes):
+                    yield self._lemma(node) if lemma else node.surface
+                node = node.next
+
+    def fingerprint(self):
+        """解析結果を左右する設定（辞書のファイル・バージョン・更新時刻）"""
+        dictionaries = []
+        with self.pool.acquire() as tagger:
+            info = tagger.dictionary_info()
+            while info:
+                mtime = os.path.getmtime(info.filename) if os.path.exists(info.filename) else None
+                dictionaries.append([info.filename, info.version, info.size, mtime])
+                info = info.next
+        return {'tokenizer': 'mecab', 'dictionaries': dictionaries}
+
+
+def sudachi_system_dictionary(system_dictionary=None):
+    """SudachiPyのシステム辞書（system.dic）の絶対パス（small/core/fullはSudachiDictのパッケージから探す）"""
+    name = system_dictionary or 'core'
+    if name not in SUDACHI_DICTIONARY_TYPES:
+        return os.path.abspath(name)
+    spec = importlib.util.find_spec(f"sudachidict_{name}")
+    if spec is None or spec.origin is None:
+        raise ValueError(f"SudachiDictがインストールされていません: pip install sudachidict_{name}")
+    return os.path.join(os.path.dirname(spec.origin), "resources", "system.dic")
+
+
+class SudachiTokenizer:
+    """SudachiPyによる形態素解析（split_modeは'A'・'B'・'C'）"""
+
+    def __init__(self, split_mode='C', user_dictionaries=(), system_dictionary=None,
+                 parts_of_speech=DEFAULT_PARTS_OF_SPEECH, lemma=False):
+        from sudachipy import Dictionary, SplitMode
+
+        self.split_mode = split_mode.upper()
+        if self.split_mode not in ('A', 'B', 'C'):
+            raise ValueError(f"SudachiPyの分割単位はA・B・Cのいずれかです: {split_mode}")
+        self.name = f"sudachi-{self.split_mode.lower()}"
+        self.system_path = system = sudachi_system_dictionary(system_dictionary)
+        compiled = tuple(prepare_user_dictionary(path, 'sudachi', file_identity(system),
+                                                 partial(compile_sudachi_dictionary, system_dictionary=system))
+                         for path in user_dictionaries)
+        self.config = TokenizerConfig(self.name, compiled, system_dictionary, parts_of_speech, lemma)
+        self.parts_of_speech = frozenset(self.config.parts_of_speech)
+        self.dictionary = Dictionary(config=json.dumps({'userDict': list(compiled)}), dict=system)
+        mode = getattr(SplitMode, self.split_mode)
+        # 0.6.8より前のSudachiPyにはDictionary.tokenizerがない
+        create = getattr(self.dictionary, 'tokenizer', None) or self.dictionary.create
+        self.pool = TaggerPool(lambda: create(mode=mode))
+        # 品詞IDごとの (大分類, 素性の文字列)。品詞の種類は高々数千なので、形態素ごとに
+        # タプルを連結しないよう初出時に作って使い回す
+        self._parts_of_speech = {}
+        # 品詞IDごとの採用可否
+        self._allowed = {}
+        with self.pool.acquire():
+            pass
+
+    def _part_of_speech(self, pos_id):
+        entry = self._parts_of_speech.get(pos_id)
+        if entry is None:
+            pos = self.dictionary.pos_of(pos_id)
+            entry = self._parts_of_speech[pos_id] = (pos[0], ','.join(pos))
+        return entry
+
+    def _accepts(self, pos_id):
+        accepted = self._allowed.get(pos_id)
+        if accepted is None:
+            accepted = self._allowed[pos_id] = self._part_of_speech(pos_id)[0] in self.parts_of_speech
+        return accepted
+
+    def tokens(self, text):
+        """(表層形, 品詞の大分類, 素性の文字列) を順に返す"""
+        with self.pool.acquire() as tokenizer:
+            for piece in split_text(text, SUDACHI_MAX_CHARS):
+                for morpheme in tokenizer.tokenize(piece):
+                    part_of_speech, feature = self._part_of_speech(morpheme.part_of_speech_id())
+                    yield morpheme.surface(), part_of_speech, feature
+
+    def analyze(self, text):
+        """(表層形, 品詞の大分類, 素性の文字列, 数える語形) を順に返す（トレース用）"""
+        lemma = self.config.lemma
+        with self.pool.acquire() as tokenizer:
+            for piece in split_text(text, SUDACHI_MAX_CHARS):
+                for morpheme in tokenizer.tokenize(piece):
+                    part_of_speech, feature = self._part_of_speech(morpheme.part_of_speech_id())
+                    surface = morpheme.surface()
+                    yield surface, part_of_speech, feature, morpheme.dictionary_form() if lemma else surface
+
+    def words(self, text):
+        """品詞がparts_of_speechに含まれる形態素を、数える語形で順に返す"""
+        allowed = self._allowed
+        lemma = self.config.lemma
+        with self.pool.acquire() as tokenizer:
+            for piece in split_text(text, SUDACHI_MAX_CHARS):
+                for morpheme in tokenizer.tokenize(piece):
+                    pos_id = morpheme.part_of_speech_id()
+                    if allowed.get(pos_id) or (pos_id not in allowed and self._accepts(pos_id)):
+                        yield morpheme.dictionary_form() if lemma else morpheme.surface()
+
+    def fingerprint(self):
+        """解析結果を左右する設定（SudachiPy・辞書のバージョンと分割単位）
+
+        システム辞書は実際に読み込んだsystem.dicのファイル（パス・サイズ・更新時刻）と、
+        SudachiDictのパッケージから読み込んだ場合はそのパッケージのバージョンで区別する。
+        """
+        packages = ['SudachiPy']
+        dictionary_type = self.config.system_dictionary or 'core'
+        if dictionary_type in SUDACHI_DICTIONARY_TYPES:
+            packages.append(f"SudachiDict-{dictionary_type}")
+        versions = {}
+        for package in packages:
+            try:
+                versions[package] = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                versions[package] = None
+        return {'tokenizer': 'sudachi', 'split_mode': self.split_mode, 'versions': versions,
+                'system_dictionary': file_identity(self.system_path),
+                'user_dictionaries': [file_identity(path) for path in self.config.user_dictionaries]}
+
+
+def create_tokenizer(name=DEFAULT_TOKENIZER, tagger_pool=None, user_dictionaries=(), system_dictionary=None,
+                     parts_of_speech=DEFAULT_PARTS_OF_SPEECH, lemma=False):
+    """名前（TOKENIZER_NAMESのいずれか）からバックエンドを作る
+
+    tagger_poolはmecabの場合のみ使う。それ以外の引数はTokenizerConfigと同じ。
+    """
+    if name == 'mecab':
+        return MeCabTokenizer(tagger_pool, user_dictionaries, system_dictionary, parts_of_speech, lemma)
+    if name in TOKENIZER_NAMES:
+        return SudachiTokenizer(name.rsplit('-', 1)[1], user_dictionaries, system_dictionary,
+                                parts_of_speech, lemma)
+    raise ValueError(f"不明なトークナイザーです: {name}（{' / '.join(TOKENIZER_NAMES)}）")
+
+
+def as_tokenizer(tokenizer, tagger_pool=None):
+    """None・名前・TokenizerConfig・生成済みのバックエンドのいずれかからバックエンドを得る"""
+    if tokenizer is None or isinstance(tokenizer, str):
+        return create_tokenizer(tokenizer or DEFAULT_TOKENIZER, tagger_pool)
+    if isinstance(tokenizer, TokenizerConfig):
+        return create_tokenizer(tokenizer.name, tagger_pool, tokenizer.user_dictionaries,
+                                tokenizer.system_dictionary, tokenizer.parts_of_speech, tokenizer.lemma)
+    return tokenizer
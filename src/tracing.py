@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+形態素解析のデバッグトレース
+
+トレースはレベル（off / summary / token）で制御するオプトインの仕組み。
+有効な場合はJSONL形式で1レコードずつファイルへ書き出し、メモリに溜め込まない。
+無効な場合はNULL_TRACERを使い、解析のホットパスには一切処理を追加しない。
+"""
+
+import json
+
+TRACE_OFF = 0
+TRACE_SUMMARY = 1
+TRACE_TOKEN = 2
+
+# CLI/GUIで指定するレベル名と値の対応
+TRACE_LEVELS = {
+    'off': TRACE_OFF,
+    'summary': TRACE_SUMMARY,
+    'token': TRACE_TOKEN,
+}
+
+# サマリーに記録する上位単語数
+TRACE_TOP_WORDS = 100
+
+
+def parse_trace_level(level):
+    """レベル名（または数値）をトレースレベルの値に変換する"""
+    if isinstance(level, int):
+        return level
+    try:
+        return TRACE_LEVELS[level]
+    except KeyError:
+        raise ValueError(f"不明なトレースレベルです: {level}") from None
+
+
+class NullTracer:
+    """トレース無効時に使う何もしないトレーサー"""
+
+    level = TRACE_OFF
+    enabled = False
+    token_enabled = False
+    path = None
+
+    def write(self, event, **fields):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+NULL_TRACER = NullTracer()
+
+
+class TraceWriter:
+    """トレースレコードをJSONLとしてファイルへ逐次書き出す"""
+
+    def __init__(self, path, level=TRACE_SUMMARY):
+        self.path = path
+        self.level = level
+        self.enabled = level >= TRACE_SUMMARY
+        self.token_enabled = level >= TRACE_TOKEN
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, event, **fields):
+        """1件のレコードを書き出す"""
+        record = {'event': event}
+        record.update(fields)
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_tracer(path, level):
+    """トレーサーを開く（レベルがoffまたは出力先がない場合はNULL_TRACER）"""
+    level = parse_trace_level(level)
+    if level <= TRACE_OFF or not path:
+        return NULL_TRACER
+    try:
+        return TraceWriter(path, level)
+    except OSError as e:
+        print(f"デバッグ情報の出力に失敗: {e}")
+        return NULL_TRACER
+
+
+def write_summary(tracer, word_counts, **fields):
+    """単語頻度のサマリーレコードを書き出す"""
+    if not tracer.enabled:
+        return
+    tracer.write(
+        'summary',
+        words=sum(word_counts.values()),
+        unique_words=len(word_counts),
+        top_words=word_counts.most_common(TRACE_TOP_WORDS),
+        **fields
+    )
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ユーザー辞書のコンパイルとキャッシュ
+
+MeCab・SudachiPyのユーザー辞書は、CSVの辞書ソースをシステム辞書に合わせて
+バイナリ辞書（.dic）にコンパイルしてから読み込む。CSVを指定した場合はコンパイル結果を
+ユーザーのキャッシュディレクトリ（{default_cache_dir()}/user_dict）に保存し、
+ソースの内容・更新時刻・システム辞書が変わらない限り、GUI・バッチ・並列解析の
+ワーカーのいずれからも同じ.dicを再利用する。コンパイル済みの.dicを指定した場合はそのまま使う。
+
+CSVの文字コードは入力テキストと同じく判定し（src.text_input）、UTF-8に変換してから
+コンパイルする。
+
+- MeCab: mecab-dict-indexコマンド、なければmecab-python3に同梱のlibmecabの
+  mecab_dict_indexを使う。MeCabはエラー時にプロセスを終了することがあるため別プロセスで実行する
+- SudachiPy: sudachipy.build_user_dicを使う
+
+コンパイルできない場合はUserDictionaryErrorを送出する。
+"""
+
+import ctypes
+import ctypes.util
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+from src.text_input import InputError, iter_text_blocks
+from src.token_cache import default_cache_dir
+
+# コンパイル結果の形式を変えたときに更新する（古いキャッシュを使わないようにする）
+USER_DICTIONARY_VERSION = 1
+
+SOURCE_EXTENSION = '.csv'
+
+# ソースのハッシュを計算するときに一度に読むバイト数
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# コンパイルを待つ時間の上限（秒）
+COMPILE_TIMEOUT = 600
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 同じプロセス内で同じ辞書を同時にコンパイルしないようにする
+_compile_lock = threading.Lock()
+
+
+class UserDictionaryError(Exception):
+    """ユーザー辞書を読み込めない（ファイルがない・コンパイルに失敗したなど）"""
+
+
+def is_dictionary_source(path):
+    """コンパイルが必要な辞書ソース（CSV）かどうか"""
+    return path.lower().endswith(SOURCE_EXTENSION)
+
+
+def user_dictionary_dir():
+    """コンパイル済みのユーザー辞書の保存先"""
+    return os.path.join(default_cache_dir(), "user_dict")
+
+
+def file_identity(path):
+    """ファイルを区別する値（絶対パス・サイズ・更新時刻）"""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _source_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compiled_dictionary_path(source, backend, system_dictionary, directory=None):
+    """CSVのソースに対応するコンパイル済みの辞書のパス
+
+    キーはソースの内容のハッシュと更新時刻、バックエンド、システム辞書（ファイルと更新時刻）から作る。
+    """
+    stat = os.stat(source)
+    key = json.dumps({
+        'version': USER_DICTIONARY_VERSION,
+        'backend': backend,
+        'source': [_source_digest(source), stat.st_size, stat.st_mtime_ns],
+        'system': system_dictionary,
+    }, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return os.path.abspath(os.path.join(directory or user_dictionary_dir(), f"{backend}-{digest}.dic"))
+
+
+def prepare_user_dictionary(source, backend, system_dictionary, compiler, directory=None):
+    """ユーザー辞書を解析器が読み込めるバイナリ辞書のパスにする
+
+    .csvはコンパイル済みの辞書がキャッシュにあればそのパスを返し、なければ
+    compiler(UTF-8のCSV, 出力先)でコンパイルして保存する。それ以外はコンパイル済みとみなしてそのまま返す。
+    system_dictionaryはキャッシュのキーに含めるシステム辞書の識別値（JSONに変換できる値）。
+    """
+    if not os.path.isfile(source):
+        raise UserDictionaryError(f"ユーザー辞書が見つかりません: {source}")
+    if not is_dictionary_source(source):
+        return os.path.abspath(source)
+
+    output = compiled_dictionary_path(source, backend, system_dictionary, directory)
+    if os.path.exists(output):
+        return output
+    with _compile_lock:
+        if os.path.exists(output):
+            return output
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        # 別のプロセスと同時にコンパイルしても壊れた辞書を読まないよう、一時ファイルから置き換える
+        temp_prefix = f"{output}.{os.getpid()}.{threading.get_ident()}"
+        temp_source, temp_output = f"{temp_prefix}.csv", f"{temp_prefix}.tmp"
+        try:
+            with open(temp_source, 'w', encoding='utf-8', newline='\n') as f:
+                for _, block in iter_text_blocks(source):
+                    f.write(block)
+            compiler(temp_source, temp_output)
+            if not os.path.exists(temp_output):
+                raise UserDictionaryError(f"ユーザー辞書のコンパイル結果がありません: {source}")
+            os.replace(temp_output, output)
+        except UserDictionaryError as e:
+            # エラーメッセージには一時ファイルではなく指定されたソースのパスを出す
+            raise UserDictionaryError(str(e).replace(temp_source, source)) from e
+        except (InputError, OSError) as e:
+            raise UserDictionaryError(f"ユーザー辞書をコンパイルできませんでした: {source}: {e}") from e
+        finally:
+            for path in (temp_source, temp_output):
+                if os.path.exists(path):
+                    os.remove(path)
+    return output
+
+
+def find_libmecab():
+    """mecab-python3に同梱のlibmecab（なければシステムのlibmecab）のパス"""
+    import MeCab
+
+    package_dir = os.path.dirname(os.path.abspath(MeCab.__file__))
+    patterns = (
+        os.path.join(package_dir, os.pardir, "mecab_python3.libs", "libmecab*"),  # Linux（auditwheel）
+        os.path.join(package_dir, ".dylibs", "libmecab*"),  # macOS（delocate）
+        os.path.join(package_dir, "libmecab*.dll"),  # Windows
+    )
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if matches:
+            return matches[0]
+    return ctypes.util.find_library('mecab')
+
+
+def _mecab_dict_index_main(argv):
+    """libmecabのmecab_dict_indexをmecab-dict-indexコマンドと同じ引数で実行する"""
+    library_path = find_libmecab()
+    if library_path is None:
+        print("libmecabが見つかりません", file=sys.stderr)
+        return 1
+    library = ctypes.CDLL(library_path)
+    library.mecab_dict_index.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)]
+    library.mecab_dict_index.restype = ctypes.c_int
+    args = [b"mecab-dict-index"] + [os.fsencode(arg) for arg in argv]
+    # argvはNULL終端にする
+    return library.mecab_dict_index(len(args), (ctypes.c_char_p * (len(args) + 1))(*args, None))
+
+
+def compile_mecab_dictionary(source, output, dicdir, charset):
+    """MeCabのユーザー辞書をコンパイルする（source: UTF-8のCSV、dicdir: システム辞書のディレクトリ）"""
+    args = ["-d", dicdir, "-u", output, "-f", "utf-8", "-t", charset, source]
+    command = shutil.which("mecab-dict-index")
+    if command is None:
+        # mecab-configがあればlibexecdirにあることが多い
+        config = shutil.which("mecab-config")
+        if config is not None:
+            libexec = subprocess.run([config, "--libexecdir"], capture_output=True, text=True).stdout.strip()
+            candidate = os.path.join(libexec, "mecab-dict-index")
+            command = candidate if os.access(candidate, os.X_OK) else None
+    if command is not None:
+        commandline = [command] + args
+    else:
+        commandline = [sys.executable, "-c",
+                       "import sys; from src.user_dictionary import _mecab_dict_index_main; "
+                       "sys.exit(_mecab_dict_index_main(sys.argv[1:]))"] + args
+    try:
+        result = subprocess.run(commandline, cwd=PROJECT_ROOT, capture_output=True, timeout=COMPILE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise UserDictionaryError(f"mecab-dict-indexを実行できませんでした: {e}") from e
+    if result.returncode != 0 or not os.path.exists(output):
+        message = (result.stderr or result.stdout).decode('utf-8', errors='replace').strip()
+        raise UserDictionaryError(f"MeCabのユーザー辞書のコンパイルに失敗しました: {message or result.returncode}")
+
+
+def compile_sudachi_dictionary(source, output, system_dictionary):
+    """SudachiPyのユーザー辞書をコンパイルする（system_dictionary: system.dicのパス）"""
+    from sudachipy import sudachipy as sudachi_core
+
+    try:
+        sudachi_core.build_user_dic(system=system_dictionary, lex=[source], output=output, description="")
+    except Exception as e:
+        raise UserDictionaryError(f"SudachiPyのユーザー辞書のコンパイルに失敗しました: {e}") from e
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+単語を整数IDに置き換えて出現回数をNumPy配列で保持する語彙
+
+単語の文字列は語彙ごとに1つだけ保持し（ID→単語のリストと単語→IDの辞書）、
+出現回数はIDを添字とするint64配列に加算する。チャンクやファイルごとの部分的な
+集計のマージは配列の加算で済み、最小出現回数によるフィルタリングと上位N件の選択
+（argpartition）も配列演算で行う。描画に渡す直前にだけ従来どおりの辞書に変換する。
+
+Vocabularyは読み取り専用のMapping（単語→出現回数）としても使えるため、
+Counterを受け取っていた箇所にそのまま渡せる。
+"""
+
+from collections import Counter
+from collections.abc import ItemsView, Mapping, ValuesView
+
+import numpy as np
+
+from src.stopwords import as_stopword_filter
+
+COUNT_DTYPE = np.int64
+
+# 出現回数の配列の初期容量（不足したら倍に広げる）
+INITIAL_CAPACITY = 1024
+
+
+class _VocabularyItems(ItemsView):
+    def __iter__(self):
+        vocabulary = self._mapping
+        return zip(vocabulary._words, vocabulary.counts.tolist())
+
+
+class _VocabularyValues(ValuesView):
+    def __iter__(self):
+        return iter(self._mapping.counts.tolist())
+
+
+class Vocabulary(Mapping):
+    """単語→出現回数の集計（単語は出現順にIDを振って保持する）
+
+    wordsには単語の列、または単語→出現回数の辞書（Counter・Vocabularyなど）を指定できる。
+    """
+
+    def __init__(self, words=None):
+        self._ids = {}
+        self._words = []
+        self._counts = np.zeros(INITIAL_CAPACITY, dtype=COUNT_DTYPE)
+        if words is not None:
+            self.update(words)
+
+    @classmethod
+    def _from_arrays(cls, words, counts):
+        vocabulary = cls()
+        vocabulary._words = list(words)
+        vocabulary._ids = {word: index for index, word in enumerate(vocabulary._words)}
+        vocabulary._counts = np.array(counts, dtype=COUNT_DTYPE)
+        return vocabulary
+
+    def __reduce__(self):
+        # 並列解析のワーカーからは単語のリストと使用中の範囲の配列だけを、
+        # 出現回数が収まる最小の整数型にして送る
+        counts = self.counts
+        if len(counts):
+            counts = counts.astype(np.min_scalar_type(int(counts.max())))
+        return (self.__class__._from_arrays, (self._words, counts))
+
+    @property
+    def counts(self):
+        """ID順の出現回数の配列（内部配列のビュー）"""
+        return self._counts[:len(self._words)]
+
+    def intern(self, word):
+        """単語のIDを返す（未登録なら新しいIDを振る）"""
+        index = self._ids.get(word)
+        if index is None:
+            index = len(self._words)
+            self._ids[word] = index
+            self._words.append(word)
+            if index >= len(self._counts):
+                self._grow(index + 1)
+        return index
+
+    def _grow(self, size):
+        grown = np.zeros(max(size, 2 * len(self._counts)), dtype=COUNT_DTYPE)
+        grown[:len(self._counts)] = self._counts
+        self._counts = grown
+
+    def update(self, words):
+        """出現回数を加算する（単語の列、または単語→出現回数の辞書）"""
+        if isinstance(words, Vocabulary):
+            source, counts = words._words, words.counts
+        else:
+            if not isinstance(words, Mapping):
+                words = Counter(words)
+            source = words.keys()
+            counts = np.fromiter(words.values(), dtype=COUNT_DTYPE, count=len(words))
+        if not len(counts):
+            return
+        ids = self._ids
+        new_words = [word for word in source if word not in ids]
+        if new_words:
+            start = len(self._words)
+            ids.update(zip(new_words, range(start, start + len(new_words))))
+            self._words.extend(new_words)
+            if len(self._words) > len(self._counts):
+                self._grow(len(self._words))
+        indices = np.fromiter(map(ids.__getitem__, source), dtype=np.intp, count=len(counts))
+        # 1回の加算の中でIDは重複しないため、ファンシーインデックスでまとめて加算できる
+        self._counts[indices] += counts
+
+    def __getitem__(self, word):
+        index = self._ids.get(word)
+        return 0 if index is None else int(self._counts[index])
+
+    def __contains__(self, word):
+        return word in self._ids
+
+    def __iter__(self):
+        return iter(self._words)
+
+    def __len__(self):
+        return len(self._words)
+
+    def items(self):
+        return _VocabularyItems(self)
+
+    def values(self):
+        return _VocabularyValues(self)
+
+    def total(self):
+        """出現回数の合計"""
+        return int(self.counts.sum())
+
+    def select(self, min_freq=1, exclude_words=None):
+        """最小出現回数と除外単語の条件を満たす単語のIDを昇順の配列で返す
+
+        除外単語の判定は、最小出現回数を満たした単語にだけ1語ずつ行う。
+        """
+        ids = np.flatnonzero(self.counts >= min_freq)
+        exclude_words = as_stopword_filter(exclude_words)
+        if len(exclude_words) and len(ids):
+            words = self._words
+            keep = np.fromiter((words[index] not in exclude_words for index in ids.tolist()),
+                               dtype=bool, count=len(ids))
+            ids = ids[keep]
+        return ids
+
+    def top(self, ids=None, n=None):
+        """IDを出現回数の多い順（同数は出現順）に並べ、上位n件を返す"""
+        if ids is None:
+            ids = np.arange(len(self._words))
+        counts = self.counts[ids]
+        if n is not None and n < len(ids):
+            if n <= 0:
+                return ids[:0]
+            # n番目に多い出現回数以上の単語だけを候補に残してから並べ替える
+            threshold = np.partition(counts, len(ids) - n)[len(ids) - n]
+            candidates = counts >= threshold
+            ids, counts = ids[candidates], counts[candidates]
+        order = np.lexsort((ids, -counts))
+        return ids[order][:n]
+
+    def most_common(self, n=None):
+        """Counter.most_commonと同じ形式で上位n件を返す"""
+        ids = self.top(n=n)
+        return list(zip([self._words[index] for index in ids.tolist()], self.counts[ids].tolist()))
+
+    def to_dict(self, ids=None, max_words=None):
+        """指定したIDの単語→出現回数の辞書を返す
+
+        max_wordsを指定すると出現回数の多い順に最大max_words件に絞る
+        （指定しなければIDの順、つまり単語の出現順）。
+        """
+        if ids is None:
+            ids = np.arange(len(self._words))
+        if max_words is not None:
+            ids = self.top(ids, max_words)
+        words = self._words
+        return dict(zip([words[index] for index in ids.tolist()], self.counts[ids].tolist()))
+
+
+def as_vocabulary(words):
+    """単語の列や単語→出現回数の辞書をVocabularyに変換する"""
+    if isinstance(words, Vocabulary):
+        return words
+    return Vocabulary(words)
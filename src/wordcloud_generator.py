@@ -1,202 +1,391 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import MeCab
-import re
 from collections import Counter
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import json
+import numpy as np
 import argparse
 import os
+import re
+import sqlite3
 import sys
+from src.batch import DEFAULT_OUTPUT_DIR, collect_inputs, run_batch
+from src.fonts import get_font_registry, install_font_cache
+from src.heavy_hitters import DEFAULT_APPROX_CAPACITY, HeavyHitters
+from src.image_cache import DEFAULT_DISK_BYTES, ImageCache, image_cache_key
+from src.normalizer import TextNormalizer
+from src.options import AnalysisOptions, OutputOptions, RenderOptions
+from src.profiling import NULL_PROFILER, STAGE_LABELS, StageProfiler
+from src.parallel import choose_shard_size, count_words_parallel, resolve_worker_count
+from src.rendering import LayoutCache, create_wordcloud, encode_image, fit_to_size, image_format_for
+from src.text_input import InputError, input_stem, iter_text_blocks, normalize_encoding, read_text
+from src.tokenizers import (DEFAULT_PARTS_OF_SPEECH, DEFAULT_TOKENIZER, TOKENIZER_NAMES, TokenizerConfig,
+                             as_tokenizer, parse_parts_of_speech)
+from src.stopwords import EMPTY_STOPWORDS, StopwordFilter, as_stopword_filter
+from src.token_cache import DEFAULT_MAX_BYTES, TokenCache, default_cache_dir, split_paragraphs
+from src.tracing import NULL_TRACER, TRACE_LEVELS, TRACE_OFF, TRACE_TOKEN, open_tracer, parse_trace_level, write_summary
+from src.vocabulary import Vocabulary, as_vocabulary
+
+# ストリーミング処理で一度に解析するチャンクの目安サイズ（文字数）
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
 
 class JapaneseWordCloudGenerator:
-    def __init__(self):
+    """日本語テキストからワードクラウドを生成する
+
+    形態素解析はtokenizer（src.tokenizersのバックエンド）がプールから借りた解析器で行うため、
+    同じインスタンスを複数スレッドから同時に使える。除外単語などリクエストごとの
+    設定はAnalysisOptions/RenderOptionsとして各メソッドに渡す。
+    """
+
+    def __init__(self, normalizer=None, tagger_pool=None, stopwords=None, image_cache=None, tokenizer=None):
+        # tokenizerにはバックエンドの名前（'mecab'・'sudachi-c'など）・TokenizerConfig・生成済みのバックエンドを渡す
+        # 複数のジェネレーターで温まったTaggerを共有する場合はtagger_poolを渡す（mecabのみ）
         try:
-            # HomebrewでインストールされたMeCabの設定ファイルパスを指定
-            mecab_path = "/opt/homebrew/etc/mecabrc"
-            if os.path.exists(mecab_path):
-                self.mecab = MeCab.Tagger(f"-r {mecab_path} -Owakati")
-            else:
-                # デフォルトの設定で試行
-                self.mecab = MeCab.Tagger("-Owakati")
+            self.tokenizer = as_tokenizer(tokenizer, tagger_pool)
         except Exception as e:
-            print(f"MeCabの初期化に失敗しました: {e}")
+            print(f"形態素解析器（{getattr(tokenizer, 'name', tokenizer) or DEFAULT_TOKENIZER}）の初期化に失敗しました: {e}")
             sys.exit(1)
 
+        # テキスト正規化ルール（未指定の場合は従来どおりの前処理）
+        self.normalizer = normalizer or TextNormalizer()
+
+        # 形態素解析の時点で取り除くストップワード（ファイルから読み込んだ辞書など）
+        self.stopwords = as_stopword_filter(stopwords)
+
         # 除外単語リストの初期化
         self.exclude_words = []
+        self._exclude_filter = EMPTY_STOPWORDS
+
+        # 計算済みのレイアウト（配色・背景色だけを変えた再描画で再利用する）
+        self.layout_cache = LayoutCache()
+
+        # 描画済みの画像（同じ頻度表・設定・形式ならWordCloudを実行せずに返す）
+        # 既定ではメモリだけに保持する。使わない場合はNoneを代入する
+        self.image_cache = image_cache if image_cache is not None else ImageCache()
 
     def add_exclude_word(self, word):
         """除外単語を追加"""
-        if word not in self.exclude_words:
+        if word not in self._exclude_filter.words:
             self.exclude_words.append(word)
+            self._exclude_filter = as_stopword_filter(self.exclude_words)
 
     def set_exclude_words(self, words):
-        """除外単語リストを設定"""
+        """除外単語リストを設定（prefix:/suffix:/re: 付きのルールも指定できる）"""
         self.exclude_words = list(words)
+        self._exclude_filter = as_stopword_filter(self.exclude_words)
 
     def clear_exclude_words(self):
         """除外単語リストをクリア"""
         self.exclude_words = []
+        self._exclude_filter = EMPTY_STOPWORDS
+
+    def read_text_file(self, file_path, encoding=None):
+        """テキストファイル（.gz・.zipも可）を読み込む
+
+        encodingを省略すると文字コード（UTF-8・Shift_JIS・EUC-JP）を判定する。
+        読み込めない場合はInputError（ファイルがない場合などはOSError）を送出する。
+        """
+        return read_text(file_path, encoding)
+
+    def read_text_chunks(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE, encoding=None):
+        """テキストファイルを行境界で区切ったチャンク単位で順次読み込む
+
+        ファイル全体をメモリに載せずに、おおよそchunk_size文字ごとのチャンクを返す。
+        チャンクは可能な限り段落（空行）・行の境界で区切り、改行を含まない
+        長い行は文末（。）で区切る。.zipのメンバーの境界では必ず区切る。
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_sizeは1以上を指定してください")
+
+        member = None
+        rest = ''
+        for name, block in iter_text_blocks(file_path, encoding, chunk_size):
+            if name != member:
+                if rest:
+                    yield rest
+                member = name
+                rest = ''
+            chunk = rest + block
+            if len(chunk) < chunk_size:
+                rest = chunk
+                continue
+            cut = self._find_chunk_boundary(chunk)
+            yield chunk[:cut]
+            rest = chunk[cut:]
+        if rest:
+            yield rest
+
+    @staticmethod
+    def _find_chunk_boundary(chunk):
+        """チャンクを区切る位置を返す（段落 > 行 > 文末 の優先順）"""
+        for separator in ('\n\n', '\n', '。'):
+            index = chunk.rfind(separator)
+            if index > 0:
+                return index + len(separator)
+        return len(chunk)
+
+    def preprocess_text(self, text):
+        """形態素解析の前に数字・記号を除去し、空白を正規化する"""
+        return self.normalizer.normalize(text)
+
+    def is_target_word(self, part_of_speech, surface):
+        """ワードクラウドに採用する単語かどうかを判定"""
+        # 採用する品詞（既定では名詞、動詞、形容詞）のみを抽出し、1文字の単語とひらがなのみの単語、
+        # ストップワードは除外
+        return (part_of_speech in self.tokenizer.parts_of_speech and
+                self.normalizer.is_valid_token(surface) and
+                surface not in self.stopwords)
+
+    def iter_words(self, text, tracer=None):
+        """前処理済みテキストから採用対象の単語を順に返す
+
+        tracerのレベルがtokenの場合のみ、ノードごとのトレースを記録する経路を使う。
+        """
+        if tracer is not None and tracer.token_enabled:
+            return self._iter_words_traced(text, tracer)
+        return self._iter_words(text)
+
+    def _iter_words(self, text):
+        # 品詞の判定は解析器側で済ませ、採用された形態素だけを受け取る
+        is_valid_token = self.normalizer.is_valid_token
+        stopwords = self.stopwords
+        for word in self.tokenizer.words(text):
+            if is_valid_token(word) and word not in stopwords:
+                yield word
+
+    def _iter_words_traced(self, text, tracer):
+        for surface, part_of_speech, feature, word in self.tokenizer.analyze(text):
+            accepted = self.is_target_word(part_of_speech, word)
+            # 原形で数える場合は、表層形と異なるときだけ原形も記録する
+            lemma = {'lemma': word} if word != surface else {}
+            tracer.write('token', surface=surface, pos=part_of_speech, feature=feature, accepted=accepted, **lemma)
+            if accepted:
+                yield word
+
+    def tokenizer_fingerprint(self):
+        """トークン化の結果を左右する設定（解析器・辞書・品詞・正規化ルール）を文字列で返す"""
+        settings = self.tokenizer.fingerprint()
+        settings.update({
+            'parts_of_speech': sorted(self.tokenizer.parts_of_speech),
+            'lemma': self.tokenizer.config.lemma,
+            'normalizer': self.normalizer.config(),
+            'stopwords': self.stopwords.fingerprint(),
+        })
+        return json.dumps(settings, ensure_ascii=False, sort_keys=True)
+
+    def _count_paragraphs(self, text, cache, namespace, cancel=None):
+        """段落ごとにキャッシュを引き、変更のあった段落だけを解析して集計する"""
+        paragraphs = split_paragraphs(text)
+        keys = [cache.make_key(namespace, paragraph) for paragraph in paragraphs]
+        cached = cache.get_many(keys)
+        analyzed = {}
+        word_counts = Counter()
+        for key, paragraph in zip(keys, paragraphs):
+            counts = cached.get(key)
+            if counts is None:
+                counts = analyzed.get(key)
+            if counts is None:
+                if cancel is not None:
+                    cancel.check()
+                counts = Counter(self.iter_words(self.preprocess_text(paragraph)))
+                analyzed[key] = counts
+            word_counts.update(counts)
+        cache.put_many(analyzed.items())
+        return word_counts
+
+    def count_words(self, chunks, tracer=None, cache=None, cancel=None, approx_capacity=None,
+                    profiler=None):
+        """テキストのチャンク列を順に解析し、単語の出現回数を集計する
+
+        チャンクごとに形態素解析した結果をその場でVocabulary（単語IDごとの出現回数の
+        配列）に加算するため、メモリ使用量はファイルサイズではなくチャンクサイズと語彙数に依存する。
+        cache（TokenCache）を指定すると段落単位で解析結果を再利用する。
+        cancel（CancelToken）を指定すると、チャンク・段落ごとにキャンセルを確認する。
+        approx_capacityを指定すると、最大approx_capacity語だけを保持する近似集計
+        （HeavyHitters）を返す。語彙数によらずメモリ使用量が一定になる。
+        profiler（StageProfiler）を指定すると、読み込み・正規化・形態素解析・集計の
+        段階ごとに時間とメモリを計測する。
+        """
+        tracer = tracer or NULL_TRACER
+        profiler = profiler or NULL_PROFILER
+        namespace = cache.make_namespace(self.tokenizer_fingerprint()) if cache is not None else None
+        word_counts = HeavyHitters(approx_capacity) if approx_capacity else Vocabulary()
+        for index, chunk in enumerate(profiler.iter('read', chunks)):
+            if cancel is not None:
+                cancel.check()
+            if tracer.enabled:
+                before = word_counts.total()
+            if cache is not None and not tracer.token_enabled:
+                with profiler.stage('tokenize'):
+                    chunk_counts = self._count_paragraphs(chunk, cache, namespace, cancel)
+                with profiler.stage('count'):
+                    word_counts.update(chunk_counts)
+            elif profiler.enabled:
+                # 段階ごとに計測するため、チャンク内の単語をいったんリストにする
+                with profiler.stage('normalize'):
+                    text = self.preprocess_text(chunk)
+                with profiler.stage('tokenize'):
+                    words = list(self.iter_words(text, tracer))
+                with profiler.stage('count'):
+                    word_counts.update(Counter(words))
+            else:
+                word_counts.update(Counter(self.iter_words(self.preprocess_text(chunk), tracer)))
+            if tracer.enabled:
+                tracer.write('chunk', index=index, chars=len(chunk),
+                             words=word_counts.total() - before)
+        write_summary(tracer, word_counts)
+        return word_counts
+
+    def extract_words(self, text, debug_output=None, tracer=None):
+        """形態素解析器を使って日本語テキストから単語を抽出
+
+        debug_outputを指定した場合はtokenレベルのトレースをそのファイルへ書き出す。
+        """
+        owns_tracer = tracer is None and bool(debug_output)
+        if owns_tracer:
+            tracer = open_tracer(debug_output, TRACE_TOKEN)
+        tracer = tracer or NULL_TRACER
 
-    def read_text_file(self, file_path):
-        """テキストファイルを読み込む"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            print(f"ファイルが見つかりません: {file_path}")
-            sys.exit(1)
-        except Exception as e:
-            print(f"ファイルの読み込みに失敗しました: {e}")
-            sys.exit(1)
-    
-    def extract_words(self, text, debug_output=None):
-        """MeCabを使って日本語テキストから単語を抽出"""
-        # テキストの前処理
-        original_text = text
-        text = re.sub(r'[0-9０-９]+', '', text)  # 数字を除去
-        text = re.sub(r'[!-/:-@\[-`{-~]', '', text)  # 記号を除去
-        text = re.sub(r'[！-／：-＠［-｀｛-～]', '', text)  # 全角記号を除去
-        text = re.sub(r'\s+', ' ', text)  # 連続する空白を1つに
-        
-        # デバッグ情報を記録
-        debug_info = []
-        debug_info.append("=== テキスト前処理 ===")
-        debug_info.append(f"元のテキスト（最初の200文字）: {original_text[:200]}")
-        debug_info.append(f"前処理後のテキスト（最初の200文字）: {text[:200]}")
-        debug_info.append("\n=== MeCab解析結果 ===")
-        
-        # MeCabで形態素解析
-        node = self.mecab.parseToNode(text)
-        words = []
-        node_count = 0
-        
-        while node:
-            node_count += 1
-            # 品詞情報を取得
-            features = node.feature.split(',') if node.feature != '*' else []
-            part_of_speech = features[0] if features else ''
-            
-            # デバッグ情報を記録（最初の50語のみ）
-            if node_count <= 50:
-                debug_info.append(f"単語: '{node.surface}' | 品詞: {part_of_speech} | 詳細: {node.feature}")
-            
-            # 名詞、動詞、形容詞のみを抽出（ただし代名詞、数詞、接続詞は除外）
-            if (part_of_speech in ['名詞', '動詞', '形容詞'] and 
-                len(node.surface) > 1 and  # 1文字の単語は除外
-                not re.match(r'^[ぁ-ん]+$', node.surface)):  # ひらがなのみの単語も除外
-                
-                words.append(node.surface)
-                debug_info.append(f"→ 採用: '{node.surface}'")
-            
-            node = node.next
-        
-        debug_info.append(f"\n=== 抽出結果 ===")
-        debug_info.append(f"解析した総ノード数: {node_count}")
-        debug_info.append(f"抽出された単語数: {len(words)}")
-        debug_info.append(f"抽出された単語: {words}")
-        
-        # 単語の頻度を詳細表示
-        from collections import Counter
-        word_counter = Counter(words)
-        debug_info.append(f"\n=== 単語頻度（全て） ===")
-        for word, count in word_counter.most_common():
-            debug_info.append(f"'{word}': {count}回")
-        
-        # デバッグ情報をファイルに出力
-        if debug_output:
-            try:
-                with open(debug_output, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(debug_info))
-                print(f"デバッグ情報を出力しました: {debug_output}")
-            except Exception as e:
-                print(f"デバッグ情報の出力に失敗: {e}")
-        
+            # テキストの前処理
+            preprocessed = self.preprocess_text(text)
+            if tracer.enabled:
+                tracer.write('preprocess', original=text[:200], preprocessed=preprocessed[:200])
+
+            # 形態素解析
+            words = list(self.iter_words(preprocessed, tracer))
+            if tracer.enabled:
+                write_summary(tracer, Counter(words))
+        finally:
+            if owns_tracer:
+                tracer.close()
+
+        if owns_tracer and tracer.enabled:
+            print(f"デバッグ情報を出力しました: {debug_output}")
         return words
     
-    def create_word_frequency(self, words, min_freq=2):
-        """単語の頻度を計算"""
-        word_freq = Counter(words)
+    def create_word_frequency(self, words, min_freq=2, exclude_words=None, max_words=None):
+        """単語の頻度を計算
+
+        wordsには単語のリスト、または単語→出現回数の辞書（Counter・Vocabularyなど）を指定できる。
+        exclude_wordsを指定した場合は、インスタンスの除外単語リストの代わりに使う
+        （単語のリスト・集合、またはStopwordFilter）。
+        max_wordsを指定すると、出現回数の多い順に最大max_words件に絞った辞書を返す。
+        """
+        vocabulary = as_vocabulary(words)
+        if exclude_words is None:
+            exclude_words = self._exclude_filter
         # 除外単語と最小出現回数でフィルタリング
-        filtered_freq = {
-            word: freq
-            for word, freq in word_freq.items()
-            if freq >= min_freq and word not in self.exclude_words
-        }
-        return filtered_freq
+        return vocabulary.to_dict(vocabulary.select(min_freq, exclude_words), max_words)
+
+    def analyze_text(self, text, options=None, cache=None):
+        """テキストを解析し、AnalysisOptionsに従ってフィルタした単語頻度を返す
+
+        インスタンスの状態を変更しないため、複数スレッドから同時に呼び出せる。
+        """
+        options = options or AnalysisOptions()
+        word_counts = self.count_words([text], cache=cache)
+        return self.create_word_frequency(word_counts, options.min_freq, options.exclude_words)
     
-    def find_japanese_font(self):
-        """日本語対応フォントを検出"""
-        # macOSで利用可能な日本語フォントのパス（優先順）
-        font_paths = [
-            # ヒラギノフォント（macOS標準）
-            '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
-            '/System/Library/Fonts/Hiragino Sans W3.ttc',
-            '/System/Library/Fonts/ヒラギノ丸ゴ ProN W4.ttc',
-            '/System/Library/Fonts/Hiragino Sans GB.ttc',  # 中国語だが日本語も対応
-            
-            # Arial Unicode（多言語対応）
-            '/System/Library/Fonts/Arial Unicode.ttf',
-            '/Library/Fonts/Arial Unicode.ttf',
-            
-            # NotoフォントシリーズChrome/Linux環境で利用可能
-            '/System/Library/Fonts/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
-            
-            # その他の一般的な日本語フォント
-            '/System/Library/Fonts/PingFang.ttc',
-            '/System/Library/Fonts/ArialHB.ttc',
-        ]
-        
-        for path in font_paths:
-            if os.path.exists(path):
-                print(f"日本語フォントを検出: {path}")
-                return path
+    def find_japanese_font(self, preferred=None):
+        """日本語対応フォントを検出（preferredが存在すればそれを使う）"""
+        font_path = get_font_registry().find_japanese_font(preferred)
+        if preferred and font_path != preferred:
+            print(f"警告: 指定されたフォントが見つかりません: {preferred}")
+        if font_path:
+            print(f"日本語フォントを検出: {font_path}")
+            return font_path
         
         print("警告: 日本語フォントが見つかりませんでした。英数字のみ表示される可能性があります。")
         return None
 
-    def generate_wordcloud(self, word_freq, output_path, width=800, height=600):
-        """ワードクラウドを生成して保存"""
+    def render_wordcloud(self, word_freq, options=None, font_path=None, cancel=None):
+        """単語の頻度からWordCloudを作る（フォントは未指定なら検出する）
+
+        同じ頻度表・画像サイズ・フォントで配色や背景色だけを変えた場合は、
+        計算済みのレイアウトに色付けし直すだけなので高速に返る。
+        cancel（CancelToken）を指定すると、レイアウト中にキャンセルを確認する。
+        """
+        options = options or RenderOptions()
+        if font_path is None:
+            font_path = self.find_japanese_font(options.font_path)
+        return create_wordcloud(word_freq, font_path, options, self.layout_cache, cancel)
+
+    def render_image(self, word_freq, options=None, font_path=None, cancel=None):
+        """ワードクラウドをPIL.Imageとして返す（ファイルには書き出さない）"""
+        return self.render_wordcloud(word_freq, options, font_path, cancel).to_image()
+
+    def render_array(self, word_freq, options=None, font_path=None, cancel=None):
+        """ワードクラウドをNumPy配列（高さ×幅×3）として返す"""
+        return np.asarray(self.render_image(word_freq, options, font_path, cancel))
+
+    def render_bytes(self, word_freq, image_format='PNG', options=None, output_options=None,
+                     font_path=None):
+        """ワードクラウドを指定された形式（PNG/WEBP/JPEG）でエンコードしたバイト列として返す"""
+        return self.render_encoded(word_freq, image_format, options, output_options, font_path)[0]
+
+    def render_encoded(self, word_freq, image_format='PNG', options=None, output_options=None,
+                       font_path=None, profiler=None):
+        """エンコードした画像と、それが描画済みの画像キャッシュから得られたかを返す
+
+        同じ頻度表・描画の設定・フォント・出力形式の画像がimage_cacheにあれば、
+        WordCloudのレイアウトもエンコードも行わずにそのバイト列を返す。
+        """
+        profiler = profiler or NULL_PROFILER
+        options = options or RenderOptions()
+        if font_path is None:
+            font_path = self.find_japanese_font(options.font_path)
+        key = None
+        if self.image_cache is not None:
+            key = image_cache_key(word_freq, font_path, options, image_format, output_options)
+            data = self.image_cache.get(key)
+            if data is not None:
+                return data, True
+        with profiler.stage('layout'):
+            wordcloud = self.render_wordcloud(word_freq, options, font_path)
+        with profiler.stage('encode'):
+            data = encode_image(wordcloud.to_image(), image_format, output_options)
+        if key is not None:
+            self.image_cache.put(key, data)
+        return data, False
+
+    def render_preview(self, word_freq, max_size, options=None, font_path=None, cancel=None):
+        """max_size（幅, 高さ）に収まる大きさで直接描画したPIL.Imageを返す
+
+        レイアウトはoptionsのwidth×heightで計算する（保存時と同じ配置になり、
+        計算済みのレイアウトは保存時にも再利用される）。
+        """
+        options = fit_to_size(options or RenderOptions(), *max_size)
+        return self.render_image(word_freq, options, font_path, cancel)
+
+    def generate_wordcloud(self, word_freq, output_path, width=800, height=600, options=None,
+                           output_options=None, profiler=None):
+        """ワードクラウドを生成して保存
+
+        optionsにRenderOptionsを指定した場合はwidth/heightより優先する。
+        画像はwidth×height（options.scale倍）で直接書き出し、形式は拡張子または
+        output_options（OutputOptions）で指定する。
+        同じ頻度表・設定で描画済みの画像がimage_cacheにあれば、そのまま書き出す。
+        profiler（StageProfiler）を指定すると、レイアウト・エンコード・書き出しの時間を計測する。
+        """
+        profiler = profiler or NULL_PROFILER
         if not word_freq:
             print("有効な単語が見つかりませんでした。")
             return False
         
-        # 日本語フォントを検出
-        font_path = self.find_japanese_font()
+        options = options or RenderOptions(width=width, height=height)
         
         try:
-            # WordCloudのパラメータ設定
-            wordcloud_params = {
-                'width': width,
-                'height': height,
-                'background_color': 'white',
-                'max_words': 100,
-                'colormap': 'viridis',
-                'relative_scaling': 0.5,
-                'min_font_size': 10,
-                'prefer_horizontal': 0.9,  # 横書きを優先
-                'max_font_size': 100,
-                'random_state': 42  # 再現性のため
-            }
-            
-            # フォントパスが見つかった場合のみ設定
-            if font_path:
-                wordcloud_params['font_path'] = font_path
-            
-            wordcloud = WordCloud(**wordcloud_params).generate_from_frequencies(word_freq)
-            
-            # 画像として保存
-            plt.figure(figsize=(width/100, height/100))
-            plt.imshow(wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            plt.tight_layout(pad=0)
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
+            # 画像として保存（matplotlibを経由せずに直接書き出す）
+            data, cached = self.render_encoded(word_freq, image_format_for(output_path, output_options),
+                                               options, output_options, profiler=profiler)
+            with profiler.stage('write'):
+                with open(output_path, 'wb') as f:
+                    f.write(data)
             
+            if cached:
+                print("描画済みの画像を再利用しました")
             print(f"ワードクラウドを保存しました: {output_path}")
             return True
             
@@ -204,55 +393,344 @@ class JapaneseWordCloudGenerator:
             print(f"ワードクラウドの生成に失敗しました: {e}")
             return False
     
-    def process_text_file(self, input_file, output_file=None, min_freq=1):
-        """テキストファイルを処理してワードクラウドを生成"""
+    def _analyze_file(self, input_file, stream, chunk_size, workers, tracer, cache,
+                      approx_capacity=None, profiler=NULL_PROFILER, encoding=None):
+        """process_text_file用: 指定された方式でファイルを解析して単語を集計する"""
+        workers = resolve_worker_count(workers)
+        if workers > 1:
+            # 文の境界で区切ったシャードを複数プロセスで解析する
+            # （ワーカー内の段階は分けられないため、読み込みから集計までをまとめて計測する）
+            shard_size = choose_shard_size(os.path.getsize(input_file), workers, chunk_size)
+            print(f"{workers}プロセスで並列解析します: {input_file}")
+            with profiler.stage('tokenize'):
+                words = count_words_parallel(self.read_text_chunks(input_file, shard_size, encoding), workers,
+                                             normalizer=self.normalizer, stopwords=self.stopwords,
+                                             approx_capacity=approx_capacity, tokenizer=self.tokenizer.config)
+            write_summary(tracer, words, workers=workers)
+            print(f"抽出された単語数: {words.total()}")
+        elif stream:
+            # チャンク単位で読み込み・解析・集計を行う
+            print(f"テキストファイルをストリーミング処理します: {input_file}")
+            words = self.count_words(self.read_text_chunks(input_file, chunk_size, encoding), tracer, cache,
+                                     approx_capacity=approx_capacity, profiler=profiler)
+            print(f"抽出された単語数: {words.total()}")
+        else:
+            # テキストファイルを読み込み
+            with profiler.stage('read'):
+                text = self.read_text_file(input_file, encoding)
+            print(f"テキストファイルを読み込みました: {input_file}")
+
+            if cache is not None or approx_capacity or profiler.enabled:
+                words = self.count_words([text], tracer, cache, approx_capacity=approx_capacity,
+                                         profiler=profiler)
+                print(f"抽出された単語数: {words.total()}")
+            else:
+                words = self.extract_words(text, tracer=tracer)
+                print(f"抽出された単語数: {len(words)}")
+        if isinstance(words, HeavyHitters):
+            stats = words.stats()
+            print(f"近似集計: 保持 {stats['words']} / {stats['capacity']} 語、"
+                  f"出現回数の誤差の上限 {stats['error_bound']}")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"トークンキャッシュ: ヒット {stats['hits']} / ミス {stats['misses']}")
+        return words
+
+    def process_text_file(self, input_file, output_file=None, min_freq=1,
+                          stream=False, chunk_size=DEFAULT_CHUNK_SIZE, workers=1,
+                          trace_level=TRACE_OFF, trace_output=None, cache=None,
+                          render_options=None, output_options=None, approx_capacity=None,
+                          profiler=None, encoding=None):
+        """テキストファイルを処理してワードクラウドを生成
+
+        stream=Trueの場合はファイルをチャンク単位で読み込みながら集計し、
+        ファイル全体や単語リストをメモリに保持しない。
+        workersに2以上（0はCPUコア数）を指定すると複数プロセスで形態素解析を行う。
+        trace_levelに'summary'/'token'を指定するとJSONL形式のトレースを書き出す
+        （出力先の既定値は `{入力ファイル名}_trace.jsonl`）。
+        cache（TokenCache）を指定すると、変更のない段落の解析結果を再利用する
+        （並列解析時は使用しない）。
+        render_options（RenderOptions）で画像サイズやフォントを、output_options
+        （OutputOptions）で画像形式やエンコーダーの設定を指定できる。
+        approx_capacityを指定すると、最大approx_capacity語だけを保持する近似集計で
+        数える（出現回数は過小評価になりうるが、メモリ使用量は語彙数によらず一定）。
+        profiler（StageProfiler）を指定すると、読み込みから画像の書き出しまでの段階ごとに
+        時間とメモリを計測する。
+        入力は.gz・.zipのまま読み込め、encodingを省略すると文字コードを判定する。
+        入力を読み込めない場合はInputError（ファイルがない場合などはOSError）を送出する。
+        """
+        profiler = profiler or NULL_PROFILER
         # 出力ファイル名を自動生成
         if output_file is None:
-            base_name = os.path.splitext(os.path.basename(input_file))[0]
-            output_file = f"{base_name}_wordcloud.png"
-        
-        # テキストファイルを読み込み
-        text = self.read_text_file(input_file)
-        print(f"テキストファイルを読み込みました: {input_file}")
-        
-        # 単語を抽出（デバッグ出力付き）
-        debug_file = f"{os.path.splitext(input_file)[0]}_debug.txt"
-        words = self.extract_words(text, debug_output=debug_file)
-        print(f"抽出された単語数: {len(words)}")
+            base_name = input_stem(input_file)
+            output_format = output_options.format if output_options else None
+            extension = f".{output_format.lower()}" if output_format else ".png"
+            output_file = f"{base_name}_wordcloud{extension}"
+
+        trace_level = parse_trace_level(trace_level)
+        if trace_level > TRACE_OFF and trace_output is None:
+            trace_output = f"{os.path.splitext(input_file)[0]}_trace.jsonl"
+
+        with open_tracer(trace_output, trace_level) as tracer:
+            words = self._analyze_file(input_file, stream, chunk_size, workers, tracer, cache,
+                                       approx_capacity, profiler, encoding)
+        if tracer.enabled:
+            print(f"デバッグ情報を出力しました: {trace_output}")
         
-        # 単語の頻度を計算
-        word_freq = self.create_word_frequency(words, min_freq)
-        print(f"有効な単語数: {len(word_freq)}")
+        # 単語の頻度を計算（描画するのは上位max_words件だけなので、辞書にするのもその分だけ）
+        with profiler.stage('filter'):
+            vocabulary = as_vocabulary(words)
+            selected = vocabulary.select(min_freq, self._exclude_filter)
+            max_words = (render_options or RenderOptions()).max_words
+            word_freq = vocabulary.to_dict(selected, max_words)
+        print(f"有効な単語数: {len(selected)}")
         
         if word_freq:
-            # Counterオブジェクトを作成して上位単語を表示
-            word_counter = Counter(word_freq)
-            print(f"上位10単語: {dict(word_counter.most_common(10))}")
+            # 出現回数の多い順に並んでいるので、先頭の10単語を表示
+            print(f"上位10単語: {dict(list(word_freq.items())[:10])}")
         
         # ワードクラウドを生成
-        success = self.generate_wordcloud(word_freq, output_file)
+        success = self.generate_wordcloud(word_freq, output_file, options=render_options,
+                                          output_options=output_options, profiler=profiler)
         
         return success
 
 def main():
     parser = argparse.ArgumentParser(description='日本語テキストからワードクラウドを生成')
-    parser.add_argument('input_file', help='入力テキストファイルのパス')
+    parser.add_argument('input_file', nargs='?', help='入力テキストファイルのパス')
     parser.add_argument('-o', '--output', help='出力画像ファイルのパス')
+    parser.add_argument('--batch', nargs='+', action='extend', default=[], metavar='SOURCE',
+                        help='一括処理する入力（ディレクトリ・globパターン・ファイル、複数指定可）')
+    parser.add_argument('--input-list', action='append', default=[], metavar='FILE',
+                        help='一括処理する入力ファイルの一覧（1行1パス、複数指定可）')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help=f'一括処理時の出力先ディレクトリ（デフォルト: {DEFAULT_OUTPUT_DIR}）')
+    parser.add_argument('--manifest',
+                        help='一括処理のマニフェスト（JSON）の出力先（デフォルト: {出力先}/manifest.json）')
+    parser.add_argument('--force', action='store_true',
+                        help='一括処理時に、出力が最新のファイルも生成し直す')
     parser.add_argument('--min-freq', type=int, default=1, help='最小出現回数（デフォルト: 1）')
     parser.add_argument('--width', type=int, default=800, help='画像の幅（デフォルト: 800）')
     parser.add_argument('--height', type=int, default=600, help='画像の高さ（デフォルト: 600）')
+    parser.add_argument('--font', metavar='FILE',
+                        help='使用するフォントファイル（デフォルト: 日本語フォントを自動検出）')
+    parser.add_argument('--scale', type=float, default=1,
+                        help='出力画像の倍率（デフォルト: 1、画像サイズは幅×高さ×倍率）')
+    parser.add_argument('--format', choices=['png', 'webp', 'jpeg'],
+                        help='出力画像の形式（デフォルト: 出力ファイルの拡張子から判定、不明な場合はpng）')
+    parser.add_argument('--png-compress-level', type=int, default=6, choices=range(10), metavar='0-9',
+                        help='PNGの圧縮レベル（0-9、デフォルト: 6）')
+    parser.add_argument('--jpeg-quality', type=int, default=90, help='JPEGの品質（1-95、デフォルト: 90）')
+    parser.add_argument('--webp-quality', type=int, default=90, help='WebPの品質（0-100、デフォルト: 90）')
+    parser.add_argument('--webp-lossless', action='store_true', help='WebPを可逆圧縮で書き出す')
+    parser.add_argument('--encoding', default='auto',
+                        help='入力の文字コード（auto / utf-8 / utf-8-sig / cp932 / shift_jis / euc-jp、デフォルト: auto）')
+    parser.add_argument('--stream', action='store_true',
+                        help='ファイルをチャンク単位で読み込み、メモリ使用量を抑えて処理する')
+    parser.add_argument('--chunk-size', type=int,
+                        help=f'--stream時のチャンクサイズ、--workersが2以上の場合はシャードサイズの上限'
+                             f'（文字数、デフォルト: {DEFAULT_CHUNK_SIZE}）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='形態素解析（一括処理時はファイルの並行処理）に使うプロセス数（0でCPUコア数、デフォルト: 1）')
+    parser.add_argument('--approximate', action='store_true',
+                        help='頻出単語だけを数える近似集計を使い、メモリ使用量を一定に抑える')
+    parser.add_argument('--approx-capacity', type=int, default=DEFAULT_APPROX_CAPACITY,
+                        help=f'近似集計で保持する単語数（デフォルト: {DEFAULT_APPROX_CAPACITY}、'
+                             '出現回数の誤差は全単語数÷(この値+1)以下）')
+    parser.add_argument('--stopwords', action='append', default=[], metavar='FILE',
+                        help='ストップワードファイル（テキスト/CSV、複数指定可）')
+    parser.add_argument('--exclude', default='',
+                        help='除外単語（カンマ区切り、prefix:/suffix:/re: 付きのルールも可）')
+    parser.add_argument('--tokenizer', choices=list(TOKENIZER_NAMES), default=DEFAULT_TOKENIZER,
+                        help='形態素解析器（mecab / sudachi-a / sudachi-b / sudachi-c、'
+                             f'sudachiの末尾は分割単位、デフォルト: {DEFAULT_TOKENIZER}）')
+    parser.add_argument('--pos', default=",".join(DEFAULT_PARTS_OF_SPEECH),
+                        help=f'採用する品詞の大分類（カンマ区切り、デフォルト: {",".join(DEFAULT_PARTS_OF_SPEECH)}）')
+    parser.add_argument('--lemma', action='store_true',
+                        help='活用する語を原形（見た→見る）にまとめて数える')
+    parser.add_argument('--user-dict', action='append', default=[], metavar='FILE',
+                        help='ユーザー辞書（CSVまたはコンパイル済みの.dic、複数指定可。CSVはコンパイルしてキャッシュする）')
+    parser.add_argument('--system-dict', metavar='PATH',
+                        help='システム辞書（mecab: 辞書ディレクトリ、sudachi: system.dicのパスまたはsmall/core/full）')
+    parser.add_argument('--nfkc', action='store_true',
+                        help='NFKC正規化で全角・半角の表記ゆれを統一してから解析する')
+    parser.add_argument('--trace-level', choices=list(TRACE_LEVELS), default='off',
+                        help='デバッグトレースのレベル（off / summary / token、デフォルト: off）')
+    parser.add_argument('--trace-output',
+                        help='トレースの出力先（JSONL、デフォルト: {入力ファイル名}_trace.jsonl）')
+    parser.add_argument('--cache', action='store_true',
+                        help='段落単位のトークン化キャッシュを使う（解析結果をディスクに保存し、再実行時に再利用する）')
+    parser.add_argument('--cache-dir',
+                        help=f'トークン化キャッシュの保存先（指定すると--cacheも有効、デフォルト: {default_cache_dir()}）')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help=f'トークン化キャッシュの容量上限（MB、デフォルト: {DEFAULT_MAX_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='トークン化キャッシュを削除する（入力ファイル未指定時は削除のみ行う）')
+    parser.add_argument('--image-cache', action='store_true',
+                        help='描画済みの画像をディスクに保存し、同じ頻度表・設定での再生成に再利用する')
+    parser.add_argument('--image-cache-dir',
+                        help=f'描画済み画像の保存先（指定すると--image-cacheも有効、デフォルト: {default_cache_dir()}/images）')
+    parser.add_argument('--image-cache-size-mb', type=int, default=DEFAULT_DISK_BYTES // (1024 * 1024),
+                        help=f'描画済み画像の容量上限（MB、デフォルト: {DEFAULT_DISK_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='全体の経過時間と、段階ごとの呼び出し回数・経過時間・CPU時間・最大割り当て量を'
+                             'JSONで保存するパス（--profile-stage指定時は関数ごとの上位の計測結果も含む）')
+    parser.add_argument('--profile-stage', choices=list(STAGE_LABELS),
+                        help='cProfileで関数ごとに計測する段階（pstats形式の結果は--profileのパスの拡張子を.profにして保存）')
     
     args = parser.parse_args()
+    # WordCloudのレイアウトで読み込み済みのFreeTypeフォントを再利用する
+    install_font_cache()
+    if args.approximate and args.approx_capacity < 1:
+        parser.error("--approx-capacityには1以上を指定してください")
+    try:
+        normalize_encoding(args.encoding)
+    except InputError as e:
+        parser.error(str(e))
+    try:
+        parts_of_speech = parse_parts_of_speech(args.pos)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.profile_stage and not args.profile:
+        parser.error("--profile-stageは--profileと一緒に指定してください")
+
+    # 入力テキストの解析結果をディスクに残すため、トークン化キャッシュは指定したときだけ使う
+    use_cache = bool(args.cache or args.cache_dir)
+    if not (args.batch or args.input_list) and resolve_worker_count(args.workers) > 1:
+        # 並列解析はワーカー内で集計するため、段落単位のキャッシュと単語ごとのトレースは使えない
+        unsupported = [option for option, used in (
+            ('--cache', use_cache),
+            ('--trace-level token', parse_trace_level(args.trace_level) >= TRACE_TOKEN),
+        ) if used]
+        if unsupported:
+            parser.error(f"{'・'.join(unsupported)}は--workersが2以上の並列解析では使えません")
+    cache = None
+    if use_cache or args.clear_cache:
+        cache_path = os.path.join(args.cache_dir, "tokens.sqlite3") if args.cache_dir else None
+        try:
+            cache = TokenCache(cache_path, max_bytes=args.cache_size_mb * 1024 * 1024)
+        except (OSError, sqlite3.Error) as e:
+            print(f"トークン化キャッシュを開けませんでした（キャッシュなしで続行）: {e}")
+    if args.clear_cache and cache is not None:
+        cache.clear()
+        print(f"トークン化キャッシュを削除しました: {cache.path}")
+    if not use_cache and cache is not None:
+        cache.close()
+        cache = None
+    batch_mode = bool(args.batch or args.input_list)
+    if args.input_file is None and not batch_mode:
+        if args.clear_cache:
+            return
+        parser.error("入力テキストファイルのパスを指定してください")
     
     # WordCloudGeneratorのインスタンスを作成
-    generator = JapaneseWordCloudGenerator()
+    try:
+        stopwords = StopwordFilter.from_files(args.stopwords)
+    except (OSError, re.error) as e:
+        print(f"ストップワードファイルの読み込みに失敗しました: {e}")
+        sys.exit(1)
+    image_cache = None
+    if args.image_cache or args.image_cache_dir:
+        image_cache = ImageCache(directory=args.image_cache_dir or os.path.join(default_cache_dir(), "images"),
+                                 max_disk_bytes=args.image_cache_size_mb * 1024 * 1024)
+    generator = JapaneseWordCloudGenerator(normalizer=TextNormalizer(nfkc=args.nfkc), stopwords=stopwords,
+                                           image_cache=image_cache,
+                                           tokenizer=TokenizerConfig(args.tokenizer, args.user_dict, args.system_dict,
+                                                                     parts_of_speech, args.lemma))
+    exclude_words = [word.strip() for word in args.exclude.split(',') if word.strip()]
+    try:
+        generator.set_exclude_words(exclude_words)
+    except re.error as e:
+        print(f"除外単語の正規表現が正しくありません: {e}")
+        sys.exit(1)
+    render_options = RenderOptions(width=args.width, height=args.height,
+                                   font_path=args.font, scale=args.scale)
+    output_options = OutputOptions(
+        format=args.format,
+        png_compress_level=args.png_compress_level,
+        jpeg_quality=args.jpeg_quality,
+        webp_quality=args.webp_quality,
+        webp_lossless=args.webp_lossless,
+    )
+
+    if batch_mode:
+        # 1ファイルずつの処理にだけ効くオプションは、黙って無視せずにエラーにする
+        unsupported = [option for option, used in (
+            ('--profile', args.profile),
+            ('--stream', args.stream),
+            ('--chunk-size', args.chunk_size is not None),
+            ('--approximate', args.approximate),
+            ('--trace-level', parse_trace_level(args.trace_level) != TRACE_OFF),
+            ('--trace-output', args.trace_output),
+        ) if used]
+        if unsupported:
+            parser.error(f"{'・'.join(unsupported)}は一括処理（--batch・--input-list）では使えません")
+
+    if batch_mode:
+        # 一括処理: ジェネレーターとフォントを全ファイルで使い回す
+        try:
+            inputs = collect_inputs(args.batch + ([args.input_file] if args.input_file else []),
+                                    args.input_list)
+        except OSError as e:
+            print(f"入力ファイルの一覧を読み込めませんでした: {e}")
+            sys.exit(1)
+        if not inputs:
+            print("入力ファイルが見つかりませんでした。")
+            sys.exit(1)
+        try:
+            manifest = run_batch(
+                generator, inputs, args.output_dir,
+                AnalysisOptions(min_freq=args.min_freq, exclude_words=exclude_words),
+                render_options, output_options,
+                workers=args.workers, manifest_path=args.manifest, force=args.force, cache=cache,
+                encoding=args.encoding
+            )
+        except ValueError as e:
+            print(f"一括処理を開始できませんでした: {e}")
+            sys.exit(1)
+        summary = manifest['summary']
+        print(f"生成 {summary['generated']} / スキップ {summary['skipped']} / "
+              f"単語なし {summary['empty']} / 失敗 {summary['failed']}")
+        if summary['failed']:
+            sys.exit(1)
+        return
     
+    profiler = StageProfiler(profile_stage=args.profile_stage) if args.profile else None
+
     # ワードクラウドを生成
-    success = generator.process_text_file(
-        args.input_file, 
-        args.output, 
-        args.min_freq
-    )
+    try:
+        success = generator.process_text_file(
+            args.input_file, 
+            args.output, 
+            args.min_freq,
+            stream=args.stream,
+            chunk_size=DEFAULT_CHUNK_SIZE if args.chunk_size is None else args.chunk_size,
+            workers=args.workers,
+            trace_level=args.trace_level,
+            trace_output=args.trace_output,
+            cache=cache,
+            render_options=render_options,
+            output_options=output_options,
+            approx_capacity=args.approx_capacity if args.approximate else None,
+            profiler=profiler,
+            encoding=args.encoding
+        )
+    except FileNotFoundError:
+        print(f"ファイルが見つかりません: {args.input_file}")
+        sys.exit(1)
+    except (OSError, InputError) as e:
+        print(f"ファイルの読み込みに失敗しました: {e}")
+        sys.exit(1)
+
+    if profiler is not None:
+        profiler.close()
+        profiler.write_json(args.profile)
+        print(f"計測結果: {profiler.summary_line()}")
+        print(f"計測結果を保存しました: {args.profile}")
+        if args.profile_stage:
+            profile_path = os.path.splitext(args.profile)[0] + ".prof"
+            profiler.dump_profile(profile_path)
+            print(f"cProfileの結果を保存しました: {profile_path}")
     
     if success:
         print("ワードクラウドの生成が完了しました。")
@@ -3,15 +3,39 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import threading
 import os
+import re
 import sys
 import tempfile
-from PIL import Image, ImageTk
-import matplotlib.pyplot as plt
-from src.wordcloud_generator import JapaneseWordCloudGenerator
+import threading
+from src.jobs import CancelToken, JobCancelled, JobScheduler
+from src.log_queue import LOG_DEBUG, LOG_ERROR, LOG_INFO, LOG_LEVELS, LOG_WARNING, LogQueue
+from src.options import AnalysisOptions, RenderOptions
+from src.profiling import NULL_PROFILER, StageProfiler
+from src.startup_preview import StartupPreviewCache, startup_preview_key
+from src.tracing import TRACE_LEVELS, open_tracer
+from src.token_cache import TokenCache
+from src.tokenizers import DEFAULT_TOKENIZER, TOKENIZER_NAMES, TokenizerConfig, installed_fingerprint
 from collections import Counter
 
+# MeCab・wordcloud・matplotlib・PILなどの重いモジュールは、ウィンドウの表示を
+# 遅らせないよう、使用するメソッドの中で（主にワーカースレッドで）読み込む
+
+# パラメータ変更から自動プレビューを開始するまでの待ち時間（秒）
+AUTO_PREVIEW_DELAY = 0.5
+
+# ログを表示する間隔（ミリ秒）と、ログ欄に残す行数
+LOG_PUMP_INTERVAL_MS = 100
+LOG_MAX_LINES = 5000
+
+
+def dictionary_stamp(path):
+    """ユーザー辞書のファイルを区別する値（編集されたら解析器を作り直すため、未指定・存在しなければNone）"""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
 class WordCloudGUI:
     def __init__(self, root):
         self.root = root
@@ -23,6 +47,7 @@ class WordCloudGUI:
         # 出力ファイルパスを設定（書き込み権限を考慮）
         self.output_file_path = tk.StringVar(value=self.get_writable_output_path())
         self.dict_file_path = tk.StringVar()
+        self.font_file_path = tk.StringVar()
         
         # パラメータ変数
         self.width = tk.IntVar(value=800)
@@ -32,13 +57,42 @@ class WordCloudGUI:
         self.background_color = tk.StringVar(value="white")
         self.colormap = tk.StringVar(value="viridis")
         self.exclude_words = tk.StringVar(value="")
+        self.trace_level = tk.StringVar(value="off")
+        self.tokenizer_name = tk.StringVar(value=DEFAULT_TOKENIZER)
+        self.log_level = tk.StringVar(value="info")
+        self.log_level.trace_add('write', self.on_log_level_changed)
+        
+        # ログはキューを経由してメインスレッドでまとめて表示する
+        self.log_queue = LogQueue(level=LOG_INFO)
         
-        # ワードクラウドジェネレーター
+        # ワードクラウドジェネレーター（形態素解析器は名前とユーザー辞書ごとに保持し、クリックごとに再生成しない）
+        # 初回の生成またはウォームアップのジョブで作成する
         self.generator = None
+        self.tokenizers = {}
+        self.tokenizer_key = None
+        self.generator_lock = threading.Lock()
+        # 起動時プレビュー画像のディスクキャッシュ
+        self.startup_preview = StartupPreviewCache()
+        # 段落単位のトークン化キャッシュ（初回使用時に開く）
+        self.token_cache = None
+        # 直前の解析結果（解析条件が同じなら配色などの変更時に再利用する）
+        self.last_analysis = None
+        
+        # 生成ジョブは1つのワーカーで実行し、新しいジョブが来たら古いジョブを中断する
+        self.scheduler = JobScheduler(debounce=AUTO_PREVIEW_DELAY)
+        self.latest_job = None
         
         # GUI構築
         self.create_widgets()
         
+        # ログの表示を開始
+        self.pump_log()
+        
+        # パラメータの変更でプレビューを自動更新
+        for variable in (self.width, self.height, self.min_freq, self.max_words,
+                         self.background_color, self.colormap, self.exclude_words, self.tokenizer_name):
+            variable.trace_add('write', self.on_parameter_changed)
+        
         # 実行ディレクトリをログに出力
         current_dir = os.getcwd()
         self.log_message(f"実行ディレクトリ: {current_dir}")
@@ -91,11 +145,16 @@ class WordCloudGUI:
         ttk.Entry(file_frame, textvariable=self.output_file_path, width=50).grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=2)
         ttk.Button(file_frame, text="参照", command=self.browse_output_file).grid(row=1, column=2, pady=2)
         
-        # 辞書ファイル（オプション）
-        ttk.Label(file_frame, text="MeCab辞書ファイル (オプション):").grid(row=2, column=0, sticky=tk.W, pady=2)
+        # ユーザー辞書（オプション、CSVは初回にコンパイルしてキャッシュする）
+        ttk.Label(file_frame, text="ユーザー辞書 (オプション):").grid(row=2, column=0, sticky=tk.W, pady=2)
         ttk.Entry(file_frame, textvariable=self.dict_file_path, width=50).grid(row=2, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=2)
         ttk.Button(file_frame, text="参照", command=self.browse_dict_file).grid(row=2, column=2, pady=2)
         
+        # フォントファイル（オプション、未指定時は日本語フォントを自動検出）
+        ttk.Label(file_frame, text="フォントファイル (オプション):").grid(row=3, column=0, sticky=tk.W, pady=2)
+        ttk.Entry(file_frame, textvariable=self.font_file_path, width=50).grid(row=3, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=2)
+        ttk.Button(file_frame, text="参照", command=self.browse_font_file).grid(row=3, column=2, pady=2)
+        
         file_frame.columnconfigure(1, weight=1)
         
     def create_parameter_section(self, parent):
@@ -143,8 +202,23 @@ class WordCloudGUI:
         exclude_entry.grid(row=2, column=1, sticky=tk.W, padx=(5, 0), pady=2)
 
         # 除外単語のヒントラベル
-        hint_label = ttk.Label(right_frame, text="(カンマ区切り)", font=('', 9), foreground='gray')
+        hint_label = ttk.Label(right_frame, text="(カンマ区切り、prefix:/suffix:/re: も可)", font=('', 9), foreground='gray')
         hint_label.grid(row=3, column=1, sticky=tk.W, padx=(5, 0), pady=0)
+
+        ttk.Label(right_frame, text="形態素解析器:").grid(row=4, column=0, sticky=tk.W, pady=2)
+        tokenizer_combo = ttk.Combobox(right_frame, textvariable=self.tokenizer_name, width=15, state='readonly')
+        tokenizer_combo['values'] = TOKENIZER_NAMES
+        tokenizer_combo.grid(row=4, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+
+        ttk.Label(right_frame, text="デバッグトレース:").grid(row=5, column=0, sticky=tk.W, pady=2)
+        trace_combo = ttk.Combobox(right_frame, textvariable=self.trace_level, width=15, state='readonly')
+        trace_combo['values'] = tuple(TRACE_LEVELS)
+        trace_combo.grid(row=5, column=1, sticky=tk.W, padx=(5, 0), pady=2)
+        
+        ttk.Label(right_frame, text="ログレベル:").grid(row=6, column=0, sticky=tk.W, pady=2)
+        log_combo = ttk.Combobox(right_frame, textvariable=self.log_level, width=15, state='readonly')
+        log_combo['values'] = tuple(LOG_LEVELS)
+        log_combo.grid(row=6, column=1, sticky=tk.W, padx=(5, 0), pady=2)
         
     def create_control_section(self, parent):
         # 制御フレーム
@@ -159,11 +233,15 @@ class WordCloudGUI:
         self.preview_btn = ttk.Button(control_frame, text="プレビュー", command=self.preview_wordcloud)
         self.preview_btn.grid(row=0, column=1, padx=(0, 10))
         
+        # キャンセルボタン
+        self.cancel_btn = ttk.Button(control_frame, text="キャンセル", command=self.cancel_generation)
+        self.cancel_btn.grid(row=0, column=2, padx=(0, 10))
+        
         # プログレスバー
         self.progress = ttk.Progressbar(control_frame, mode='indeterminate')
-        self.progress.grid(row=0, column=2, sticky=(tk.W, tk.E), padx=(10, 0))
+        self.progress.grid(row=0, column=3, sticky=(tk.W, tk.E), padx=(10, 0))
         
-        control_frame.columnconfigure(2, weight=1)
+        control_frame.columnconfigure(3, weight=1)
         
     def create_preview_section(self, parent):
         # プレビューとログのノートブック
@@ -287,7 +365,7 @@ class WordCloudGUI:
     def browse_input_file(self):
         filename = filedialog.askopenfilename(
             title="入力テキストファイルを選択",
-            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt *.txt.gz *.zip"), ("All files", "*.*")]
         )
         if filename:
             self.input_file_path.set(filename)
@@ -306,66 +384,191 @@ class WordCloudGUI:
             
     def browse_dict_file(self):
         filename = filedialog.askopenfilename(
-            title="MeCab辞書ファイルを選択",
-            filetypes=[("Dictionary files", "*.dic"), ("All files", "*.*")]
+            title="ユーザー辞書を選択",
+            filetypes=[("Dictionary files", "*.csv *.dic"), ("All files", "*.*")]
         )
         if filename:
             self.dict_file_path.set(filename)
             
-    def log_message(self, message):
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update()
-        
-    def init_generator(self):
-        try:
-            dict_path = self.dict_file_path.get().strip()
-            if dict_path and os.path.exists(dict_path):
-                self.log_message(f"カスタム辞書を使用: {dict_path}")
-                # カスタム辞書を使用する場合の実装は後で追加
-                self.generator = JapaneseWordCloudGenerator()
-            else:
-                self.generator = JapaneseWordCloudGenerator()
-            return True
-        except Exception as e:
-            self.log_message(f"MeCabの初期化に失敗: {e}")
-            messagebox.showerror("エラー", f"MeCabの初期化に失敗しました:\n{e}")
-            return False
+    def browse_font_file(self):
+        filename = filedialog.askopenfilename(
+            title="フォントファイルを選択",
+            filetypes=[("Font files", "*.ttf *.ttc *.otf"), ("All files", "*.*")]
+        )
+        if filename:
+            self.font_file_path.set(filename)
             
-    def generate_wordcloud_thread(self, preview_mode=False):
-        try:
-            self.progress.start()
+    def log_message(self, message, level=LOG_INFO):
+        """ログを表示待ちのキューに積む（どのスレッドからでも呼べる）"""
+        if level == LOG_INFO and message.startswith("警告"):
+            level = LOG_WARNING
+        self.log_queue.log(message, level)
 
-            if not self.init_generator():
-                return
+    def pump_log(self):
+        """メインスレッド: キューに溜まったログをまとめて表示し、古い行を削る"""
+        lines, dropped = self.log_queue.drain()
+        if dropped:
+            lines.insert(0, f"（ログが多すぎるため{dropped}行を省略しました）")
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete('1.0', f'{line_count - LOG_MAX_LINES + 1}.0')
+            self.log_text.see(tk.END)
+        self.root.after(LOG_PUMP_INTERVAL_MS, self.pump_log)
+
+    def on_log_level_changed(self, *args):
+        self.log_queue.level = LOG_LEVELS[self.log_level.get()]
+        
+    def init_generator(self, dict_path="", notify=True, tokenizer=DEFAULT_TOKENIZER):
+        """ジェネレーターを用意する（形態素解析器・ユーザー辞書が切り替わった場合は差し替える）"""
+        key = (tokenizer, dict_path, dictionary_stamp(dict_path))
+        with self.generator_lock:
+            if self.generator is not None and self.tokenizer_key == key:
+                return True
+            try:
+                from src.fonts import install_font_cache
+                from src.tokenizers import create_tokenizer
+                from src.wordcloud_generator import JapaneseWordCloudGenerator
+                install_font_cache()
+                backend = self.tokenizers.get(key)
+                if backend is None:
+                    self.log_message(f"形態素解析器を準備中: {tokenizer}")
+                    if dict_path:
+                        self.log_message(f"ユーザー辞書を使用: {dict_path}")
+                    # 編集前のユーザー辞書を読み込んだ解析器は使わないので破棄する
+                    for stale in [k for k in self.tokenizers if k[:2] == key[:2]]:
+                        del self.tokenizers[stale]
+                    backend = self.tokenizers[key] = create_tokenizer(
+                        tokenizer, user_dictionaries=(dict_path,) if dict_path else ())
+                if self.generator is None:
+                    self.generator = JapaneseWordCloudGenerator(tokenizer=backend)
+                else:
+                    # ジョブは1つずつ実行されるため、解析中に差し替わることはない
+                    self.generator.tokenizer = backend
+                self.tokenizer_key = key
+                return True
+            except Exception as e:
+                self.log_message(f"形態素解析器（{tokenizer}）の初期化に失敗: {e}", LOG_ERROR)
+                if notify:
+                    messagebox.showerror("エラー", f"形態素解析器（{tokenizer}）の初期化に失敗しました:\n{e}")
+                return False
+            
+    def get_token_cache(self):
+        """トークン化キャッシュを取得（開けない場合はNone）"""
+        if self.token_cache is None:
+            try:
+                self.token_cache = TokenCache()
+            except Exception as e:
+                self.log_message(f"トークン化キャッシュを開けませんでした: {e}", LOG_WARNING)
+                return None
+        return self.token_cache
+
+    def collect_request(self):
+        """現在の画面の設定をリクエストとして取得（メインスレッドで呼ぶ）
 
-            # 入力ファイルを取得（未指定の場合はサンプルテキストを使用）
-            input_file = self.get_input_file_for_processing()
+        ワーカースレッドからtkの変数を読まないよう、処理開始時に値を確定させる。
+        """
+        return {
+            'input_file': self.get_input_file_for_processing(),
+            'output_file': self.output_file_path.get(),
+            'dict_path': self.dict_file_path.get().strip(),
+            'tokenizer': self.tokenizer_name.get(),
+            'trace_level': self.trace_level.get(),
+            'analysis': AnalysisOptions(
+                min_freq=self.min_freq.get(),
+                exclude_words=self.parse_exclude_words(),
+            ),
+            'render': self.collect_render_options(),
+            'preview_size': self.get_preview_size(),
+        }
+
+    def get_preview_size(self):
+        """プレビューキャンバスに表示できる画像の大きさ（未表示の場合はNone）"""
+        canvas_width = self.preview_canvas.winfo_width()
+        canvas_height = self.preview_canvas.winfo_height()
+        if canvas_width <= 21 or canvas_height <= 21:
+            return None
+        return (canvas_width - 20, canvas_height - 20)
+
+    def collect_render_options(self):
+        """描画パラメータをRenderOptionsとして取得"""
+        return RenderOptions(
+            width=self.width.get(),
+            height=self.height.get(),
+            background_color=self.background_color.get(),
+            colormap=self.colormap.get(),
+            max_words=self.max_words.get(),
+            font_path=self.font_file_path.get().strip() or None,
+        )
+
+    def analyze_request(self, request, cancel=None, profiler=None):
+        """リクエストの入力ファイルを解析して単語頻度を返す
 
-            self.log_message("テキストファイルを読み込み中...")
-            if input_file == self.get_sample_text_path():
-                self.log_message("サンプルテキストを使用します")
+        入力ファイル・辞書・解析オプションが前回と同じ場合（配色や画像サイズだけを
+        変えた場合）は、前回の解析結果をそのまま返す。
+        """
+        profiler = profiler or NULL_PROFILER
+        analysis_options = request['analysis']
+        # 入力ファイル（未指定の場合はサンプルテキスト）
+        input_file = request['input_file']
+        stat = os.stat(input_file)
+        analysis_key = (input_file, stat.st_mtime_ns, stat.st_size, request['dict_path'],
+                        dictionary_stamp(request['dict_path']), request['tokenizer'], analysis_options)
+        if request['trace_level'] == "off" and self.last_analysis is not None:
+            last_key, last_word_freq = self.last_analysis
+            if last_key == analysis_key:
+                self.log_message("前回の解析結果を再利用します", LOG_DEBUG)
+                return last_word_freq
+
+        self.log_message("テキストファイルを読み込み中...")
+        if input_file == self.get_sample_text_path():
+            self.log_message("サンプルテキストを使用します")
+        with profiler.stage('read'):
             text = self.generator.read_text_file(input_file)
 
-            # 除外単語を設定
-            exclude_list = self.parse_exclude_words()
-            if exclude_list:
-                self.generator.set_exclude_words(exclude_list)
-                self.log_message(f"除外単語: {exclude_list}")
-            else:
-                self.generator.clear_exclude_words()
+        if analysis_options.exclude_words:
+            self.log_message(f"除外単語: {list(analysis_options.exclude_words)}")
 
-            self.log_message("形態素解析を実行中...")
-            # デバッグファイルの出力先を書き込み可能なディレクトリに設定
+        self.log_message("形態素解析を実行中...")
+        # トレースが有効な場合のみ、書き込み可能なディレクトリにJSONLを出力
+        debug_file = None
+        if request['trace_level'] != "off":
             input_basename = os.path.basename(input_file)
-            debug_filename = f"{os.path.splitext(input_basename)[0]}_debug.txt"
+            debug_filename = f"{os.path.splitext(input_basename)[0]}_trace.jsonl"
             debug_file = self.get_writable_debug_path(debug_filename)
-            words = self.generator.extract_words(text, debug_output=debug_file)
-            self.log_message(f"抽出された単語数: {len(words)}")
+        with open_tracer(debug_file, request['trace_level']) as tracer:
+            words = self.generator.count_words([text], tracer=tracer, cache=self.get_token_cache(),
+                                               cancel=cancel, profiler=profiler)
+        self.log_message(f"抽出された単語数: {sum(words.values())}")
+        if tracer.enabled:
             self.log_message(f"デバッグ情報を出力: {debug_file}")
-            
-            self.log_message("単語の頻度を計算中...")
-            word_freq = self.generator.create_word_frequency(words, self.min_freq.get())
+        
+        self.log_message("単語の頻度を計算中...")
+        with profiler.stage('filter'):
+            word_freq = self.generator.create_word_frequency(
+                words, analysis_options.min_freq, analysis_options.exclude_words)
+        self.last_analysis = (analysis_key, word_freq)
+        return word_freq
+
+    def generate_wordcloud_thread(self, preview_mode=False, request=None, cancel=None):
+        """ワーカースレッドで解析・描画を行う（cancelはJobSchedulerのCancelToken）"""
+        cancel = cancel or CancelToken()
+        notify = True
+        # 段階ごとの処理時間を計測してログに要約を出す
+        # （tracemallocによるメモリの計測は遅くなるため、ログレベルがdebugの場合のみ）
+        profiler = StageProfiler(trace_memory=self.log_queue.enabled_for(LOG_DEBUG))
+        try:
+            self.root.after(0, self.progress.start)
+
+            if request is None:
+                request = self.collect_request()
+            notify = request.get('notify', True)
+
+            if not self.init_generator(request['dict_path'], tokenizer=request['tokenizer']):
+                return
+
+            word_freq = self.analyze_request(request, cancel, profiler)
             self.log_message(f"有効な単語数: {len(word_freq)}")
             
             if word_freq:
@@ -377,116 +580,141 @@ class WordCloudGUI:
                 
                 # カスタムパラメータでワードクラウドを生成
                 if preview_mode:
-                    # プレビュー用一時ファイルは書き込み可能なディレクトリに作成
-                    temp_dir = tempfile.gettempdir()
-                    output_file = os.path.join(temp_dir, "wordcloud_preview_temp.png")
-                    self.log_message(f"プレビュー一時ファイル: {output_file}")
+                    from src.rendering import fit_to_size
+                    # プレビューはファイルを介さず、キャンバスに収まる大きさで直接描画する
+                    render_options = request['render']
+                    if request.get('preview_size'):
+                        render_options = fit_to_size(render_options, *request['preview_size'])
+                    image = self.render_custom_image(word_freq, render_options, cancel, profiler)
+                    if image is not None:
+                        # 表示はメインスレッドで行い、より新しいジョブがあれば表示しない
+                        self.root.after(0, self.show_latest_preview, image, cancel)
+                        if request.get('startup_preview_key'):
+                            self.save_startup_preview(request['startup_preview_key'], image)
+                    elif notify:
+                        self.root.after(0, lambda: messagebox.showerror("エラー", "ワードクラウドの生成に失敗しました"))
                 else:
-                    output_file = self.output_file_path.get()
-                success = self.generate_custom_wordcloud(word_freq, output_file)
-                
-                if success:
-                    if preview_mode:
-                        self.show_preview(output_file)
-                        # テンポラリファイルを削除
-                        if os.path.exists(output_file):
-                            os.remove(output_file)
-                    else:
+                    output_file = request['output_file']
+                    if self.generate_custom_wordcloud(word_freq, output_file, request['render'], cancel,
+                                                      profiler):
                         self.log_message(f"ワードクラウドを保存しました: {output_file}")
                         # メインスレッドでメッセージボックスを表示
                         self.root.after(0, lambda: messagebox.showinfo("完了", f"ワードクラウドの生成が完了しました:\n{output_file}"))
-                else:
-                    self.root.after(0, lambda: messagebox.showerror("エラー", "ワードクラウドの生成に失敗しました"))
-            else:
+                    elif notify:
+                        self.root.after(0, lambda: messagebox.showerror("エラー", "ワードクラウドの生成に失敗しました"))
+            elif notify:
                 self.root.after(0, lambda: messagebox.showwarning("警告", "有効な単語が見つかりませんでした"))
+            else:
+                self.log_message("警告: 有効な単語が見つかりませんでした")
+            profiler.close()
+            if profiler.stages:
+                self.log_message(f"処理時間: {profiler.summary_line()}")
                 
+        except JobCancelled:
+            self.log_message("処理を中断しました")
         except Exception as e:
-            self.log_message(f"エラー: {e}")
+            self.log_message(f"エラー: {e}", LOG_ERROR)
             # メインスレッドでメッセージボックスを表示
-            self.root.after(0, lambda: messagebox.showerror("エラー", f"処理中にエラーが発生しました:\n{e}"))
+            if notify:
+                self.root.after(0, lambda: messagebox.showerror("エラー", f"処理中にエラーが発生しました:\n{e}"))
         finally:
-            # メインスレッドでUI更新
-            self.root.after(0, self.reset_ui_state)
-            
-    def find_japanese_font(self):
-        """日本語対応フォントを検出"""
-        # macOSで利用可能な日本語フォントのパス（優先順）
-        font_paths = [
-            # ヒラギノフォント（macOS標準）
-            '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',
-            '/System/Library/Fonts/Hiragino Sans W3.ttc',
-            '/System/Library/Fonts/ヒラギノ丸ゴ ProN W4.ttc',
-            '/System/Library/Fonts/Hiragino Sans GB.ttc',  # 中国語だが日本語も対応
-            
-            # Arial Unicode（多言語対応）
-            '/System/Library/Fonts/Arial Unicode.ttf',
-            '/Library/Fonts/Arial Unicode.ttf',
-            
-            # NotoフォントシリーズChrome/Linux環境で利用可能
-            '/System/Library/Fonts/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
-            '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+            profiler.close()
+            # 最新のジョブが終わった場合のみUIを戻す
+            if cancel is self.latest_job:
+                self.root.after(0, self.reset_ui_state)
+
+    def show_latest_preview(self, image, cancel):
+        """メインスレッド: ジョブが最新のままであればプレビューを表示"""
+        if not cancel.cancelled:
+            self.show_preview(image)
             
-            # その他の一般的な日本語フォント
-            '/System/Library/Fonts/PingFang.ttc',
-            '/System/Library/Fonts/ArialHB.ttc',
-        ]
-        
-        for path in font_paths:
-            if os.path.exists(path):
-                self.log_message(f"日本語フォントを検出: {path}")
-                return path
+    def find_japanese_font(self, preferred=None):
+        """日本語対応フォントを検出（preferredが存在すればそれを使う）"""
+        from src.fonts import get_font_registry
+        font_path = get_font_registry().find_japanese_font(preferred)
+        if preferred and font_path != preferred:
+            self.log_message(f"警告: 指定されたフォントが見つかりません: {preferred}")
+        if font_path:
+            self.log_message(f"日本語フォントを検出: {font_path}", LOG_DEBUG)
+            return font_path
         
         self.log_message("警告: 日本語フォントが見つかりませんでした。英数字のみ表示される可能性があります。")
         return None
 
-    def generate_custom_wordcloud(self, word_freq, output_path):
+    def render_custom_image(self, word_freq, render_options=None, cancel=None, profiler=None):
+        """ワードクラウドをPIL.Imageとして描画（失敗した場合はNone）"""
+        profiler = profiler or NULL_PROFILER
         try:
-            from wordcloud import WordCloud
+            if render_options is None:
+                render_options = self.collect_render_options()
             
             # 日本語フォントを検出
-            font_path = self.find_japanese_font()
+            font_path = self.find_japanese_font(render_options.font_path)
             
-            # WordCloudのパラメータ設定
-            wordcloud_params = {
-                'width': self.width.get(),
-                'height': self.height.get(),
-                'background_color': self.background_color.get(),
-                'max_words': self.max_words.get(),
-                'colormap': self.colormap.get(),
-                'relative_scaling': 0.5,
-                'min_font_size': 10,
-                'prefer_horizontal': 0.9,  # 横書きを優先
-                'max_font_size': 100,
-                'random_state': 42  # 再現性のため
-            }
-            
-            # フォントパスが見つかった場合のみ設定
-            if font_path:
-                wordcloud_params['font_path'] = font_path
-                
-            wordcloud = WordCloud(**wordcloud_params).generate_from_frequencies(word_freq)
-            
-            # 画像として保存（Matplotlibを使わずに直接保存）
-            wordcloud.to_file(output_path)
+            # 同じ頻度表・サイズのレイアウトは再利用し、配色と背景色だけを適用し直す
+            # （フォントが見つからなかった場合は''を渡し、ジェネレーター側で再検出させない）
+            with profiler.stage('layout'):
+                wordcloud = self.generator.render_wordcloud(word_freq, render_options, font_path or '', cancel)
+            with profiler.stage('encode'):
+                image = wordcloud.to_image()
+            if cancel is not None:
+                cancel.check()
+            return image
             
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log_message(f"ワードクラウド生成エラー: {e}", LOG_ERROR)
+            return None
+
+    def generate_custom_wordcloud(self, word_freq, output_path, render_options=None, cancel=None,
+                                  profiler=None):
+        from src.image_cache import image_cache_key
+        from src.rendering import encode_image, image_format_for
+        profiler = profiler or NULL_PROFILER
+        if render_options is None:
+            render_options = self.collect_render_options()
+        image_format = image_format_for(output_path)
+        image_cache = self.generator.image_cache
+        data = key = None
+        if image_cache is not None:
+            # 同じ頻度表・設定で描画済みの画像があれば、描画せずにそのまま書き出す
+            font_path = self.find_japanese_font(render_options.font_path)
+            key = image_cache_key(word_freq, font_path, render_options, image_format)
+            data = image_cache.get(key)
+            if data is not None:
+                self.log_message("描画済みの画像を再利用します", LOG_DEBUG)
+        if data is None:
+            image = self.render_custom_image(word_freq, render_options, cancel, profiler)
+            if image is None:
+                return False
+        try:
+            if data is None:
+                # 画像としてエンコード（Matplotlibを使わずに直接保存）
+                with profiler.stage('encode'):
+                    data = encode_image(image, image_format)
+                if key is not None:
+                    image_cache.put(key, data)
+            with profiler.stage('write'):
+                with open(output_path, 'wb') as f:
+                    f.write(data)
             return True
-            
         except Exception as e:
-            self.log_message(f"ワードクラウド生成エラー: {e}")
+            self.log_message(f"ワードクラウド保存エラー: {e}", LOG_ERROR)
             return False
             
-    def show_preview(self, image_path):
+    def show_preview(self, image):
+        """描画済みのPIL.Imageをプレビューキャンバスに表示（メインスレッドで呼ぶ）"""
         try:
-            # 画像を読み込み
-            image = Image.open(image_path)
-            
-            # キャンバスサイズに合わせてリサイズ
+            from PIL import Image, ImageTk
             canvas_width = self.preview_canvas.winfo_width()
             canvas_height = self.preview_canvas.winfo_height()
             
             if canvas_width > 1 and canvas_height > 1:
-                image.thumbnail((canvas_width-20, canvas_height-20), Image.Resampling.LANCZOS)
+                # キャンバスの大きさで描画済みなので、通常は縮小しない（ウィンドウを縮めた場合のみ）
+                if image.width > canvas_width - 20 or image.height > canvas_height - 20:
+                    image = image.copy()
+                    image.thumbnail((canvas_width-20, canvas_height-20), Image.Resampling.LANCZOS)
                 
                 # PhotoImageに変換
                 photo = ImageTk.PhotoImage(image)
@@ -500,31 +728,107 @@ class WordCloudGUI:
                 # 参照を保持（ガベージコレクション防止）
                 self.preview_canvas.image = photo
                 
-                self.log_message("プレビューを更新しました")
+                self.log_message("プレビューを更新しました", LOG_DEBUG)
                 
         except Exception as e:
-            self.log_message(f"プレビュー表示エラー: {e}")
+            self.log_message(f"プレビュー表示エラー: {e}", LOG_ERROR)
             
     def reset_ui_state(self):
         self.progress.stop()
-        self.generate_btn.config(state='normal')
-        self.preview_btn.config(state='normal')
             
     def generate_wordcloud(self):
-        self.generate_btn.config(state='disabled')
-        self.preview_btn.config(state='disabled')
-        threading.Thread(target=self.generate_wordcloud_thread, daemon=True).start()
+        self.start_generation(preview_mode=False)
         
     def preview_wordcloud(self):
-        self.generate_btn.config(state='disabled')
-        self.preview_btn.config(state='disabled')
-        threading.Thread(target=self.generate_wordcloud_thread, args=(True,), daemon=True).start()
+        self.start_generation(preview_mode=True)
+
+    def cancel_generation(self):
+        """待機中・実行中のジョブをキャンセル"""
+        self.scheduler.cancel()
+        self.progress.stop()
+        self.log_message("処理をキャンセルしました")
+
+    def start_generation(self, preview_mode, debounce=0, notify=True, request=None):
+        """設定を確定させてからジョブスケジューラに生成を投入
+
+        実行中・待機中のジョブはキャンセルされ、最新の設定のジョブだけが結果を表示する。
+        ただし画像を保存するジョブ（preview_mode=False）は後のプレビューではキャンセルされず、
+        プレビューは保存が終わってから実行される。notify=Falseの場合（パラメータ変更による自動プレビュー）は、入力途中の不正な
+        値を無視し、エラーをダイアログではなくログに出す。
+        """
+        if request is None:
+            try:
+                request = self.collect_request()
+            except (re.error, tk.TclError) as e:
+                if notify:
+                    messagebox.showerror("エラー", f"設定が不正です:\n{e}")
+                return
+        request['notify'] = notify
+        self.latest_job = self.scheduler.submit(
+            lambda cancel: self.generate_wordcloud_thread(preview_mode, request, cancel), debounce,
+            preemptible=preview_mode)
+
+    def on_parameter_changed(self, *args):
+        """パラメータが変更されたらデバウンスしてプレビューを更新"""
+        self.start_generation(preview_mode=True, debounce=AUTO_PREVIEW_DELAY, notify=False)
 
-    def auto_generate_preview(self):
-        """起動時に自動的にサンプルテキストでプレビューを生成"""
+    def auto_generate_preview(self, attempts=20):
+        """起動時に自動的にサンプルテキストでプレビューを生成
+
+        サンプルテキストと既定の設定が前回の起動時と同じであれば、保存済みの画像を
+        すぐに表示し、重いモジュールの読み込みと解析はバックグラウンドで済ませておく。
+        """
         # 入力ファイルが未設定の場合のみ自動プレビューを実行
-        if not self.input_file_path.get().strip():
-            self.preview_wordcloud()
+        if self.input_file_path.get().strip():
+            return
+        # キャンバスの大きさが決まるまで待つ（プレビューの大きさがキーに含まれるため）
+        if self.get_preview_size() is None and attempts > 0:
+            self.root.after(50, self.auto_generate_preview, attempts - 1)
+            return
+        try:
+            request = self.collect_request()
+            # フォントの検出結果はキャッシュファイルから読むため、通常はPILも読み込まない
+            from src.fonts import get_font_registry
+            font_path = get_font_registry().find_japanese_font(request['render'].font_path)
+            tokenizer = installed_fingerprint(TokenizerConfig(
+                request['tokenizer'], (request['dict_path'],) if request['dict_path'] else ()))
+            key = startup_preview_key(request['input_file'], request['analysis'], request['render'],
+                                      request['preview_size'], font_path, tokenizer)
+        except (OSError, re.error, tk.TclError) as e:
+            self.log_message(f"起動時プレビューを作成できません: {e}", LOG_WARNING)
+            return
+
+        image = self.startup_preview.load(key)
+        if image is not None:
+            self.show_preview(image)
+            self.log_message("保存済みの起動時プレビューを表示しました")
+            self.latest_job = self.scheduler.submit(lambda cancel: self.warm_up(request, cancel), 0)
+            return
+        request['startup_preview_key'] = key
+        self.start_generation(preview_mode=True, request=request)
+
+    def warm_up(self, request, cancel):
+        """ワーカースレッド: 重いモジュールの読み込みとサンプルテキストの解析を先に済ませる"""
+        try:
+            if not self.init_generator(request['dict_path'], notify=False, tokenizer=request['tokenizer']):
+                return
+            import src.rendering  # noqa: F401
+            from PIL import ImageTk  # noqa: F401
+            self.find_japanese_font(request['render'].font_path)
+            self.analyze_request(request, cancel)
+            self.log_message("バックグラウンドの準備が完了しました", LOG_DEBUG)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log_message(f"バックグラウンドの準備に失敗: {e}", LOG_DEBUG)
+
+    def save_startup_preview(self, key, image):
+        """次回の起動ですぐに表示できるよう、プレビュー画像を保存する"""
+        try:
+            self.startup_preview.save(key, image)
+            self.log_message("起動時プレビューを保存しました", LOG_DEBUG)
+        except OSError as e:
+            self.log_message(f"起動時プレビューを保存できませんでした: {e}", LOG_WARNING)
 
 def main():
     root = tk.Tk()
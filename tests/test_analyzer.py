@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.analyzer import TaggerPool
+from src.options import AnalysisOptions, RenderOptions
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEST_TEXT = """
+犬が好きです。猫も好きです。鳥も好きです。
+犬と遊びました。猫と遊びました。鳥を見ました。
+"""
+
+
+class TestTaggerPool(unittest.TestCase):
+    """Taggerプールのテストクラス"""
+
+    def test_返却したTaggerを再利用する(self):
+        """借りて返したTaggerが次の貸し出しで再利用されることを確認"""
+        pool = TaggerPool(factory=object)
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats(), {'created': 1, 'idle': 1})
+
+    def test_同時に借りると別のTaggerになる(self):
+        """同時に貸し出されたTaggerが重複しないことを確認"""
+        pool = TaggerPool(factory=object)
+        with pool.acquire() as first, pool.acquire() as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    def test_別スレッドからも再利用できる(self):
+        """スレッドが終了してもTaggerがプールに残り再利用されることを確認"""
+        pool = TaggerPool(factory=object)
+
+        def analyze():
+            with pool.acquire():
+                pass
+
+        for _ in range(3):
+            thread = threading.Thread(target=analyze)
+            thread.start()
+            thread.join()
+        self.assertEqual(pool.stats()['created'], 1)
+
+
+class TestConcurrentAnalysis(unittest.TestCase):
+    """共有ジェネレーターによる並行処理のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def test_異なるオプションのリクエストを同時に処理できる(self):
+        """除外単語の異なるリクエストが互いに影響しないことを確認"""
+        options = [AnalysisOptions(exclude_words=["好き"]), AnalysisOptions(exclude_words=["遊び"])]
+        expected = [self.generator.analyze_text(TEST_TEXT, option) for option in options]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda option: self.generator.analyze_text(TEST_TEXT, option), options * 8
+            ))
+
+        self.assertEqual(results, expected * 8)
+        self.assertNotIn("好き", results[0])
+        self.assertNotIn("遊び", results[1])
+        self.assertEqual(self.generator.exclude_words, [])
+
+    def test_描画オプションからWordCloudの引数を作る(self):
+        """RenderOptionsの値がWordCloudの引数に反映されることを確認"""
+        params = RenderOptions(width=400, colormap='plasma').to_wordcloud_params('/path/font.ttc')
+        self.assertEqual(params['width'], 400)
+        self.assertEqual(params['colormap'], 'plasma')
+        self.assertEqual(params['font_path'], '/path/font.ttc')
+        self.assertNotIn('font_path', RenderOptions().to_wordcloud_params())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.batch import collect_inputs, plan_outputs, run_batch
+from src.options import AnalysisOptions, OutputOptions, RenderOptions
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEST_TEXT = """
+犬が好きです。猫も好きです。鳥も好きです。
+犬と遊びました。猫と遊びました。鳥を見ました。
+"""
+
+
+class TestBatchProcessing(unittest.TestCase):
+    """一括処理のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cache_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cache_dir.cleanup)
+        # フォントの検出結果などをユーザーのキャッシュディレクトリに書かない
+        patcher = patch.dict(os.environ, {'WORDCLOUD_CACHE_DIR': cache_dir.name})
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, "reports")
+        self.output_dir = os.path.join(self.temp_dir.name, "output")
+        self.inputs = [self.write_file("a/report.txt"), self.write_file("b/report.txt")]
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def write_file(self, name, content=TEST_TEXT):
+        path = os.path.join(self.input_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def batch(self, render_options=None, force=False):
+        return run_batch(self.generator, self.inputs, self.output_dir,
+                         AnalysisOptions(), render_options or RenderOptions(width=200, height=100),
+                         OutputOptions(), force=force)
+
+    def test_ディレクトリとglobと一覧ファイルから入力を集める(self):
+        """各形式の入力が重複なく順序どおりに集まることを確認"""
+        self.write_file("a/notes.md")
+        list_path = os.path.join(self.temp_dir.name, "inputs.lst")
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write("# 一覧\nreports/b/report.txt\n\n")
+
+        self.assertEqual(collect_inputs([self.input_dir]), self.inputs)
+        self.assertEqual(collect_inputs([os.path.join(self.input_dir, "*", "*.txt")]), self.inputs)
+        self.assertEqual(collect_inputs([self.inputs[1]], [list_path]), [self.inputs[1]])
+
+    def test_出力先にディレクトリ構成を再現する(self):
+        """同名の入力ファイルが別々の出力パスになることを確認"""
+        outputs = plan_outputs(self.inputs, self.output_dir, ".webp")
+        self.assertEqual(outputs[self.inputs[0]], os.path.join(self.output_dir, "a", "report_wordcloud.webp"))
+        self.assertEqual(len(set(outputs.values())), 2)
+
+    def test_拡張子だけが違う入力は拡張子を含む名前で出力する(self):
+        """a.txt・a.txt.gz・a.zipが同じ出力パスにならず、重ならない名前は変わらないことを確認"""
+        names = ["a/report.txt", "a/report.txt.gz", "a/report.zip", "a/other.txt.gz"]
+        inputs = [os.path.join(self.input_dir, name) for name in names]
+        outputs = plan_outputs(inputs, self.output_dir)
+        self.assertEqual([os.path.basename(outputs[path]) for path in inputs],
+                         ["report.txt_wordcloud.png", "report.txt.gz_wordcloud.png",
+                          "report.zip_wordcloud.png", "other_wordcloud.png"])
+
+    def test_重なる出力パスはValueErrorになる(self):
+        """拡張子を含めても出力パスが重なる場合に例外を送出することを確認"""
+        inputs = [os.path.join(self.input_dir, name) for name in ["a.txt", "a.txt.gz", "a.txt.txt"]]
+        with self.assertRaises(ValueError):
+            plan_outputs(inputs, self.output_dir)
+
+    def test_画像とマニフェストを書き出す(self):
+        """ファイルごとの画像とマニフェストが書き出されることを確認"""
+        manifest = self.batch()
+
+        self.assertEqual(manifest['summary']['generated'], 2)
+        for entry in manifest['files']:
+            self.assertTrue(os.path.exists(entry['output']))
+            self.assertGreater(entry['tokens'], 0)
+            self.assertIn('total', entry['timings'])
+        with open(os.path.join(self.output_dir, "manifest.json"), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['files'], manifest['files'])
+
+    def test_最新の出力はスキップする(self):
+        """入力も設定も変わっていなければスキップし、変わったものだけ生成し直すことを確認"""
+        self.batch()
+        self.assertEqual(self.batch()['summary']['skipped'], 2)
+
+        # 入力ファイルが更新された場合
+        os.utime(self.inputs[0], (os.path.getmtime(self.inputs[0]) + 10,) * 2)
+        self.assertEqual(self.batch()['summary']['generated'], 1)
+
+        # 設定が変わった場合・強制する場合
+        self.assertEqual(self.batch(RenderOptions(width=300, height=100))['summary']['generated'], 2)
+        self.assertEqual(self.batch(RenderOptions(width=300, height=100), force=True)['summary']['generated'], 2)
+
+    def test_マニフェストに記録のない出力は生成し直す(self):
+        """出力画像があってもマニフェストがなければスキップしないことを確認"""
+        self.batch()
+        os.remove(os.path.join(self.output_dir, "manifest.json"))
+        self.assertEqual(self.batch()['summary']['generated'], 2)
+
+    def test_失敗したファイルを記録して続行する(self):
+        """読み込めないファイルがあっても他のファイルを処理することを確認"""
+        with open(self.inputs[0], 'wb') as f:
+            f.write(b'\xff\xfe\xfa')
+
+        manifest = self.batch()
+
+        statuses = [entry['status'] for entry in manifest['files']]
+        self.assertEqual(statuses, ['failed', 'generated'])
+        self.assertIn('error', manifest['files'][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
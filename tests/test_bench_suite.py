@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from benchmarks.bench_suite import compare, percentile
+from benchmarks.bench_tokenizers import add_overlap
+from benchmarks.corpus import CorpusGenerator, corpus_path, format_size, parse_size
+
+
+class TestCorpus(unittest.TestCase):
+    """合成コーパスのテストクラス"""
+
+    def test_同じシードからは同じテキストになる(self):
+        """シードとサイズが同じなら同じテキスト、シードが違えば別のテキストになることを確認"""
+        self.assertEqual(CorpusGenerator(1).text(5000), CorpusGenerator(1).text(5000))
+        self.assertNotEqual(CorpusGenerator(1).text(5000), CorpusGenerator(2).text(5000))
+
+    def test_指定サイズ以下で段落に区切られる(self):
+        """保存したコーパスが指定サイズ以下で、空行区切りの段落からなることを確認"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = corpus_path(20 * 1024, seed=1, directory=directory)
+            size = os.path.getsize(path)
+            self.assertLessEqual(size, 20 * 1024)
+            self.assertGreater(size, 19 * 1024)
+            with open(path, encoding='utf-8') as f:
+                self.assertGreater(f.read().count("\n\n"), 5)
+
+    def test_サイズ表記を変換できる(self):
+        """'10KB'や'1GB'などの表記とバイト数を相互に変換できることを確認"""
+        self.assertEqual(parse_size("10KB"), 10 * 1024)
+        self.assertEqual(parse_size("1gb"), 1024 ** 3)
+        self.assertEqual(parse_size("2048"), 2048)
+        self.assertEqual(format_size(100 * 1024 ** 2), "100MB")
+        with self.assertRaises(ValueError):
+            parse_size("10XB")
+
+
+class TestBenchSuite(unittest.TestCase):
+    """ベンチマークの集計のテストクラス"""
+
+    def test_分位点を線形補間で求める(self):
+        """分位点が線形補間で計算されることを確認"""
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2.5)
+        self.assertEqual(percentile([5], 0.99), 5)
+
+    def test_ベースラインより遅い項目を回帰として報告する(self):
+        """p50が閾値を超えて遅くなった項目だけが回帰になることを確認"""
+        def entry(name, p50):
+            return {'benchmark': name, 'size': '1MB', 'latency_ms': {'p50': p50}}
+        baseline = {'results': [entry('extract_words', 100), entry('generate_wordcloud', 100)]}
+        results = [entry('extract_words', 105), entry('generate_wordcloud', 130), entry('process_text_file', 1)]
+
+        comparison = compare(results, baseline, threshold=0.1)
+
+        self.assertEqual([(item['benchmark'], item['regression']) for item in comparison],
+                         [('extract_words', False), ('generate_wordcloud', True)])
+
+    def test_ミリ秒未満の差は回帰としない(self):
+        """割合では閾値を超えても、p50の差がmin_delta_ms以下なら回帰にならないことを確認"""
+        def entry(p50):
+            return {'benchmark': 'create_word_frequency', 'size': '10KB', 'latency_ms': {'p50': p50}}
+
+        self.assertFalse(compare([entry(0.25)], {'results': [entry(0.14)]}, threshold=0.1)[0]['regression'])
+        self.assertTrue(compare([entry(0.25)], {'results': [entry(0.14)]}, threshold=0.1,
+                                min_delta_ms=0.05)[0]['regression'])
+
+    def test_上位の単語の一致率を求める(self):
+        """最初のバックエンドの上位の単語との一致率を、失敗した項目を除いて加えることを確認"""
+        results = [{'tokenizer': 'mecab', 'top_words': ['技術', '研究', '開発', '社会']},
+                   {'tokenizer': 'sudachi-a', 'error': 'not installed'},
+                   {'tokenizer': 'sudachi-c', 'top_words': ['技術', '研究開発', '社会', '仕事']}]
+
+        add_overlap(results, 4)
+
+        self.assertEqual([entry.get('top_overlap') for entry in results], [1.0, None, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from wordcloud import wordcloud as wordcloud_module
+from src.fonts import FontRegistry, has_japanese_glyphs, install_font_cache, load_font
+from src.options import RenderOptions
+from src.rendering import create_wordcloud
+
+
+# wordcloudに同梱されている英字フォント（日本語のグリフを持たない）
+LATIN_FONT_PATH = wordcloud_module.FONT_PATH
+
+
+class TestFontRegistry(unittest.TestCase):
+    """フォントレジストリのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.font_dir = os.path.join(self.temp_dir.name, "fonts")
+        os.makedirs(self.font_dir)
+        self.cache_path = os.path.join(self.temp_dir.name, "cache", "fonts.json")
+        for name in ["Latin-Regular.ttf", "NotoSansCJKjp-Bold.otf", "NotoSansCJKjp-Regular.otf"]:
+            shutil.copy(LATIN_FONT_PATH, os.path.join(self.font_dir, name))
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def create_registry(self):
+        return FontRegistry(cache_path=self.cache_path, font_dirs=[self.font_dir])
+
+    def test_日本語フォントを優先順に選ぶ(self):
+        """日本語のグリフを持つフォントのうち、標準の太さが優先されることを確認"""
+        with patch('src.fonts.has_japanese_glyphs', side_effect=lambda path: 'CJK' in path):
+            fonts = self.create_registry().japanese_fonts()
+
+        self.assertEqual([os.path.basename(path) for path in fonts],
+                         ["NotoSansCJKjp-Regular.otf", "NotoSansCJKjp-Bold.otf"])
+
+    def test_走査結果をキャッシュファイルから再利用する(self):
+        """2回目以降はフォントを読み込まずにキャッシュファイルの結果を使うことを確認"""
+        with patch('src.fonts.has_japanese_glyphs', side_effect=lambda path: 'CJK' in path):
+            expected = self.create_registry().find_japanese_font()
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        with patch('src.fonts.has_japanese_glyphs') as check:
+            found = self.create_registry().find_japanese_font()
+
+        self.assertEqual(found, expected)
+        check.assert_not_called()
+
+    def test_サブディレクトリにフォントが増えたら走査し直す(self):
+        """サブディレクトリの更新でキャッシュファイルの結果を使わなくなることを確認"""
+        sub_dir = os.path.join(self.font_dir, "noto")
+        os.makedirs(sub_dir)
+        with patch('src.fonts.has_japanese_glyphs', side_effect=lambda path: 'CJK' in path):
+            self.create_registry().japanese_fonts()
+
+        shutil.copy(LATIN_FONT_PATH, os.path.join(sub_dir, "NotoSansCJKjp-Medium.otf"))
+        # ファイルシステムの時刻の分解能に左右されないように更新時刻をずらす
+        os.utime(sub_dir, (0, os.path.getmtime(sub_dir) + 10))
+        with patch('src.fonts.has_japanese_glyphs', side_effect=lambda path: 'CJK' in path) as check:
+            fonts = self.create_registry().japanese_fonts()
+
+        check.assert_called()
+        self.assertIn(os.path.join(sub_dir, "NotoSansCJKjp-Medium.otf"), fonts)
+
+    def test_見つからなかった結果は保存しない(self):
+        """日本語フォントがない場合はキャッシュファイルを書かず、次回も走査することを確認"""
+        with patch('src.fonts.has_japanese_glyphs', return_value=False):
+            self.assertEqual(self.create_registry().japanese_fonts(), [])
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_指定されたフォントを優先する(self):
+        """存在するフォントが指定された場合は走査せずにそれを使うことを確認"""
+        registry = self.create_registry()
+        with patch.object(registry, '_scan') as scan:
+            self.assertEqual(registry.find_japanese_font(LATIN_FONT_PATH), LATIN_FONT_PATH)
+        scan.assert_not_called()
+
+    def test_日本語のグリフの有無を判定する(self):
+        """英字フォントは日本語フォントと判定されないことを確認"""
+        self.assertFalse(has_japanese_glyphs(LATIN_FONT_PATH))
+        self.assertFalse(has_japanese_glyphs(os.path.join(self.font_dir, "missing.ttf")))
+
+
+class TestFontCache(unittest.TestCase):
+    """読み込み済みフォントのキャッシュのテストクラス"""
+
+    def test_同じパスとサイズのフォントを再利用する(self):
+        """WordCloudが同じ(パス, サイズ)で読み込むと同じフォントが返ることを確認"""
+        install_font_cache()
+        first = wordcloud_module.ImageFont.truetype(LATIN_FONT_PATH, 24)
+        second = wordcloud_module.ImageFont.truetype(LATIN_FONT_PATH, 24)
+
+        self.assertIs(first, second)
+        self.assertIs(first, load_font(LATIN_FONT_PATH, 24))
+        self.assertIsNot(first, wordcloud_module.ImageFont.truetype(LATIN_FONT_PATH, 25))
+        # truetype以外の属性はPIL.ImageFontに委譲される
+        self.assertTrue(callable(wordcloud_module.ImageFont.TransposedFont))
+
+    def test_スレッドごとに別のフォントを使う(self):
+        """別のスレッドには別のフォントを渡し、同時に描画しても逐次の描画と同じ結果になることを確認"""
+        install_font_cache()
+        word_freq = {f"word{i}": 100 - i for i in range(60)}
+        options = RenderOptions(width=300, height=200)
+
+        def render(_):
+            wordcloud = create_wordcloud(word_freq, LATIN_FONT_PATH, options)
+            return wordcloud.layout_, bytes(wordcloud.to_array()), load_font(LATIN_FONT_PATH, 24)
+
+        expected_layout, expected_pixels, own_font = render(None)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(render, range(8)))
+
+        for layout, pixels, font in results:
+            self.assertEqual(layout, expected_layout)
+            self.assertEqual(pixels, expected_pixels)
+            self.assertIsNot(font, own_font)
+
+
+if __name__ == "__main__":
+    unittest.main()
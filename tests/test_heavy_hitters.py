@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import unittest
+from collections import Counter
+from random import Random
+from src.heavy_hitters import HeavyHitters
+
+
+SAMPLE_TEXT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt")
+
+
+def zipf_chunks(chunk_count=50, chunk_size=2000, vocabulary_size=20000, seed=0):
+    """上位の単語に偏り、まれな単語が大量にあるチャンク列を作る"""
+    random = Random(seed)
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    words = [f"単語{rank}" for rank in range(vocabulary_size)]
+    return [random.choices(words, weights, k=chunk_size) for _ in range(chunk_count)]
+
+
+class TestHeavyHitters(unittest.TestCase):
+    """近似集計のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.chunks = zipf_chunks()
+        cls.exact = Counter(word for chunk in cls.chunks for word in chunk)
+
+    def count(self, capacity):
+        heavy_hitters = HeavyHitters(capacity)
+        for chunk in self.chunks:
+            heavy_hitters.update(Counter(chunk))
+        return heavy_hitters
+
+    def test_保持する語数が上限を超えない(self):
+        """語彙数がcapacityを大きく超えても、保持する語数はcapacity以下になることを確認"""
+        heavy_hitters = self.count(200)
+        self.assertGreater(len(self.exact), 200)
+        self.assertLessEqual(len(heavy_hitters), 200)
+        self.assertEqual(heavy_hitters.total(), sum(self.exact.values()))
+
+    def test_誤差が上限以内に収まる(self):
+        """すべての単語で推定値 <= 真の値 <= 推定値 + error_bound が成り立つことを確認"""
+        capacity = 200
+        heavy_hitters = self.count(capacity)
+        total = sum(self.exact.values())
+        self.assertLessEqual(heavy_hitters.error_bound, total / (capacity + 1))
+        for word, true_count in self.exact.items():
+            estimate = heavy_hitters[word]
+            self.assertLessEqual(estimate, true_count)
+            self.assertLessEqual(true_count, estimate + heavy_hitters.error_bound)
+            if true_count > total / (capacity + 1):
+                self.assertIn(word, heavy_hitters)
+
+    def test_上位の単語は正確な集計と一致する(self):
+        """偏りのある入力では、上位の単語が正確な集計と同じになることを確認"""
+        heavy_hitters = self.count(500)
+        self.assertEqual([word for word, _ in heavy_hitters.most_common(10)],
+                         [word for word, _ in self.exact.most_common(10)])
+
+    def test_上限に達しなければ正確に数える(self):
+        """語彙数がcapacity以下なら誤差なく数えることを確認"""
+        heavy_hitters = self.count(len(self.exact))
+        self.assertEqual(heavy_hitters.error_bound, 0)
+        self.assertEqual(heavy_hitters, self.exact)
+
+    def test_pickleで受け渡せる(self):
+        """capacityと誤差の上限も含めて復元できることを確認"""
+        heavy_hitters = self.count(200)
+        restored = pickle.loads(pickle.dumps(heavy_hitters))
+        self.assertEqual(restored, heavy_hitters)
+        self.assertEqual(restored.stats(), heavy_hitters.stats())
+
+    def test_ジェネレーターで近似集計を選べる(self):
+        """count_wordsにapprox_capacityを指定すると保持する語数が制限されることを確認"""
+        from src.wordcloud_generator import JapaneseWordCloudGenerator
+        generator = JapaneseWordCloudGenerator()
+        chunks = generator.read_text_chunks(SAMPLE_TEXT_PATH, chunk_size=200)
+        exact = generator.count_words(generator.read_text_chunks(SAMPLE_TEXT_PATH, chunk_size=200))
+
+        approximate = generator.count_words(chunks, approx_capacity=20)
+
+        self.assertIsInstance(approximate, HeavyHitters)
+        self.assertLessEqual(len(approximate), 20)
+        self.assertEqual(approximate.total(), exact.total())
+        for word, estimate in approximate.items():
+            self.assertLessEqual(estimate, exact[word])
+            self.assertLessEqual(exact[word], estimate + approximate.error_bound)
+
+
+if __name__ == "__main__":
+    unittest.main()
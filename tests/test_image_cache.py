@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.image_cache import ImageCache, image_cache_key
+from src.options import OutputOptions, RenderOptions
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+WORD_FREQ = {'技術': 5, '研究': 3, '開発': 2}
+
+
+class TestImageCacheKey(unittest.TestCase):
+    """画像のキャッシュキーのテストクラス"""
+
+    def test_同じ頻度表と設定なら同じキーになる(self):
+        """頻度表・設定が同じなら、辞書を作り直してもキーが変わらないことを確認"""
+        options = RenderOptions(width=200, height=100)
+        self.assertEqual(image_cache_key(WORD_FREQ, None, options),
+                         image_cache_key(dict(WORD_FREQ), None, RenderOptions(width=200, height=100)))
+
+    def test_頻度表や設定が変わるとキーが変わる(self):
+        """出力画像に影響する項目のどれが変わってもキーが変わることを確認"""
+        options = RenderOptions(width=200, height=100)
+        base = image_cache_key(WORD_FREQ, None, options)
+        variants = [
+            image_cache_key(dict(WORD_FREQ, 技術=6), None, options),
+            image_cache_key(WORD_FREQ, None, RenderOptions(width=201, height=100)),
+            image_cache_key(WORD_FREQ, None, RenderOptions(width=200, height=100, colormap='plasma')),
+            image_cache_key(WORD_FREQ, None, RenderOptions(width=200, height=100, background_color='black')),
+            image_cache_key(WORD_FREQ, None, RenderOptions(width=200, height=100, max_words=10)),
+            image_cache_key(WORD_FREQ, '/fonts/other.ttf', options),
+            image_cache_key(WORD_FREQ, None, options, 'WEBP'),
+            image_cache_key(WORD_FREQ, None, options, 'PNG', OutputOptions(png_compress_level=1)),
+        ]
+        self.assertEqual(len({base, *variants}), len(variants) + 1)
+
+
+class TestImageCache(unittest.TestCase):
+    """描画済み画像のキャッシュのテストクラス"""
+
+    def test_メモリ上の画像は合計サイズの上限を超えない(self):
+        """合計サイズが上限を超えると参照の古い画像から捨てることを確認"""
+        cache = ImageCache(max_bytes=25)
+        cache.put('a', b'a' * 10)
+        cache.put('b', b'b' * 10)
+        self.assertEqual(cache.get('a'), b'a' * 10)
+        cache.put('c', b'c' * 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'a' * 10)
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['bytes']), (2, 20))
+        self.assertEqual((stats['memory_hits'], stats['misses']), (2, 1))
+
+    def test_ディスクの画像を別のインスタンスから読み込む(self):
+        """ディスクに保存した画像が、メモリを共有しない別のキャッシュからも得られることを確認"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ImageCache(directory=temp_dir).put('key', b'image')
+            cache = ImageCache(directory=temp_dir)
+            self.assertEqual(cache.get('key'), b'image')
+            self.assertEqual(cache.get('key'), b'image')
+            stats = cache.stats()
+            self.assertEqual((stats['disk_hits'], stats['memory_hits']), (1, 1))
+
+    def test_ディスクの画像は容量上限を超えない(self):
+        """ディスク上の合計サイズが上限を超えると、参照の古い画像から削除することを確認"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ImageCache(max_bytes=0, directory=temp_dir, max_disk_bytes=250)
+            for index in range(5):
+                key = f"key{index}"
+                cache.put(key, b'x' * 100)
+                os.utime(cache.path_for(key), ns=(index * 10 ** 9, index * 10 ** 9))
+            remaining = sorted(name for name in os.listdir(temp_dir))
+            self.assertEqual(remaining, ['key3.img', 'key4.img'])
+
+    def test_保存し直した画像は削除の順番を後にする(self):
+        """既にディスクにある画像をもう一度保存すると最終参照時刻が進み、古いものから削除されることを確認"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ImageCache(max_bytes=0, directory=temp_dir, max_disk_bytes=250)
+            for index in range(2):
+                key = f"key{index}"
+                cache.put(key, b'x' * 100)
+                os.utime(cache.path_for(key), ns=(index * 10 ** 9, index * 10 ** 9))
+            cache.put('key0', b'x' * 100)
+            cache.put('key2', b'x' * 100)
+            remaining = sorted(name for name in os.listdir(temp_dir))
+            self.assertEqual(remaining, ['key0.img', 'key2.img'])
+
+
+class TestGeneratorImageCache(unittest.TestCase):
+    """ジェネレーターでの描画済み画像の再利用のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cache_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cache_dir.cleanup)
+        # フォントの検出結果などをユーザーのキャッシュディレクトリに書かない
+        patcher = patch.dict(os.environ, {'WORDCLOUD_CACHE_DIR': cache_dir.name})
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.generator = JapaneseWordCloudGenerator()
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.generator.image_cache = ImageCache()
+
+    def test_キャッシュに当たればWordCloudを実行しない(self):
+        """2回目の描画ではレイアウトを行わず、同じバイト列を返すことを確認"""
+        options = RenderOptions(width=200, height=100)
+        with contextlib.redirect_stdout(io.StringIO()):
+            first, cached = self.generator.render_encoded(WORD_FREQ, 'PNG', options)
+            self.assertFalse(cached)
+            with patch.object(self.generator, 'render_wordcloud') as render_wordcloud:
+                second, cached = self.generator.render_encoded(WORD_FREQ, 'PNG', options)
+        render_wordcloud.assert_not_called()
+        self.assertTrue(cached)
+        self.assertEqual(first, second)
+        self.assertEqual(self.generator.image_cache.stats()['hits'], 1)
+
+    def test_キャッシュした画像をファイルに書き出す(self):
+        """generate_wordcloudで2回目はキャッシュから同じ内容のファイルを書き出すことを確認"""
+        options = RenderOptions(width=200, height=100)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, name) for name in ("first.png", "second.png")]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertTrue(self.generator.generate_wordcloud(WORD_FREQ, paths[0], options=options))
+                with patch.object(self.generator, 'render_wordcloud') as render_wordcloud:
+                    self.assertTrue(self.generator.generate_wordcloud(WORD_FREQ, paths[1], options=options))
+            render_wordcloud.assert_not_called()
+            contents = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    contents.append(f.read())
+        self.assertEqual(contents[0], contents[1])
+
+    def test_キャッシュを無効にできる(self):
+        """image_cacheにNoneを代入すると毎回描画することを確認"""
+        self.generator.image_cache = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, first_cached = self.generator.render_encoded(WORD_FREQ, 'PNG', RenderOptions(width=200, height=100))
+            _, second_cached = self.generator.render_encoded(WORD_FREQ, 'PNG', RenderOptions(width=200, height=100))
+        self.assertFalse(first_cached or second_cached)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from src.jobs import CancelToken, JobCancelled, JobScheduler
+from src.rendering import create_wordcloud
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+class TestJobScheduler(unittest.TestCase):
+    """ジョブスケジューラのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.scheduler = JobScheduler(debounce=0.05)
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.scheduler.shutdown()
+
+    def test_短時間の連続投入は最後のジョブだけを実行する(self):
+        """デバウンス中に投入されたジョブが1つにまとめられることを確認"""
+        results = []
+        done = threading.Event()
+
+        for value in range(5):
+            self.scheduler.submit(lambda cancel, value=value: (results.append(value), done.set()))
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual(results, [4])
+
+    def test_新しいジョブで実行中のジョブをキャンセルする(self):
+        """実行中のジョブがチェックポイントで中断し、新しいジョブが実行されることを確認"""
+        started = threading.Event()
+        finished = []
+        done = threading.Event()
+
+        def long_job(cancel):
+            started.set()
+            while True:
+                cancel.check()
+                threading.Event().wait(0.01)
+
+        def short_job(cancel):
+            finished.append("short")
+            done.set()
+
+        first = self.scheduler.submit(long_job, debounce=0)
+        self.assertTrue(started.wait(2))
+        self.scheduler.submit(short_job, debounce=0)
+
+        self.assertTrue(done.wait(2))
+        self.assertTrue(first.cancelled)
+        self.assertEqual(finished, ["short"])
+
+    def test_保存中に投入したプレビューは保存をキャンセルしない(self):
+        """preemptible=Falseのジョブは後のジョブでキャンセルされず、後のジョブはその完了後に実行されることを確認"""
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+        done = threading.Event()
+
+        def save_job(cancel):
+            started.set()
+            while not release.is_set():
+                cancel.check()
+                threading.Event().wait(0.01)
+            order.append("save")
+
+        def preview_job(cancel):
+            order.append("preview")
+            done.set()
+
+        save = self.scheduler.submit(save_job, debounce=0, preemptible=False)
+        self.assertTrue(started.wait(2))
+        self.scheduler.submit(preview_job, debounce=0)
+        self.scheduler.submit(preview_job, debounce=0)
+        release.set()
+
+        self.assertTrue(done.wait(2))
+        self.assertFalse(save.cancelled)
+        self.assertEqual(order, ["save", "preview"])
+
+    def test_キャンセルボタンは保存も中断する(self):
+        """cancelではpreemptible=Falseのジョブもキャンセルされることを確認"""
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def save_job(cancel):
+            started.set()
+            try:
+                while True:
+                    cancel.check()
+                    threading.Event().wait(0.01)
+            finally:
+                stopped.set()
+
+        save = self.scheduler.submit(save_job, debounce=0, preemptible=False)
+        self.assertTrue(started.wait(2))
+        self.scheduler.cancel()
+        self.assertTrue(stopped.wait(2))
+        self.assertTrue(save.cancelled)
+
+    def test_キャンセルした待機中のジョブは実行しない(self):
+        """cancelで待機中のジョブが破棄されることを確認"""
+        results = []
+        self.scheduler.submit(lambda cancel: results.append("run"), debounce=0.2)
+        self.scheduler.cancel()
+        threading.Event().wait(0.3)
+        self.assertEqual(results, [])
+        self.assertFalse(self.scheduler.busy)
+
+
+class TestCancelCheckpoints(unittest.TestCase):
+    """解析・レイアウトのチェックポイントのテストクラス"""
+
+    def test_キャンセル済みなら集計とレイアウトを中断する(self):
+        """キャンセル済みのトークンで集計・レイアウトがJobCancelledになることを確認"""
+        cancel = CancelToken()
+        cancel.cancel()
+        generator = JapaneseWordCloudGenerator()
+
+        with self.assertRaises(JobCancelled):
+            generator.count_words(["犬が好きです。"], cancel=cancel)
+        with self.assertRaises(JobCancelled):
+            create_wordcloud({"犬": 2, "猫": 1}, cancel=cancel)
+
+    def test_キャンセルされなければ結果は変わらない(self):
+        """トークンを渡しても集計結果が同じことを確認"""
+        generator = JapaneseWordCloudGenerator()
+        text = "犬が好きです。猫も好きです。"
+        self.assertEqual(generator.count_words([text], cancel=CancelToken()), generator.count_words([text]))
+
+
+if __name__ == "__main__":
+    unittest.main()
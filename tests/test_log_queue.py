@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from src.log_queue import LOG_DEBUG, LOG_INFO, LOG_WARNING, LogQueue
+
+
+class TestLogQueue(unittest.TestCase):
+    """GUIのログキューのテストクラス"""
+
+    def test_しきい値未満のログは捨てる(self):
+        """レベルがしきい値未満のログが積まれないことを確認"""
+        log_queue = LogQueue(level=LOG_INFO)
+        log_queue.log("詳細", LOG_DEBUG)
+        log_queue.log("情報")
+        log_queue.log("警告", LOG_WARNING)
+
+        self.assertFalse(log_queue.enabled_for(LOG_DEBUG))
+        self.assertEqual(log_queue.drain(), (["情報", "警告"], 0))
+        self.assertEqual(log_queue.drain(), ([], 0))
+
+    def test_上限を超えたら古い行から捨てる(self):
+        """上限を超えた分は古い行から捨て、その行数を返すことを確認"""
+        log_queue = LogQueue(max_pending=3)
+        for index in range(5):
+            log_queue.log(f"行{index}")
+
+        self.assertEqual(log_queue.drain(), (["行2", "行3", "行4"], 2))
+
+    def test_複数スレッドから書き込める(self):
+        """複数スレッドから書き込んだ行が欠けずに取り出せることを確認"""
+        log_queue = LogQueue()
+
+        def write(thread_index):
+            for index in range(1000):
+                log_queue.log(f"{thread_index}-{index}")
+
+        threads = [threading.Thread(target=write, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines, dropped = log_queue.drain()
+        self.assertEqual(len(lines), 4000)
+        self.assertEqual(dropped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
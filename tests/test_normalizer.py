@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+import re
+import unittest
+from src.normalizer import TextNormalizer
+
+
+def legacy_preprocess(text):
+    """従来の4回のre.subによる前処理"""
+    text = re.sub(r'[0-9０-９]+', '', text)
+    text = re.sub(r'[!-/:-@\[-`{-~]', '', text)
+    text = re.sub(r'[！-／：-＠［-｀｛-～]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text
+
+
+class TestTextNormalizer(unittest.TestCase):
+    """テキスト正規化のテストクラス"""
+
+    def test_既定設定は従来の前処理と一致する(self):
+        """数字・記号の除去と空白の正規化が従来と同じ結果になることを確認"""
+        text = "第２章 2024年の売上は+15.3%（前年比）!\n\n ＃速報 \t[参考] 犬と猫"
+        self.assertEqual(TextNormalizer().normalize(text), legacy_preprocess(text))
+
+    def test_除去した文字をはさむ空白も1つにまとまる(self):
+        """記号の除去で隣り合った空白が1つにまとまることを確認"""
+        self.assertEqual(TextNormalizer().normalize("犬 123 猫"), "犬 猫")
+
+    def test_NFKCで全角半角の表記ゆれを統一する(self):
+        """NFKC有効時に全角英字と半角カナが統一されることを確認"""
+        normalizer = TextNormalizer(nfkc=True)
+        self.assertEqual(normalizer.normalize("ＡＩとｱﾙｺﾞﾘｽﾞﾑ"), "AIとアルゴリズム")
+
+    def test_ルールを無効にできる(self):
+        """数字の除去を無効にすると数字が残ることを確認"""
+        normalizer = TextNormalizer(remove_digits=False)
+        self.assertEqual(normalizer.normalize("2024年"), "2024年")
+
+    def test_表層形の判定(self):
+        """1文字の語とひらがなのみの語が除外されることを確認"""
+        normalizer = TextNormalizer()
+        self.assertTrue(normalizer.is_valid_token("データ"))
+        self.assertTrue(normalizer.is_valid_token("遊び"))
+        self.assertFalse(normalizer.is_valid_token("犬"))
+        self.assertFalse(normalizer.is_valid_token("これ"))
+        # メモ化された2回目の判定も同じ結果になる
+        self.assertFalse(normalizer.is_valid_token("これ"))
+
+    def test_設定だけがpickleされる(self):
+        """ワーカーへ渡す際に設定が引き継がれることを確認"""
+        normalizer = TextNormalizer(nfkc=True)
+        normalizer.is_valid_token("データ")
+        restored = pickle.loads(pickle.dumps(normalizer))
+        self.assertEqual(restored.config(), normalizer.config())
+
+
+if __name__ == "__main__":
+    unittest.main()
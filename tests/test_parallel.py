@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+from collections import Counter
+from src.parallel import choose_shard_size, count_words_parallel, resolve_worker_count, MIN_SHARD_SIZE
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+SAMPLE_TEXT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt"
+)
+
+
+class TestParallel(unittest.TestCase):
+    """並列解析のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def test_並列解析の結果が逐次処理と一致する(self):
+        """頻度だけでなく単語の並び順も逐次処理と一致することを確認"""
+        text = self.generator.read_text_file(SAMPLE_TEXT_PATH)
+        expected = Counter(self.generator.extract_words(text))
+
+        shards = self.generator.read_text_chunks(SAMPLE_TEXT_PATH, chunk_size=100)
+        word_counts = count_words_parallel(shards, workers=2)
+
+        self.assertEqual(word_counts, expected)
+        self.assertEqual(list(word_counts), list(expected))
+
+    def test_ワーカー数の正規化(self):
+        """0以下のワーカー数はCPUコア数に置き換えられることを確認"""
+        self.assertEqual(resolve_worker_count(4), 4)
+        self.assertEqual(resolve_worker_count(0), os.cpu_count() or 1)
+
+    def test_シャードサイズの範囲(self):
+        """シャードサイズが下限とchunk_sizeの間に収まり、chunk_sizeを超えないことを確認"""
+        self.assertEqual(choose_shard_size(100, 4, 1024 * 1024), MIN_SHARD_SIZE)
+        self.assertEqual(choose_shard_size(10 ** 10, 4, 1024 * 1024), 1024 * 1024)
+        self.assertEqual(choose_shard_size(10 ** 10, 4, 4096), 4096)
+        self.assertEqual(choose_shard_size(100, 4, 4096), 4096)
+
+
+if __name__ == "__main__":
+    unittest.main()
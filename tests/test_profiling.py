@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+from src.profiling import NULL_PROFILER, StageProfiler
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+SAMPLE_TEXT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt")
+
+
+class TestStageProfiler(unittest.TestCase):
+    """段階ごとの計測のテストクラス"""
+
+    def test_同じ段階の計測は合計される(self):
+        """同じ段階を複数回通ると、回数と時間が合計されることを確認"""
+        with StageProfiler(trace_memory=False) as profiler:
+            for _ in range(3):
+                with profiler.stage('count'):
+                    sum(range(1000))
+        stage = profiler.stages['count']
+        self.assertEqual(stage['calls'], 3)
+        self.assertGreater(stage['wall_seconds'], 0)
+        self.assertNotIn('peak_alloc_bytes', stage)
+
+    def test_最大割り当て量は入れ子の段階にも反映される(self):
+        """内側の段階での割り当てが外側の段階の最大割り当て量にも含まれることを確認"""
+        with StageProfiler() as profiler:
+            with profiler.stage('layout'):
+                with profiler.stage('encode'):
+                    data = bytearray(4 * 1024 * 1024)
+                    del data
+                small = [0] * 10
+                del small
+        self.assertGreaterEqual(profiler.stages['encode']['peak_alloc_bytes'], 4 * 1024 * 1024)
+        self.assertGreaterEqual(profiler.stages['layout']['peak_alloc_bytes'],
+                                profiler.stages['encode']['peak_alloc_bytes'])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_イテレータの取り出しを計測する(self):
+        """iterで包んだイテレータの要素がそのまま返り、取り出しの回数が記録されることを確認"""
+        profiler = StageProfiler(trace_memory=False)
+        self.assertEqual(list(profiler.iter('read', ["a", "b"])), ["a", "b"])
+        self.assertEqual(profiler.stages['read']['calls'], 3)
+
+    def test_段階が終わるたびにコールバックが呼ばれる(self):
+        """callbackに段階名とその回の計測値が渡されることを確認"""
+        received = []
+        with StageProfiler(callback=lambda name, metrics: received.append((name, metrics))) as profiler:
+            with profiler.stage('tokenize'):
+                pass
+            with profiler.stage('count'):
+                pass
+        self.assertEqual([name for name, _ in received], ['tokenize', 'count'])
+        self.assertEqual(set(received[0][1]), {'wall_seconds', 'cpu_seconds', 'peak_alloc_bytes'})
+
+    def test_指定した段階だけcProfileで計測する(self):
+        """profile_stageの段階で呼ばれた関数だけがプロファイルに含まれることを確認"""
+        def inside():
+            return sum(range(1000))
+
+        def outside():
+            return sum(range(1000))
+
+        with StageProfiler(trace_memory=False, profile_stage='tokenize') as profiler:
+            with profiler.stage('tokenize'):
+                inside()
+            with profiler.stage('count'):
+                outside()
+        functions = [entry['function'] for entry in profiler.summary()['profile']['functions']]
+        self.assertTrue(any('(inside)' in function for function in functions))
+        self.assertFalse(any('(outside)' in function for function in functions))
+
+    def test_無効なプロファイラは何もしない(self):
+        """NULL_PROFILERのstage・iterが処理に影響しないことを確認"""
+        self.assertFalse(NULL_PROFILER.enabled)
+        with NULL_PROFILER.stage('read'):
+            pass
+        chunks = ["a"]
+        self.assertIs(NULL_PROFILER.iter('read', chunks), chunks)
+
+
+class TestGeneratorProfiling(unittest.TestCase):
+    """ジェネレーターの計測のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cache_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cache_dir.cleanup)
+        # フォントの検出結果などをユーザーのキャッシュディレクトリに書かない
+        patcher = patch.dict(os.environ, {'WORDCLOUD_CACHE_DIR': cache_dir.name})
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+
+    def test_ファイルの処理を段階ごとに計測する(self):
+        """process_text_fileで読み込みからエンコードまでの段階が記録され、JSONに書き出せることを確認"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = JapaneseWordCloudGenerator()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler = StageProfiler()
+            with contextlib.redirect_stdout(io.StringIO()):
+                success = generator.process_text_file(SAMPLE_TEXT_PATH, os.path.join(temp_dir, "out.png"),
+                                                      profiler=profiler)
+            profiler.close()
+            self.assertTrue(success)
+            self.assertEqual(set(profiler.stages),
+                             {'read', 'normalize', 'tokenize', 'count', 'filter', 'layout', 'encode', 'write'})
+            # エンコードと書き出しは別の段階として1回ずつ記録される
+            self.assertEqual((profiler.stages['encode']['calls'], profiler.stages['write']['calls']), (1, 1))
+            json_path = os.path.join(temp_dir, "profile.json")
+            profiler.write_json(json_path)
+            with open(json_path, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        self.assertIn('tokenize', summary['stages'])
+        self.assertEqual(set(summary), {'total_wall_seconds', 'stages'})
+        self.assertEqual(set(summary['stages']['tokenize']), {'calls', 'wall_seconds', 'cpu_seconds', 'peak_alloc_bytes'})
+        self.assertIn('形態素解析', profiler.summary_line())
+
+
+if __name__ == '__main__':
+    unittest.main()
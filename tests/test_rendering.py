@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from random import Random
+from PIL import Image
+from wordcloud.wordcloud import colormap_color_func
+from src.options import OutputOptions, RenderOptions
+from src.rendering import (ColormapColorFunc, LayoutCache, create_wordcloud, encode_image,
+                           image_format_for, save_image)
+
+
+WORD_FREQ = {"犬": 5, "猫": 3, "鳥": 2, "魚": 1}
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestRendering(unittest.TestCase):
+    """直接ラスタライズによる描画のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.image = create_wordcloud(WORD_FREQ, options=RenderOptions(width=200, height=100)).to_image()
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def test_指定したサイズと倍率で描画される(self):
+        """出力画像のサイズが幅×高さ×倍率と一致することを確認"""
+        self.assertEqual(self.image.size, (200, 100))
+        scaled = create_wordcloud(WORD_FREQ, options=RenderOptions(width=200, height=100, scale=2))
+        self.assertEqual(scaled.to_image().size, (400, 200))
+
+    def test_拡張子から画像形式を決める(self):
+        """拡張子に応じた形式で保存され、formatの指定が優先されることを確認"""
+        for name, expected in [("a.png", "PNG"), ("a.webp", "WEBP"), ("a.jpg", "JPEG"), ("a", "PNG")]:
+            path = os.path.join(self.temp_dir.name, name)
+            save_image(self.image, path)
+            with Image.open(path) as saved:
+                self.assertEqual(saved.format, expected)
+        self.assertEqual(image_format_for("a.png", OutputOptions(format="webp")), "WEBP")
+
+    def test_エンコーダーの設定が反映される(self):
+        """PNGの圧縮レベルやJPEGの品質でサイズが変わることを確認"""
+        fast = encode_image(self.image, "PNG", OutputOptions(png_compress_level=0))
+        small = encode_image(self.image, "PNG", OutputOptions(png_compress_level=9))
+        self.assertGreater(len(fast), len(small))
+
+        low = encode_image(self.image, "JPEG", OutputOptions(jpeg_quality=10))
+        high = encode_image(self.image, "JPEG", OutputOptions(jpeg_quality=95))
+        self.assertGreater(len(high), len(low))
+        self.assertEqual(Image.open(io.BytesIO(low)).size, self.image.size)
+
+    def test_配色はwordcloud標準と同じ(self):
+        """カラーマップによる配色がwordcloudのcolormap_color_funcと一致することを確認"""
+        ours, theirs = ColormapColorFunc("plasma"), colormap_color_func("plasma")
+        first, second = Random(42), Random(42)
+        for _ in range(10):
+            self.assertEqual(ours("犬", 10, (0, 0), None, random_state=first),
+                             theirs("犬", 10, (0, 0), None, random_state=second))
+
+    def test_描画でpyplotを読み込まない(self):
+        """描画と保存の経路でmatplotlib.pyplotが読み込まれないことを確認"""
+        code = ("import sys\n"
+                "from src.rendering import create_wordcloud, encode_image\n"
+                "encode_image(create_wordcloud({'a': 1, 'b': 2}).to_image())\n"
+                "print('matplotlib.pyplot' in sys.modules)\n")
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class TestLayoutCache(unittest.TestCase):
+    """レイアウトの再利用のテストクラス"""
+
+    def test_配色の変更ではレイアウトを再計算しない(self):
+        """配色・背景色だけが違う描画でレイアウトが再利用されることを確認"""
+        cache = LayoutCache()
+        base = RenderOptions(width=200, height=100)
+        first = create_wordcloud(WORD_FREQ, options=base, layout_cache=cache)
+        second = create_wordcloud(WORD_FREQ, options=RenderOptions(
+            width=200, height=100, colormap='plasma', background_color='black'), layout_cache=cache)
+
+        self.assertEqual(cache.stats(), {'entries': 1, 'hits': 1, 'misses': 1})
+        self.assertEqual([item[:4] for item in first.layout_], [item[:4] for item in second.layout_])
+        self.assertNotEqual([item[4] for item in first.layout_], [item[4] for item in second.layout_])
+        self.assertEqual(second.to_image().getpixel((0, 0)), (0, 0, 0))
+
+    def test_キャッシュの有無で描画結果が変わらない(self):
+        """レイアウトを再利用した描画が、最初から描画した結果と一致することを確認"""
+        cache = LayoutCache()
+        options = RenderOptions(width=200, height=100, colormap='plasma')
+        create_wordcloud(WORD_FREQ, options=RenderOptions(width=200, height=100), layout_cache=cache)
+
+        cached = create_wordcloud(WORD_FREQ, options=options, layout_cache=cache).to_image()
+        fresh = create_wordcloud(WORD_FREQ, options=options).to_image()
+
+        self.assertEqual(cached.tobytes(), fresh.tobytes())
+
+    def test_サイズや頻度表が違えば再計算する(self):
+        """レイアウトに影響する設定が違う場合は別のレイアウトになることを確認"""
+        cache = LayoutCache()
+        create_wordcloud(WORD_FREQ, options=RenderOptions(width=200, height=100), layout_cache=cache)
+        create_wordcloud(WORD_FREQ, options=RenderOptions(width=300, height=100), layout_cache=cache)
+        create_wordcloud(dict(WORD_FREQ, 馬=4), options=RenderOptions(width=200, height=100), layout_cache=cache)
+        self.assertEqual(cache.stats()['hits'], 0)
+        self.assertEqual(cache.stats()['entries'], 3)
+
+
+class TestInMemoryRender(unittest.TestCase):
+    """ファイルを介さない描画APIのテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        from src.wordcloud_generator import JapaneseWordCloudGenerator
+        cls.generator = JapaneseWordCloudGenerator()
+        cls.options = RenderOptions(width=200, height=100)
+
+    def test_画像と配列とバイト列で取得できる(self):
+        """PIL.Image・NumPy配列・エンコード済みバイト列が同じ画像を表すことを確認"""
+        image = self.generator.render_image(WORD_FREQ, self.options, font_path='')
+        array = self.generator.render_array(WORD_FREQ, self.options, font_path='')
+        data = self.generator.render_bytes(WORD_FREQ, 'PNG', self.options, font_path='')
+
+        self.assertEqual(array.shape, (100, 200, 3))
+        self.assertEqual(Image.open(io.BytesIO(data)).tobytes(), image.tobytes())
+
+    def test_プレビューは指定サイズに収まる大きさで描画する(self):
+        """縦横比を保ったまま指定サイズに収まり、拡大はしないことを確認"""
+        preview = self.generator.render_preview(WORD_FREQ, (100, 100), self.options, font_path='')
+        self.assertEqual(preview.size, (100, 50))
+        full = self.generator.render_preview(WORD_FREQ, (1000, 1000), self.options, font_path='')
+        self.assertEqual(full.size, (200, 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
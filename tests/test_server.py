@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import http.client
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.options import RenderOptions
+from src.server import RenderServer, RequestError, parse_render_params, parse_request_body
+
+
+SAMPLE_TEXT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class TestRequestParsing(unittest.TestCase):
+    """リクエストの解析のテストクラス"""
+
+    def test_パラメータからオプションを作る(self):
+        """GUIと同じパラメータがAnalysisOptions・RenderOptionsに反映されることを確認"""
+        analysis_options, render_options = parse_render_params({
+            'width': '400', 'height': '300', 'min_freq': '2', 'max_words': '50',
+            'colormap': 'plasma', 'background': 'black', 'exclude': '技術, 研究',
+        }, RenderOptions(font_path='/fonts/ipag.ttf'))
+        self.assertEqual(analysis_options.min_freq, 2)
+        self.assertEqual(list(analysis_options.exclude_words), ['技術', '研究'])
+        self.assertEqual((render_options.width, render_options.height), (400, 300))
+        self.assertEqual(render_options.max_words, 50)
+        self.assertEqual(render_options.colormap, 'plasma')
+        self.assertEqual(render_options.background_color, 'black')
+        self.assertEqual(render_options.font_path, '/fonts/ipag.ttf')
+
+    def test_不正なパラメータは400になる(self):
+        """範囲外の値・不明なカラーマップ・不正な背景色・正規表現の除外ルールを拒否することを確認"""
+        for fields in ({'width': '0'}, {'height': 'abc'}, {'max_words': '100000'},
+                       {'colormap': 'no_such_map'}, {'background': 'not-a-color'},
+                       {'exclude': 're:(('}, {'exclude': ['技術', 're:(a+)+$']}, {'exclude': {'a': 1}}):
+            with self.subTest(fields=fields):
+                with self.assertRaises(RequestError) as context:
+                    parse_render_params(fields)
+                self.assertEqual(context.exception.status, 400)
+
+    def test_本文の形式ごとにテキストを取り出す(self):
+        """text/plain・フォーム・JSON・multipartのアップロードからテキストとパラメータを取り出すことを確認"""
+        text, fields = parse_request_body('text/plain; charset=utf-8', "自然言語処理".encode('utf-8'), 'width=300')
+        self.assertEqual((text, fields), ("自然言語処理", {'width': '300'}))
+
+        text, fields = parse_request_body('application/x-www-form-urlencoded',
+                                          "text=%E6%8A%80%E8%A1%93&colormap=plasma".encode('ascii'))
+        self.assertEqual((text, fields), ("技術", {'colormap': 'plasma'}))
+
+        text, fields = parse_request_body('application/json',
+                                          json.dumps({'text': "研究", 'width': 200, 'exclude': ["a"]}).encode('utf-8'))
+        self.assertEqual((text, fields), ("研究", {'width': '200', 'exclude': ["a"]}))
+
+        body = ("--XYZ\r\n"
+                'Content-Disposition: form-data; name="file"; filename="input.txt"\r\n'
+                "Content-Type: text/plain\r\n\r\n"
+                "アップロードされた文章\r\n"
+                "--XYZ\r\n"
+                'Content-Disposition: form-data; name="max_words"\r\n\r\n'
+                "20\r\n"
+                "--XYZ--\r\n").encode('utf-8')
+        text, fields = parse_request_body('multipart/form-data; boundary=XYZ', body)
+        self.assertEqual((text, fields), ("アップロードされた文章", {'max_words': '20'}))
+
+    def test_文字コードを判定してテキストを読む(self):
+        """charsetの指定がないShift_JIS・EUC-JPの本文も読めることを確認"""
+        for encoding in ('cp932', 'euc_jp'):
+            with self.subTest(encoding=encoding):
+                text, _ = parse_request_body('text/plain', "日本語の文章です。".encode(encoding))
+                self.assertEqual(text, "日本語の文章です。")
+
+    def test_テキストがなければ400になる(self):
+        """テキストが空、または対応する文字コードで読めない場合に拒否することを確認"""
+        for content_type, body in (('text/plain', b''), ('application/json', b'{"width": 100}'),
+                                   ('text/plain', b'\x81 \x81 ')):
+            with self.subTest(content_type=content_type, body=body):
+                with self.assertRaises(RequestError) as context:
+                    parse_request_body(content_type, body)
+                self.assertEqual(context.exception.status, 400)
+
+
+class TestRenderServer(unittest.TestCase):
+    """サーバーの起動と描画のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理: ワーカー1つのサーバーを別スレッドで起動する"""
+        cache_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(cache_dir.cleanup)
+        # フォントの検出結果などをユーザーのキャッシュディレクトリに書かない
+        patcher = patch.dict(os.environ, {'WORDCLOUD_CACHE_DIR': cache_dir.name})
+        patcher.start()
+        cls.addClassCleanup(patcher.stop)
+        cls.server = RenderServer(port=0, workers=1, concurrency=1, queue_size=0, queue_timeout=5,
+                                  render_options=RenderOptions(width=200, height=150))
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(cls.loop)
+            cls.loop.run_until_complete(cls.server.start())
+            started.set()
+            cls.loop.run_forever()
+
+        cls.thread = threading.Thread(target=run, daemon=True)
+        cls.thread.start()
+        if not started.wait(60):
+            raise RuntimeError("サーバーが起動しませんでした")
+        with open(SAMPLE_TEXT_PATH, 'r', encoding='utf-8') as f:
+            cls.text = f.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        """テストクラス全体の後処理"""
+        asyncio.run_coroutine_threadsafe(cls.server.close(), cls.loop).result(30)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(10)
+        cls.loop.close()
+
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=30)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            connection.close()
+
+    def test_テキストからPNGを返す(self):
+        """POST /renderで指定したサイズのPNGが返ることを確認"""
+        status, headers, body = self.request(
+            'POST', '/render?width=240&height=160&colormap=plasma', self.text.encode('utf-8'),
+            {'Content-Type': 'text/plain; charset=utf-8'})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'image/png')
+        self.assertTrue(body.startswith(PNG_SIGNATURE))
+        from PIL import Image
+        self.assertEqual(Image.open(io.BytesIO(body)).size, (240, 160))
+
+    def test_同じリクエストは描画済みの画像を返す(self):
+        """同じテキストとパラメータの2回目のリクエストは、キャッシュから同じPNGが返ることを確認"""
+        path = '/render?width=220&height=140&colormap=cividis'
+        responses = [self.request('POST', path, self.text.encode('utf-8'), {'Content-Type': 'text/plain'})
+                     for _ in range(2)]
+        self.assertEqual([status for status, _, _ in responses], [200, 200])
+        self.assertEqual([headers['X-Cache'] for _, headers, _ in responses], ['miss', 'hit'])
+        self.assertEqual(responses[0][2], responses[1][2])
+
+    def test_有効な単語がなければ422を返す(self):
+        """助詞だけのテキストでは422が返ることを確認"""
+        status, _, body = self.request('POST', '/render', "はがを".encode('utf-8'),
+                                       {'Content-Type': 'text/plain'})
+        self.assertEqual(status, 422)
+        self.assertIn('error', json.loads(body))
+
+    def test_待ち行列が埋まっていれば503を返す(self):
+        """同時実行数と待ち行列が埋まっている間のリクエストを、描画せずに断ることを確認"""
+        # 描画枠を先に押さえて、最初のリクエストを順番待ちにする
+        asyncio.run_coroutine_threadsafe(self.server._slots.acquire(), self.loop).result(5)
+        results = []
+        first = threading.Thread(target=lambda: results.append(
+            self.request('POST', '/render', self.text.encode('utf-8'), {'Content-Type': 'text/plain'})))
+        first.start()
+        try:
+            deadline = time.monotonic() + 10
+            while self.server.pending == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            rejected_before = self.server.stats()['rejected']
+            status, headers, _ = self.request('POST', '/render', self.text.encode('utf-8'),
+                                              {'Content-Type': 'text/plain'})
+            self.assertEqual(status, 503)
+            self.assertIn('Retry-After', headers)
+            self.assertEqual(self.server.stats()['rejected'], rejected_before + 1)
+        finally:
+            self.loop.call_soon_threadsafe(self.server._slots.release)
+            first.join(30)
+        self.assertEqual(results[0][0], 200)
+
+    def test_状態を返す(self):
+        """GET /healthでワーカー数と処理件数が返ることを確認"""
+        status, _, body = self.request('GET', '/health')
+        self.assertEqual(status, 200)
+        stats = json.loads(body)
+        self.assertEqual(stats['workers'], 1)
+        self.assertEqual(stats['concurrency'], 1)
+        self.assertIn('served', stats)
+
+    def test_未知のパスとメソッドを拒否する(self):
+        """存在しないパスは404、/renderへのGETは405になることを確認"""
+        self.assertEqual(self.request('GET', '/unknown')[0], 404)
+        self.assertEqual(self.request('GET', '/render')[0], 405)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from PIL import Image
+from src.options import AnalysisOptions, RenderOptions
+from src.startup_preview import StartupPreviewCache, startup_preview_key
+from src.tokenizers import TokenizerConfig, installed_fingerprint
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartupPreview(unittest.TestCase):
+    """起動時プレビューのキャッシュのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.sample_path = os.path.join(self.temp_dir.name, "sample.txt")
+        with open(self.sample_path, 'w', encoding='utf-8') as f:
+            f.write("犬が好きです。猫も好きです。")
+        self.cache = StartupPreviewCache(os.path.join(self.temp_dir.name, "cache"))
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def key(self, analysis=None, render=None, preview_size=(380, 280)):
+        return startup_preview_key(self.sample_path, analysis or AnalysisOptions(),
+                                   render or RenderOptions(), preview_size)
+
+    def test_サンプルか設定が変わるとキーが変わる(self):
+        """サンプルテキスト・既定の設定・プレビューの大きさの変更でキーが変わることを確認"""
+        base = self.key()
+        self.assertEqual(base, self.key())
+        self.assertNotEqual(base, self.key(analysis=AnalysisOptions(exclude_words=["犬"])))
+        self.assertNotEqual(base, self.key(render=RenderOptions(colormap='plasma')))
+        self.assertNotEqual(base, self.key(preview_size=(200, 100)))
+
+        with open(self.sample_path, 'a', encoding='utf-8') as f:
+            f.write("鳥も好きです。")
+        self.assertNotEqual(base, self.key())
+
+    def test_フォントと形態素解析器が変わるとキーが変わる(self):
+        """使うフォントのファイルの更新・形態素解析器やユーザー辞書の変更でキーが変わることを確認"""
+        font_path = os.path.join(self.temp_dir.name, "font.ttf")
+        with open(font_path, 'wb') as f:
+            f.write(b"font")
+        dict_path = os.path.join(self.temp_dir.name, "user.csv")
+        with open(dict_path, 'w', encoding='utf-8') as f:
+            f.write("単語\n")
+
+        def key(font=font_path, tokenizer=TokenizerConfig('mecab')):
+            return startup_preview_key(self.sample_path, AnalysisOptions(), RenderOptions(), (380, 280),
+                                       font, installed_fingerprint(tokenizer))
+
+        base = key()
+        self.assertEqual(base, key())
+        self.assertNotEqual(base, self.key())
+        self.assertNotEqual(base, key(tokenizer=TokenizerConfig('sudachi-c')))
+        self.assertNotEqual(base, key(tokenizer=TokenizerConfig('mecab', dict_path)))
+
+        os.utime(font_path, ns=(0, os.stat(font_path).st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(base, key())
+
+    def test_保存した画像を読み込み古い画像は削除する(self):
+        """保存した画像が同じキーで読み込め、別のキーで保存すると古い画像が消えることを確認"""
+        old_key, new_key = self.key(), self.key(render=RenderOptions(colormap='plasma'))
+        self.assertIsNone(self.cache.load(old_key))
+
+        self.cache.save(old_key, Image.new('RGB', (40, 30), 'red'))
+        loaded = self.cache.load(old_key)
+        self.assertEqual(loaded.size, (40, 30))
+        self.assertEqual(loaded.getpixel((0, 0)), (255, 0, 0))
+
+        self.cache.save(new_key, Image.new('RGB', (40, 30), 'blue'))
+        self.assertIsNone(self.cache.load(old_key))
+        self.assertEqual(os.listdir(self.cache.directory), [new_key + ".png"])
+
+    def test_GUIの読み込みで重いモジュールを読み込まない(self):
+        """GUIモジュールの読み込みと起動時プレビューのキーの材料の計算ではwordcloud・matplotlib・PIL・MeCabを読み込まないことを確認"""
+        code = ("import sys\n"
+                "import src.wordcloud_gui\n"
+                "import src.fonts\n"
+                "from src.tokenizers import TokenizerConfig, installed_fingerprint\n"
+                "installed_fingerprint(TokenizerConfig('mecab'))\n"
+                "print(sorted(m for m in ('wordcloud', 'matplotlib', 'PIL', 'MeCab', 'numpy')"
+                " if m in sys.modules))\n")
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import tempfile
+import unittest
+from src.options import AnalysisOptions
+from src.stopwords import StopwordFilter, as_stopword_filter
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+class TestStopwordFilter(unittest.TestCase):
+    """ストップワードフィルタのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_単語とルールで判定する(self):
+        """完全一致・前方一致・後方一致・正規表現のそれぞれで除外されることを確認"""
+        stopwords = StopwordFilter.from_entries(
+            ["こと", "prefix:株式会社", "suffix:さん", "re:第.+章"])
+
+        self.assertIn("こと", stopwords)
+        self.assertIn("株式会社テスト", stopwords)
+        self.assertIn("田中さん", stopwords)
+        self.assertIn("第三章", stopwords)
+        self.assertNotIn("テスト", stopwords)
+        # 正規表現は単語全体に一致する必要がある
+        self.assertNotIn("第三章まで", stopwords)
+
+    def test_ファイルから読み込む(self):
+        """テキストとCSVのストップワードファイルを読み込めることを確認"""
+        text_path = self.write_file("stop.txt", "# コメント\n犬\n\nprefix:猫\n")
+        csv_path = self.write_file("stop.csv", "鳥,動物\n魚,動物\n")
+
+        stopwords = StopwordFilter.from_files([text_path, csv_path], entries=["馬"])
+
+        for word in ["犬", "猫舌", "鳥", "魚", "馬"]:
+            self.assertIn(word, stopwords)
+        self.assertNotIn("動物", stopwords)
+        self.assertNotIn("# コメント", stopwords)
+
+    def test_同じ内容のフィルタは等しい(self):
+        """エントリが同じなら等しく、ピクル後も同じ判定になることを確認"""
+        stopwords = as_stopword_filter(["犬", "suffix:さん"])
+        self.assertEqual(stopwords, StopwordFilter(["犬"], suffixes=["さん"]))
+        self.assertEqual(pickle.loads(pickle.dumps(stopwords)), stopwords)
+        self.assertEqual(AnalysisOptions(exclude_words=["犬"]), AnalysisOptions(exclude_words={"犬"}))
+
+
+class TestStopwordExtraction(unittest.TestCase):
+    """形態素解析時のストップワード除去のテストクラス"""
+
+    def test_抽出時にストップワードを除く(self):
+        """ストップワードが抽出結果に含まれないことを確認"""
+        text = "犬と遊びました。猫と遊びました。田中さんと散歩しました。"
+        generator = JapaneseWordCloudGenerator(
+            stopwords=StopwordFilter.from_entries(["遊び", "suffix:さん"]))
+
+        words = generator.extract_words(text)
+
+        self.assertNotIn("遊び", words)
+        self.assertTrue(all(not word.endswith("さん") for word in words))
+        self.assertIn("散歩", words)
+
+    def test_除外単語にルールを使える(self):
+        """create_word_frequencyの除外単語に前方一致ルールを指定できることを確認"""
+        generator = JapaneseWordCloudGenerator()
+        generator.set_exclude_words(["prefix:機械"])
+        word_freq = generator.create_word_frequency(["機械学習", "機械", "学習"], min_freq=1)
+        self.assertEqual(word_freq, {"学習": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
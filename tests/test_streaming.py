@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import patch
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+SAMPLE_TEXT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_text.txt"
+)
+
+
+class TestReadTextChunks(unittest.TestCase):
+    """チャンク読み込みのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        with patch('MeCab.Tagger'):
+            self.generator = JapaneseWordCloudGenerator()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def write_file(self, content):
+        path = os.path.join(self.temp_dir.name, "input.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_チャンクを連結すると元のテキストに戻る(self):
+        """チャンク分割でテキストが欠落・重複しないことを確認"""
+        content = "".join(f"{i}行目の文章です。\n" for i in range(200))
+        path = self.write_file(content)
+
+        chunks = list(self.generator.read_text_chunks(path, chunk_size=100))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), content)
+
+    def test_チャンクは行の境界で区切られる(self):
+        """最後以外のチャンクが改行で終わることを確認"""
+        content = "".join(f"{i}行目の文章です。\n" for i in range(200))
+        path = self.write_file(content)
+
+        chunks = list(self.generator.read_text_chunks(path, chunk_size=100))
+
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk.endswith("\n"))
+
+    def test_改行のない長い行は文末で区切られる(self):
+        """改行を含まない長い行は句点の位置で区切られることを確認"""
+        content = "長い文章です。" * 100
+        path = self.write_file(content)
+
+        chunks = list(self.generator.read_text_chunks(path, chunk_size=50))
+
+        self.assertEqual("".join(chunks), content)
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk.endswith("。"))
+
+    def test_不正なチャンクサイズ(self):
+        """チャンクサイズが0以下の場合はエラーになることを確認"""
+        path = self.write_file("テキスト")
+        with self.assertRaises(ValueError):
+            list(self.generator.read_text_chunks(path, chunk_size=0))
+
+
+class TestCountWords(unittest.TestCase):
+    """ストリーミング集計のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def test_ストリーミング集計が一括処理と一致する(self):
+        """チャンク単位の集計結果が一括処理の結果と一致することを確認"""
+        text = self.generator.read_text_file(SAMPLE_TEXT_PATH)
+        expected = Counter(self.generator.extract_words(text))
+
+        chunks = self.generator.read_text_chunks(SAMPLE_TEXT_PATH, chunk_size=200)
+        word_counts = self.generator.count_words(chunks)
+
+        self.assertEqual(word_counts, expected)
+
+    def test_集計結果から頻度を計算できる(self):
+        """Counterを渡してもcreate_word_frequencyが使えることを確認"""
+        word_counts = Counter({"犬": 3, "猫": 1})
+        self.generator.set_exclude_words(["猫"])
+        try:
+            word_freq = self.generator.create_word_frequency(word_counts, min_freq=1)
+        finally:
+            self.generator.clear_exclude_words()
+
+        self.assertEqual(word_freq, {"犬": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
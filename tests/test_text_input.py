@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import codecs
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from src.text_input import (InputError, decode_bytes, detect_encoding, input_stem, iter_text_blocks,
+                            normalize_encoding, read_text)
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEXT = "自然言語処理の研究では、形態素解析が基本的な技術です。\n日本語の文章を単語に分割します。\n"
+
+
+class TestEncodingDetection(unittest.TestCase):
+    """文字コードの判定のテストクラス"""
+
+    def test_日本語の文字コードを判定する(self):
+        """UTF-8・BOM付きUTF-8・Shift_JIS・EUC-JPのバイト列を判定できることを確認"""
+        self.assertEqual(detect_encoding(TEXT.encode('utf-8'), True), 'utf-8')
+        self.assertEqual(detect_encoding(codecs.BOM_UTF8 + TEXT.encode('utf-8'), True), 'utf-8-sig')
+        self.assertEqual(detect_encoding(TEXT.encode('cp932'), True), 'cp932')
+        self.assertEqual(detect_encoding(TEXT.encode('euc_jp'), True), 'euc_jp')
+
+    def test_途中で切れたマルチバイト文字はエラーにしない(self):
+        """先頭の一部だけで判定する場合、末尾で途切れた文字があってもUTF-8と判定することを確認"""
+        data = TEXT.encode('utf-8')
+        self.assertEqual(detect_encoding(data[:len(data) - 2]), 'utf-8')
+
+    def test_読めないバイト列はInputErrorになる(self):
+        """いずれの文字コードでも読めない場合にInputErrorを送出することを確認"""
+        with self.assertRaises(InputError):
+            detect_encoding(b'\x81 \x81 ', True)
+        with self.assertRaises(InputError):
+            decode_bytes(b'\x81 \x81 ')
+
+    def test_文字コード名を正規化する(self):
+        """別名をCP932などにまとめ、autoは自動判定（None）とすることを確認"""
+        self.assertEqual(normalize_encoding('Shift_JIS'), 'cp932')
+        self.assertEqual(normalize_encoding('EUC-JP'), 'euc_jp')
+        self.assertIsNone(normalize_encoding('auto'))
+        with self.assertRaises(InputError):
+            normalize_encoding('no-such-encoding')
+
+
+class TestTextInput(unittest.TestCase):
+    """入力ファイルの読み込みのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_文字コードを判定して読み込む(self):
+        """文字コードを指定しなくても、各文字コードのファイルを同じ文字列として読めることを確認"""
+        for encoding in ('utf-8', 'utf-8-sig', 'cp932', 'euc_jp'):
+            with self.subTest(encoding=encoding):
+                path = self.write(f"{encoding}.txt", TEXT.encode(encoding))
+                self.assertEqual(read_text(path), TEXT)
+
+    def test_UTF8を指定してもBOMを取り除く(self):
+        """--encoding utf-8のBOM付きファイルを、全体の読み込みでもチャンクの読み込みでもBOMなしで読むことを確認"""
+        path = self.write("bom.txt", codecs.BOM_UTF8 + TEXT.encode('utf-8'))
+        self.assertEqual(read_text(path, 'utf-8'), TEXT)
+        self.assertEqual("".join(block for _, block in iter_text_blocks(path, 'utf-8', block_chars=4)), TEXT)
+        self.assertEqual(decode_bytes(codecs.BOM_UTF8 + TEXT.encode('utf-8'), 'utf-8'), TEXT)
+
+    def test_改行コードを統一する(self):
+        """CRLFの改行をLFとして読むことを確認"""
+        path = self.write("crlf.txt", TEXT.replace("\n", "\r\n").encode('cp932'))
+        self.assertEqual(read_text(path), TEXT)
+
+    def test_指定した文字コードで読めなければInputErrorになる(self):
+        """UTF-8と指定したShift_JISのファイルはInputErrorになることを確認"""
+        path = self.write("sjis.txt", TEXT.encode('cp932'))
+        with self.assertRaises(InputError):
+            read_text(path, 'utf-8')
+
+    def test_空のファイルを読み込む(self):
+        """空のファイルは空文字列になることを確認"""
+        self.assertEqual(read_text(self.write("empty.txt", b'')), '')
+
+    def test_gzipを展開しながら読み込む(self):
+        """.gzのShift_JISのテキストを読み込めることを確認"""
+        path = self.write("input.txt.gz", gzip.compress(TEXT.encode('cp932')))
+        self.assertEqual(read_text(path), TEXT)
+
+    def test_zipのメンバーを順に読み込む(self):
+        """.zip内の.txtを名前順に、メンバーごとの文字コードで読み込むことを確認"""
+        path = os.path.join(self.temp_dir.name, "archive.zip")
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr("b.txt", "二番目の文章です。".encode('euc_jp'))
+            archive.writestr("a.txt", "一番目の文章です。".encode('utf-8'))
+            archive.writestr("readme.md", "読み込まないファイル")
+        blocks = list(iter_text_blocks(path, block_chars=4))
+        self.assertEqual([name for name, _ in blocks][0], f"{path}:a.txt")
+        self.assertEqual(read_text(path), "一番目の文章です。\n\n二番目の文章です。")
+
+    def test_テキストのないzipはInputErrorになる(self):
+        """ファイルのないアーカイブ・壊れたアーカイブでInputErrorを送出することを確認"""
+        path = os.path.join(self.temp_dir.name, "empty.zip")
+        with zipfile.ZipFile(path, 'w'):
+            pass
+        with self.assertRaises(InputError):
+            read_text(path)
+        with self.assertRaises(InputError):
+            read_text(self.write("broken.zip", b'not a zip file'))
+
+    def test_出力ファイル名から圧縮の拡張子を除く(self):
+        """.txt.gz・.zipの入力から拡張子を除いた名前を得ることを確認"""
+        self.assertEqual(input_stem("/data/news.txt.gz"), "news")
+        self.assertEqual(input_stem("/data/corpus.zip"), "corpus")
+        self.assertEqual(input_stem("/data/sample.txt"), "sample")
+
+
+class TestGeneratorInput(unittest.TestCase):
+    """ジェネレーターからの読み込みのテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.generator = JapaneseWordCloudGenerator()
+
+    def test_Shift_JISのファイルをチャンクで読み込む(self):
+        """Shift_JISのファイルをチャンクに分けて読み、連結すると元の文字列になることを確認"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "sjis.txt")
+            with open(path, 'wb') as f:
+                f.write((TEXT * 50).encode('cp932'))
+            chunks = list(self.generator.read_text_chunks(path, chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), TEXT * 50)
+
+    def test_zipのメンバーの境界でチャンクを区切る(self):
+        """1つのチャンクが複数のメンバーにまたがらないことを確認"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "archive.zip")
+            with zipfile.ZipFile(path, 'w') as archive:
+                archive.writestr("a.txt", "一番目")
+                archive.writestr("b.txt", "二番目")
+            chunks = list(self.generator.read_text_chunks(path, chunk_size=1000))
+        self.assertEqual(chunks, ["一番目", "二番目"])
+
+    def test_ファイルがなければ例外を送出する(self):
+        """存在しないファイルで終了せずにFileNotFoundErrorを送出することを確認"""
+        with self.assertRaises(FileNotFoundError):
+            self.generator.read_text_file("/no/such/file.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import patch
+from src.token_cache import TokenCache, split_paragraphs
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEST_TEXT = """犬が好きです。猫も好きです。
+
+犬と遊びました。猫と遊びました。
+
+鳥は自由です。"""
+
+
+class TestTokenCache(unittest.TestCase):
+    """トークン化キャッシュのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = TokenCache(os.path.join(self.temp_dir.name, "tokens.sqlite3"))
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_保存した出現回数を順序どおりに取得できる(self):
+        """保存したCounterが単語の順序も含めて復元されることを確認"""
+        counts = Counter({"猫": 1, "犬": 3})
+        self.cache.put_many([("key", counts)])
+
+        found = self.cache.get_many(["key", "missing"])
+
+        self.assertEqual(found, {"key": counts})
+        self.assertEqual(list(found["key"]), ["猫", "犬"])
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_容量を超えると古いものから削除される(self):
+        """容量上限を超えると最後の参照が古いエントリから削除されることを確認"""
+        self.cache.max_bytes = 60
+        self.cache.put_many([("old", Counter({"古い単語": 1}))])
+        self.cache.put_many([("new", Counter({"新しい単語": 1}))])
+        self.cache.get_many(["new"])
+        self.cache.put_many([("newest", Counter({"最新の単語": 1}))])
+
+        found = self.cache.get_many(["old", "new", "newest"])
+
+        self.assertNotIn("old", found)
+        self.assertIn("newest", found)
+        self.assertLessEqual(self.cache.stats()['bytes'], 60)
+
+    def test_キャッシュを削除できる(self):
+        """clearで全エントリが削除されることを確認"""
+        self.cache.put_many([("key", Counter({"犬": 1}))])
+        self.cache.clear()
+        self.assertEqual(self.cache.get_many(["key"]), {})
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_段落への分割(self):
+        """空行で段落に分割されることを確認"""
+        self.assertEqual(len(split_paragraphs(TEST_TEXT)), 3)
+
+
+class TestCachedCountWords(unittest.TestCase):
+    """キャッシュを使った集計のテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = TokenCache(os.path.join(self.temp_dir.name, "tokens.sqlite3"))
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def test_キャッシュの有無で集計結果が変わらない(self):
+        """キャッシュを使った集計が通常の集計と一致することを確認"""
+        expected = self.generator.count_words(split_paragraphs(TEST_TEXT))
+
+        first = self.generator.count_words([TEST_TEXT], cache=self.cache)
+        second = self.generator.count_words([TEST_TEXT], cache=self.cache)
+
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+
+    def test_変更された段落だけを再解析する(self):
+        """一部の段落を変更した場合、その段落だけが解析されることを確認"""
+        self.generator.count_words([TEST_TEXT], cache=self.cache)
+        edited = TEST_TEXT.replace("鳥は自由です。", "鳥は元気です。")
+
+        with patch.object(self.generator, 'iter_words', wraps=self.generator.iter_words) as iter_words:
+            self.generator.count_words([edited], cache=self.cache)
+
+        self.assertEqual(iter_words.call_count, 1)
+
+    def test_正規化ルールが違えばキャッシュを共有しない(self):
+        """トークナイザー設定が変わるとキャッシュキーも変わることを確認"""
+        from src.normalizer import TextNormalizer
+        other = JapaneseWordCloudGenerator(normalizer=TextNormalizer(nfkc=True))
+        self.assertNotEqual(self.generator.tokenizer_fingerprint(), other.tokenizer_fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.tokenizers import (SUDACHI_MAX_CHARS, MeCabTokenizer, TokenizerConfig, create_tokenizer,
+                            read_mecab_pos_table, split_text)
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEST_TEXT = "国家公務員の試験を受けました。東京都で研究開発の仕事をしています。"
+
+HAS_SUDACHI = importlib.util.find_spec('sudachipy') is not None
+
+
+class TestSplitText(unittest.TestCase):
+    """長いテキストの分割のテストクラス"""
+
+    def test_上限以下の長さで文の境界で区切る(self):
+        """区切った各部分が上限以下で、文末で区切られ、連結すると元に戻ることを確認"""
+        text = "これは文です。" * 100
+        pieces = list(split_text(text, 50))
+        self.assertTrue(all(len(piece) <= 50 for piece in pieces))
+        self.assertTrue(all(piece.endswith("。") for piece in pieces))
+        self.assertEqual("".join(pieces), text)
+
+    def test_区切りがなければ上限で区切る(self):
+        """改行・句点・空白のないテキストも上限の長さで区切ることを確認"""
+        self.assertEqual(list(split_text("あ" * 25, 10)), ["あ" * 10, "あ" * 10, "あ" * 5])
+        self.assertEqual(list(split_text("", 10)), [])
+
+
+class TestTokenizerBackends(unittest.TestCase):
+    """形態素解析器のバックエンドのテストクラス"""
+
+    def test_MeCabは表層形と品詞を返す(self):
+        """(表層形, 品詞の大分類, 素性) の組を返すことを確認"""
+        tokens = [token for token in MeCabTokenizer().tokens("研究します") if token[0]]
+        self.assertEqual(tokens[0][:2], ("研究", "名詞"))
+        self.assertTrue(tokens[0][2].startswith("名詞,"))
+
+    def test_不明な名前はValueErrorになる(self):
+        """TOKENIZER_NAMESにない名前を拒否することを確認"""
+        with self.assertRaises(ValueError):
+            create_tokenizer('juman')
+
+    @unittest.skipUnless(HAS_SUDACHI, "SudachiPyがインストールされていません")
+    def test_Sudachiの分割単位を切り替える(self):
+        """分割単位Aでは複合語を短く、Cでは長く区切ることを確認"""
+        surfaces = {mode: [surface for surface, _, _ in create_tokenizer(f"sudachi-{mode}").tokens("国家公務員")]
+                    for mode in ('a', 'c')}
+        self.assertEqual(surfaces['c'], ["国家公務員"])
+        self.assertGreater(len(surfaces['a']), 1)
+
+    @unittest.skipUnless(HAS_SUDACHI, "SudachiPyがインストールされていません")
+    def test_Sudachiは長いテキストも解析できる(self):
+        """一度に解析できる上限を超えるテキストも分割して解析することを確認"""
+        text = "仕事の話です。" * (SUDACHI_MAX_CHARS // 5)
+        surfaces = [surface for surface, _, _ in create_tokenizer('sudachi-c').tokens(text)]
+        self.assertEqual(surfaces.count("仕事"), SUDACHI_MAX_CHARS // 5)
+
+
+class TestPartOfSpeechTable(unittest.TestCase):
+    """品詞を整数で判定する表のテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, name, text):
+        with open(os.path.join(self.temp_dir.name, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_pos_id_defから採用する品詞IDを作る(self):
+        """大分類が一致する品詞IDだけを集め、選択の形の大分類にも対応することを確認"""
+        self.write("pos-id.def", "その他,間投,*,* 0\n名詞,一般,*,* 38\n(動詞|形容詞),自立,*,* 31\n助詞,格助詞,*,* 13\n")
+        self.write("left-id.def", "0 BOS/EOS,*,*\n1 名詞,一般,*\n")
+        self.assertEqual(read_mecab_pos_table(self.temp_dir.name, {'名詞', '動詞'}), ('posid', frozenset({38, 31})))
+
+    def test_pos_id_defがなければ左文脈IDを使う(self):
+        """品詞IDで区別できない辞書ではleft-id.def、どちらもなければNoneになることを確認"""
+        self.assertIsNone(read_mecab_pos_table(self.temp_dir.name, {'名詞'}))
+        self.write("left-id.def", "0 BOS/EOS,*,*\n1 名詞,一般,*\n2 助詞,格助詞,*\n3 名詞,固有名詞,*\n")
+        self.assertEqual(read_mecab_pos_table(self.temp_dir.name, {'名詞'}), ('lcAttr', frozenset({1, 3})))
+        self.write("pos-id.def", "名詞,一般,*,* 1\n")
+        self.assertEqual(read_mecab_pos_table(self.temp_dir.name, {'名詞'})[0], 'lcAttr')
+
+
+class TestWordsFastPath(unittest.TestCase):
+    """品詞で絞り込んだ単語を返す経路のテストクラス"""
+
+    TEXT = "昨日見た映画は面白かった。東京で研究開発の仕事をしています。"
+
+    def test_素性で絞り込んだ結果と一致する(self):
+        """words()が、tokens()を品詞の大分類で絞り込んだ結果と同じになることを確認"""
+        tokenizer = create_tokenizer('mecab')
+        expected = [surface for surface, pos, _ in tokenizer.tokens(self.TEXT) if pos in ("名詞", "動詞", "形容詞")]
+        self.assertEqual(list(tokenizer.words(self.TEXT)), expected)
+        with mock.patch('src.tokenizers.read_mecab_pos_table', return_value=None):
+            fallback = create_tokenizer('mecab')
+        self.assertEqual(list(fallback.words(self.TEXT)), expected)
+
+    def test_Latticeを再利用する(self):
+        """繰り返し解析してもMeCab.Latticeを1つだけ作ることを確認"""
+        tokenizer = create_tokenizer('mecab')
+        for _ in range(3):
+            list(tokenizer.words(self.TEXT))
+            list(tokenizer.tokens(self.TEXT))
+        self.assertEqual(tokenizer.lattices.stats(), {'created': 1, 'idle': 1})
+
+    def test_採用する品詞を指定する(self):
+        """parts_of_speechに指定した品詞だけを返すことを確認"""
+        words = list(create_tokenizer('mecab', parts_of_speech="名詞").words(self.TEXT))
+        self.assertIn("映画", words)
+        self.assertNotIn("面白かっ", words)
+        self.assertEqual(TokenizerConfig(parts_of_speech="名詞, 動詞,名詞").parts_of_speech, ("名詞", "動詞"))
+        with self.assertRaises(ValueError):
+            TokenizerConfig(parts_of_speech="")
+
+    def test_原形で数える(self):
+        """lemmaの場合は活用した語を原形で返し、原形を表層形ごとに覚えておくことを確認"""
+        tokenizer = create_tokenizer('mecab', lemma=True)
+        words = list(tokenizer.words(self.TEXT))
+        self.assertIn("見る", words)
+        self.assertIn("面白い", words)
+        self.assertIn("映画", words)
+        self.assertIn("見る", set(tokenizer._lemmas.values()))
+        memoized = dict(tokenizer._lemmas)
+        self.assertEqual(list(tokenizer.words(self.TEXT)), words)
+        self.assertEqual(tokenizer._lemmas, memoized)
+
+    def test_原形の記憶は上限を超えない(self):
+        """覚えておく原形の数がLEMMA_CACHE_LIMITを超えず、作り直しても同じ結果になることを確認"""
+        tokenizer = create_tokenizer('mecab', lemma=True)
+        expected = list(tokenizer.words(self.TEXT))
+        with mock.patch('src.tokenizers.LEMMA_CACHE_LIMIT', 2):
+            tokenizer._lemmas.clear()
+            self.assertEqual(list(tokenizer.words(self.TEXT)), expected)
+            self.assertLessEqual(len(tokenizer._lemmas), 2)
+
+    @unittest.skipUnless(HAS_SUDACHI, "SudachiPyがインストールされていません")
+    def test_Sudachiも同じ規則で絞り込む(self):
+        """SudachiPyでも品詞の指定と原形での集計ができることを確認"""
+        tokenizer = create_tokenizer('sudachi-c', parts_of_speech=("名詞", "形容詞"), lemma=True)
+        words = list(tokenizer.words(self.TEXT))
+        self.assertIn("面白い", words)
+        self.assertNotIn("見る", words)
+
+
+class TestGeneratorLemma(unittest.TestCase):
+    """原形で数えるジェネレーターのテストクラス"""
+
+    def test_原形にまとめて数える(self):
+        """活用形の違う語を1つにまとめ、トークン化キャッシュのキーも変わることを確認"""
+        text = "映画を見た。映画を見る。映画を見ます。"
+        with contextlib.redirect_stdout(io.StringIO()):
+            surface = JapaneseWordCloudGenerator()
+            lemma = JapaneseWordCloudGenerator(tokenizer=TokenizerConfig(lemma=True))
+        self.assertEqual(lemma.extract_words(text).count("見る"), 3)
+        self.assertEqual(surface.extract_words(text).count("見る"), 1)
+        self.assertNotEqual(surface.tokenizer_fingerprint(), lemma.tokenizer_fingerprint())
+
+
+@unittest.skipUnless(HAS_SUDACHI, "SudachiPyがインストールされていません")
+class TestGeneratorWithSudachi(unittest.TestCase):
+    """SudachiPyを使ったジェネレーターのテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.mecab = JapaneseWordCloudGenerator()
+            cls.sudachi = JapaneseWordCloudGenerator(tokenizer='sudachi-c')
+
+    def test_同じ規則で単語を採用する(self):
+        """MeCabと同じく名詞・動詞・形容詞のうち、1文字・ひらがなのみの単語を除いて返すことを確認"""
+        words = self.sudachi.extract_words(TEST_TEXT)
+        self.assertIn("国家公務員", words)
+        self.assertIn("仕事", words)
+        self.assertNotIn("の", words)
+        self.assertTrue(all(len(word) > 1 for word in words))
+
+    def test_解析器が違えばキャッシュを共有しない(self):
+        """トークン化キャッシュのキーが解析器ごとに変わることを確認"""
+        self.assertNotEqual(self.mecab.tokenizer_fingerprint(), self.sudachi.tokenizer_fingerprint())
+        with contextlib.redirect_stdout(io.StringIO()):
+            sudachi_a = JapaneseWordCloudGenerator(tokenizer='sudachi-a')
+        self.assertNotEqual(self.sudachi.tokenizer_fingerprint(), sudachi_a.tokenizer_fingerprint())
+
+    def test_システム辞書が変わればキャッシュを共有しない(self):
+        """読み込んだsystem.dicのパス・ファイルが変わるとフィンガープリントが変わることを確認"""
+        default = create_tokenizer('sudachi-c')
+        self.assertIn('SudachiDict-core', default.fingerprint()['versions'])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "system.dic")
+            os.symlink(default.system_path, path)
+            tokenizer = create_tokenizer('sudachi-c', system_dictionary=path)
+            fingerprint = tokenizer.fingerprint()
+            self.assertNotEqual(fingerprint, default.fingerprint())
+            self.assertNotIn('SudachiDict-core', fingerprint['versions'])
+
+            # 同じパスの辞書を作り直した場合
+            rebuilt = os.path.join(temp_dir, "rebuilt.dic")
+            with open(rebuilt, 'wb') as f:
+                f.write(b"dic")
+            os.remove(path)
+            os.symlink(rebuilt, path)
+            self.assertNotEqual(tokenizer.fingerprint(), fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
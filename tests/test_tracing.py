@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+from src.tracing import NULL_TRACER, TRACE_SUMMARY, TRACE_TOKEN, open_tracer, parse_trace_level
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+TEST_TEXT = "犬が好きです。猫も好きです。犬と遊びました。"
+
+
+class TestTracing(unittest.TestCase):
+    """デバッグトレースのテストクラス"""
+
+    @classmethod
+    def setUpClass(cls):
+        """テストクラス全体の前処理"""
+        cls.generator = JapaneseWordCloudGenerator()
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.trace_path = os.path.join(self.temp_dir.name, "trace.jsonl")
+
+    def tearDown(self):
+        """各テストの後処理"""
+        self.temp_dir.cleanup()
+
+    def read_records(self):
+        with open(self.trace_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_トレース無効時はファイルを作らない(self):
+        """レベルがoffの場合はNULL_TRACERが返り、ファイルが作られないことを確認"""
+        tracer = open_tracer(self.trace_path, "off")
+        self.assertIs(tracer, NULL_TRACER)
+        self.generator.extract_words(TEST_TEXT, tracer=tracer)
+        self.assertFalse(os.path.exists(self.trace_path))
+
+    def test_summaryレベルではトークンを記録しない(self):
+        """summaryレベルでは前処理とサマリーのみ記録されることを確認"""
+        with open_tracer(self.trace_path, TRACE_SUMMARY) as tracer:
+            words = self.generator.extract_words(TEST_TEXT, tracer=tracer)
+
+        events = [record['event'] for record in self.read_records()]
+        self.assertEqual(events, ['preprocess', 'summary'])
+        summary = self.read_records()[-1]
+        self.assertEqual(summary['words'], len(words))
+
+    def test_tokenレベルでは全ノードを記録する(self):
+        """tokenレベルでは採用された単語がすべてトークンレコードに現れることを確認"""
+        with open_tracer(self.trace_path, TRACE_TOKEN) as tracer:
+            words = self.generator.extract_words(TEST_TEXT, tracer=tracer)
+
+        accepted = [record['surface'] for record in self.read_records()
+                    if record['event'] == 'token' and record['accepted']]
+        self.assertEqual(accepted, words)
+
+    def test_トレースの有無で抽出結果が変わらない(self):
+        """トレースを有効にしても抽出結果が同じであることを確認"""
+        expected = self.generator.extract_words(TEST_TEXT)
+        with open_tracer(self.trace_path, TRACE_TOKEN) as tracer:
+            self.assertEqual(self.generator.extract_words(TEST_TEXT, tracer=tracer), expected)
+
+    def test_不明なトレースレベル(self):
+        """不明なレベル名はValueErrorになることを確認"""
+        self.assertEqual(parse_trace_level("token"), TRACE_TOKEN)
+        with self.assertRaises(ValueError):
+            parse_trace_level("verbose")
+
+
+if __name__ == "__main__":
+    unittest.main()
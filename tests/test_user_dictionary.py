@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.tokenizers import TokenizerConfig, as_tokenizer, create_tokenizer
+from src.user_dictionary import UserDictionaryError, prepare_user_dictionary
+from src.wordcloud_generator import JapaneseWordCloudGenerator
+
+
+WORD = "ワードクラウドメーカー"
+TEXT = f"{WORD}で文章を可視化します。"
+
+# unidic（unidic-lite）形式のユーザー辞書のエントリ
+MECAB_ENTRY = f"{WORD},,,5000,名詞,固有名詞,一般,*,*,*,{WORD},{WORD},{WORD},{WORD},{WORD},{WORD},固,*,*,*,*\n"
+SUDACHI_ENTRY = f"{WORD},4786,4786,5000,{WORD},名詞,固有名詞,一般,*,*,*,{WORD},{WORD},*,A,*,*,*,*\n"
+
+HAS_SUDACHI = importlib.util.find_spec('sudachipy') is not None
+
+
+class UserDictionaryTestCase(unittest.TestCase):
+    """コンパイル結果を一時ディレクトリに保存するテストの基底クラス"""
+
+    def setUp(self):
+        """各テストの前処理"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        patcher = mock.patch.dict(os.environ, {'WORDCLOUD_CACHE_DIR': os.path.join(self.temp_dir.name, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, text, encoding='utf-8'):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding=encoding) as f:
+            f.write(text)
+        return path
+
+
+class TestPrepareUserDictionary(UserDictionaryTestCase):
+    """コンパイル済みの辞書のキャッシュのテストクラス"""
+
+    def setUp(self):
+        """各テストの前処理: 渡されたCSVを記録して空の辞書を出力するコンパイラーを用意する"""
+        super().setUp()
+        self.compiled_sources = []
+
+        def compiler(source, output):
+            with open(source, 'r', encoding='utf-8') as f:
+                self.compiled_sources.append(f.read())
+            with open(output, 'wb') as f:
+                f.write(b'dic')
+        self.compiler = compiler
+
+    def test_同じCSVは一度だけコンパイルする(self):
+        """2回目はコンパイルせずに同じ.dicを返すことを確認"""
+        source = self.write("user.csv", MECAB_ENTRY)
+        first = prepare_user_dictionary(source, 'mecab', None, self.compiler)
+        second = prepare_user_dictionary(source, 'mecab', None, self.compiler)
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith(".dic"))
+        self.assertEqual(len(self.compiled_sources), 1)
+        self.assertEqual(os.listdir(os.path.dirname(first)), [os.path.basename(first)])
+
+    def test_内容やシステム辞書が変われば再コンパイルする(self):
+        """CSVを書き換えた場合・システム辞書が違う場合は別の.dicにコンパイルすることを確認"""
+        source = self.write("user.csv", MECAB_ENTRY)
+        first = prepare_user_dictionary(source, 'mecab', None, self.compiler)
+        self.assertNotEqual(prepare_user_dictionary(source, 'mecab', ["/other/sys.dic", 1, 1], self.compiler), first)
+        self.write("user.csv", MECAB_ENTRY.replace("5000", "4000"))
+        self.assertNotEqual(prepare_user_dictionary(source, 'mecab', None, self.compiler), first)
+        self.assertEqual(len(self.compiled_sources), 3)
+
+    def test_CSVはUTF8に変換してからコンパイルする(self):
+        """Shift_JIS・CRLFのCSVをUTF-8・LFにしてコンパイラーに渡すことを確認"""
+        source = self.write("sjis.csv", MECAB_ENTRY.replace("\n", "\r\n"), encoding='cp932')
+        prepare_user_dictionary(source, 'mecab', None, self.compiler)
+        self.assertEqual(self.compiled_sources, [MECAB_ENTRY])
+
+    def test_コンパイル済みの辞書はそのまま使う(self):
+        """.dicのパスはコンパイルせずに返すことを確認"""
+        path = self.write("user.dic", "")
+        self.assertEqual(prepare_user_dictionary(path, 'mecab', None, self.compiler), os.path.abspath(path))
+        self.assertEqual(self.compiled_sources, [])
+
+    def test_失敗したコンパイルは残さない(self):
+        """ファイルがない場合・コンパイルに失敗した場合にUserDictionaryErrorを送出し、一時ファイルを残さないことを確認"""
+        with self.assertRaises(UserDictionaryError):
+            prepare_user_dictionary(os.path.join(self.temp_dir.name, "none.csv"), 'mecab', None, self.compiler)
+
+        def failing(source, output):
+            raise UserDictionaryError(f"format error: {source}")
+        source = self.write("user.csv", MECAB_ENTRY)
+        with self.assertRaises(UserDictionaryError) as context:
+            prepare_user_dictionary(source, 'mecab', None, failing)
+        self.assertIn(source, str(context.exception))
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir.name, "cache", "user_dict")), [])
+
+
+class TestMeCabUserDictionary(UserDictionaryTestCase):
+    """MeCabのユーザー辞書のテストクラス"""
+
+    def test_ユーザー辞書の単語を1語として解析する(self):
+        """CSVの単語が分割されずに1つの名詞になることを確認"""
+        default = [surface for surface, _, _ in create_tokenizer('mecab').tokens(WORD) if surface]
+        self.assertGreater(len(default), 1)
+        tokenizer = create_tokenizer('mecab', user_dictionaries=[self.write("user.csv", MECAB_ENTRY)])
+        tokens = [token[:2] for token in tokenizer.tokens(TEXT) if token[0]]
+        self.assertEqual(tokens[0], (WORD, "名詞"))
+
+    def test_ワーカーはコンパイル済みの辞書を読み込む(self):
+        """バックエンドのconfigから作った解析器が、コンパイルし直さずに同じ結果を返すことを確認"""
+        tokenizer = create_tokenizer('mecab', user_dictionaries=[self.write("user.csv", MECAB_ENTRY)])
+        self.assertTrue(all(path.endswith(".dic") for path in tokenizer.config.user_dictionaries))
+        with mock.patch('src.tokenizers.compile_mecab_dictionary') as compiler:
+            worker = as_tokenizer(tokenizer.config)
+        compiler.assert_not_called()
+        self.assertEqual(list(worker.tokens(TEXT)), list(tokenizer.tokens(TEXT)))
+
+    def test_ジェネレーターでユーザー辞書を使う(self):
+        """ユーザー辞書の単語を抽出し、トークン化キャッシュのキーも変わることを確認"""
+        config = TokenizerConfig('mecab', self.write("user.csv", MECAB_ENTRY))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator = JapaneseWordCloudGenerator(tokenizer=config)
+            default = JapaneseWordCloudGenerator()
+        self.assertIn(WORD, generator.extract_words(TEXT))
+        self.assertNotIn(WORD, default.extract_words(TEXT))
+        self.assertNotEqual(generator.tokenizer_fingerprint(), default.tokenizer_fingerprint())
+
+    def test_形式の誤ったCSVはUserDictionaryErrorになる(self):
+        """列の足りないCSVでプロセスを終了せずに例外を送出することを確認"""
+        with self.assertRaises(UserDictionaryError):
+            create_tokenizer('mecab', user_dictionaries=[self.write("broken.csv", "壊れた,行\n")])
+
+
+@unittest.skipUnless(HAS_SUDACHI, "SudachiPyがインストールされていません")
+class TestSudachiUserDictionary(UserDictionaryTestCase):
+    """SudachiPyのユーザー辞書のテストクラス"""
+
+    def test_ユーザー辞書の単語を1語として解析する(self):
+        """分割単位Aでも、CSVの単語を1語として解析することを確認"""
+        source = self.write("sudachi.csv", SUDACHI_ENTRY)
+        default = create_tokenizer('sudachi-a')
+        tokenizer = create_tokenizer('sudachi-a', user_dictionaries=[source])
+        self.assertGreater(len([surface for surface, _, _ in default.tokens(WORD)]), 1)
+        self.assertEqual([surface for surface, _, _ in tokenizer.tokens(WORD)], [WORD])
+        self.assertNotEqual(tokenizer.fingerprint(), default.fingerprint())
+
+
+if __name__ == "__main__":
+    unittest.main()
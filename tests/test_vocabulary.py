@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pickle
+import unittest
+from collections import Counter
+from src.vocabulary import Vocabulary
+
+
+WORDS = ["犬", "猫", "犬", "鳥", "魚", "猫", "犬", "馬", "鳥", "牛"]
+
+
+class TestVocabulary(unittest.TestCase):
+    """配列で出現回数を保持する語彙のテストクラス"""
+
+    def test_Counterと同じ集計結果になる(self):
+        """単語の列から集計した結果がCounterと一致し、Mappingとして使えることを確認"""
+        vocabulary = Vocabulary(WORDS)
+        expected = Counter(WORDS)
+
+        self.assertEqual(vocabulary, expected)
+        self.assertEqual(list(vocabulary), list(expected))
+        self.assertEqual(vocabulary["犬"], 3)
+        self.assertEqual(vocabulary["象"], 0)
+        self.assertNotIn("象", vocabulary)
+        self.assertEqual(vocabulary.total(), len(WORDS))
+
+    def test_部分的な集計をマージできる(self):
+        """Vocabulary・Counter同士のマージが配列の加算で正しく行われることを確認"""
+        merged = Vocabulary(WORDS[:5])
+        merged.update(Vocabulary(WORDS[5:]))
+        self.assertEqual(merged, Counter(WORDS))
+
+        merged.update({"象": 2, "犬": 1})
+        self.assertEqual(merged["象"], 2)
+        self.assertEqual(merged["犬"], 4)
+
+    def test_容量を超えても集計できる(self):
+        """初期容量を超える語彙数でも出現回数が失われないことを確認"""
+        words = [f"単語{i % 3000}" for i in range(9000)]
+        vocabulary = Vocabulary()
+        for start in range(0, len(words), 1000):
+            vocabulary.update(words[start:start + 1000])
+        self.assertEqual(len(vocabulary), 3000)
+        self.assertEqual(set(vocabulary.values()), {3})
+
+    def test_上位の単語はmost_commonと同じ順序になる(self):
+        """同数の単語を含む場合もCounter.most_commonと同じ順序で上位を選ぶことを確認"""
+        vocabulary = Vocabulary(WORDS)
+        expected = Counter(WORDS)
+        for n in (None, 1, 2, 3, 4, 10):
+            self.assertEqual(vocabulary.most_common(n), expected.most_common(n))
+
+    def test_最小出現回数と除外単語で絞り込む(self):
+        """条件を満たす単語が出現順の辞書になり、max_wordsで上位に絞れることを確認"""
+        vocabulary = Vocabulary(WORDS)
+        selected = vocabulary.select(min_freq=2, exclude_words=["猫"])
+        self.assertEqual(vocabulary.to_dict(selected), {"犬": 3, "鳥": 2})
+        self.assertEqual(vocabulary.to_dict(vocabulary.select(), max_words=2), {"犬": 3, "猫": 2})
+
+    def test_pickleで受け渡せる(self):
+        """並列解析のワーカーから返せるよう、pickleで同じ内容に復元できることを確認"""
+        vocabulary = Vocabulary(WORDS)
+        restored = pickle.loads(pickle.dumps(vocabulary))
+        self.assertEqual(restored, vocabulary)
+        restored.update(["犬"])
+        self.assertEqual(restored["犬"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import contextlib
+import io
 import unittest
 from unittest.mock import MagicMock, patch
-from src.wordcloud_generator import JapaneseWordCloudGenerator
+from src.wordcloud_generator import JapaneseWordCloudGenerator, main
 
 
 class TestExcludeWords(unittest.TestCase):
@@ -108,5 +110,26 @@ class TestExcludeWords(unittest.TestCase):
         self.assertNotIn("魚", word_freq)
 
 
+class TestCommandLine(unittest.TestCase):
+    """コマンドライン引数の検証のテストクラス"""
+
+    def run_main(self, *argv):
+        stderr = io.StringIO()
+        with patch('sys.argv', ['wordcloud_generator.py', *argv]), contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit) as context:
+                main()
+        return context.exception.code, stderr.getvalue()
+
+    def test_並列解析で使えないオプションはエラーにする(self):
+        """--workersが2以上のときに--cache・--trace-level tokenを黙って無視しないことを確認"""
+        for options, expected in ((['--cache'], '--cache'), (['--cache-dir', 'cache'], '--cache'),
+                                  (['--trace-level', 'token'], '--trace-level token')):
+            with self.subTest(options=options):
+                code, message = self.run_main('input.txt', '--workers', '2', *options)
+                self.assertEqual(code, 2)
+                self.assertIn(expected, message)
+                self.assertIn('--workers', message)
+
+
 if __name__ == "__main__":
     unittest.main()